@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+The import benchmark module
+
+Generates synthetic Filmliste documents and measures the
+import throughput of the updater against the configured
+database. On SQLite the substring search with the trigram
+index is compared with `LIKE`. The CPU bound stages alone
+can be measured with:
+
+    python -m resources.lib.benchmark [records]
+
+Copyright 2017-2019, Leo Moll and Dominik Schlösser
+Licensed under MIT License
+"""
+
+# -- Imports ------------------------------------------------
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import sqlite3
+import tempfile
+
+from datetime import datetime
+
+# pylint: disable=import-error
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+import resources.lib.updater as updater
+
+from resources.lib.mvupdate import AppLogger
+from resources.lib.mvupdate import Settings
+from resources.lib.mvupdate import Notifier
+from resources.lib.mvupdate import MediathekViewMonitor
+from resources.lib.storesqlite import StoreSQLite
+
+# -- Constants ----------------------------------------------
+CHANNELS = (
+    '3Sat', 'ARD', 'ARTE.DE', 'BR', 'DW', 'HR', 'KiKA', 'MDR', 'NDR',
+    'ORF', 'PHOENIX', 'RBB', 'SR', 'SRF', 'SWR', 'WDR', 'ZDF', 'ZDF-tivi'
+)
+SHOWS = (
+    'Tagesschau', 'Sportschau', 'Tatort', 'Markencheck', 'Weltspiegel',
+    'Panorama', 'Kulturzeit', 'Quarks', 'Terra X', 'Doku', 'Reportage',
+    'Nachrichten', 'Wetter', 'Magazin', 'Heute', 'Abendschau'
+)
+COLUMNS = [
+    "Sender", "Thema", "Titel", "Datum", "Zeit", "Dauer", "Größe [MB]",
+    "Beschreibung", "Url", "Website", "Url Untertitel", "Url RTMP",
+    "Url Klein", "Url RTMP Klein", "Url HD", "Url RTMP HD", "DatumL",
+    "Url History", "Geo", "neu"
+]
+# films per show and shows per channel block
+FILMS_PER_SHOW = 12
+SHOWS_PER_CHANNEL = 20
+# search terms of the search benchmark
+SEARCHES = ['TORT', 'ULTURZEI', 'FOLGE 1234', 'ERRA X 1', 'SCHAU 7 - TEIL']
+
+# -- Functions ----------------------------------------------
+
+
+def make_records(count, offset=0, seed=0):
+    """
+    Generates synthetic list records shaped like the `X`
+    entries of a Filmliste. Records are grouped in shows
+    and channels like in the real list, show names repeat
+    across channels and the video URLs of lower and higher
+    quality are compressed with the `|` notation. Sender
+    and thema are always filled in.
+
+    Args:
+        count(int): number of records to generate
+
+        offset(int, optional): index of the first record.
+            Records with the same index are identical. Default is 0
+
+        seed(int, optional): seed of the generated values. Default is 0
+    """
+    records = []
+    for index in range(offset, offset + count):
+        rng = random.Random(seed * 1000003 + index)
+        show = index // FILMS_PER_SHOW
+        channel = CHANNELS[(show // SHOWS_PER_CHANNEL) % len(CHANNELS)]
+        thema = '{} {}'.format(SHOWS[show % len(SHOWS)], show // len(SHOWS))
+        aired = 1577836800 + index * 137 % 31536000
+        airedtime = datetime.utcfromtimestamp(aired)
+        prefix = 'https://media.example.org/{}/{}/{}/'.format(channel.lower(), show, index)
+        records.append([
+            channel,
+            thema,
+            'Folge {} über {}'.format(index, thema) + ' - Teil 2' * rng.randint(0, 3),
+            airedtime.strftime('%d.%m.%Y'),
+            airedtime.strftime('%H:%M:%S'),
+            '00:{:02d}:{:02d}'.format(rng.randint(1, 59), rng.randint(0, 59)),
+            '{}'.format(rng.randint(10, 2000)),
+            ' '.join(['Beschreibung der Sendung mit Umlauten äöü'] * rng.randint(1, 8)),
+            prefix + 'video_hq.mp4',
+            'https://www.example.org/{}/{}'.format(channel.lower(), index),
+            prefix + 'subtitle.xml' if rng.random() < 0.3 else '',
+            '',
+            '{}|video_sd.mp4'.format(len(prefix)),
+            '',
+            '{}|video_hd.mp4'.format(len(prefix)) if rng.random() < 0.6 else '',
+            '',
+            '{}'.format(aired),
+            '',
+            rng.choice(['', '', 'DE', 'DE-AT-CH']),
+            'false'
+        ])
+    return records
+
+
+def write_filmliste(filename, records, stamp):
+    """
+    Writes a Filmliste document. Sender and thema are left
+    empty when they are the same as in the previous record,
+    as in the real list.
+
+    Args:
+        filename(str): name of the file to write
+
+        records(list): records generated by `make_records()`
+
+        stamp(int): creation time of the list as UNIX epoch
+    """
+    created = datetime.fromtimestamp(stamp).strftime('%d.%m.%Y, %H:%M')
+    listhash = hashlib.md5('{}:{}'.format(stamp, len(records)).encode('utf-8')).hexdigest()
+    sender = None
+    thema = None
+    with io.open(filename, 'w', encoding='utf-8') as listfile:
+        listfile.write('{"Filmliste":' + json.dumps(
+            [created, created, '3', 'MSearch [Vers.: 3.1.129]', listhash], ensure_ascii=False))
+        listfile.write(',"Filmliste":' + json.dumps(COLUMNS, ensure_ascii=False))
+        for record in records:
+            values = list(record)
+            if values[0] == sender:
+                values[0] = ''
+                if values[1] == thema:
+                    values[1] = ''
+            (sender, thema) = (record[0], record[1])
+            listfile.write(',\n"X":' + json.dumps(values, ensure_ascii=False))
+        listfile.write('}')
+
+
+def bench_records(records, rounds=3):
+    """
+    Runs the records through the normalization and the
+    row building of the database writer and returns the
+    best rate in records per second
+
+    Args:
+        records(list): records generated by `make_records()`
+
+        rounds(int, optional): number of measurements. Default is 3
+    """
+    # pylint: disable=protected-access
+    best = 0
+    for _ in range(rounds):
+        start = time.time()
+        for values in records:
+            film = updater._make_film(values)
+            digest = StoreSQLite._ft_film_digest(1, 1, film)
+            StoreSQLite._ft_film_row(None, digest, 1, 1, 1, film)
+        best = max(best, len(records) / max(time.time() - start, 1e-9))
+    return best
+
+
+def bench_search(conn, term, rounds=3):
+    """
+    Searches the titles and shows of an SQLite database
+    containing a term with `LIKE` and with the trigram
+    index and returns the number of films found and the
+    best times in seconds of both queries
+
+    Args:
+        conn(Connection): connection to the SQLite database
+
+        term(str): search key of the term
+
+        rounds(int, optional): number of measurements. Default is 3
+    """
+    queries = [
+        ('SELECT COUNT(*) FROM `film` INNER JOIN `show` ON show.id = film.showid WHERE ( film.search LIKE ? ) OR ( show.search LIKE ? )', ('%' + term + '%', '%' + term + '%', )),
+        ('SELECT COUNT(*) FROM `film` WHERE film.id IN ( SELECT `rowid` FROM `film_trigram` WHERE `film_trigram` MATCH ? )', ('"' + term + '"', )),
+    ]
+    result = []
+    for (sql, params) in queries:
+        best = None
+        for _ in range(rounds):
+            start = time.time()
+            (count, ) = conn.execute(sql, params).fetchone()
+            best = min(best, time.time() - start) if best is not None else time.time() - start
+        result.append((count, best, ))
+    return (result[0][0], result[0][1], result[1][1], ) if result[0][0] == result[1][0] else (None, result[0][1], result[1][1], )
+
+
+def peak_rss():
+    """ Returns the peak resident set size of the process in bytes """
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macOS and in kilobytes elsewhere
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def main():
+    """ Prints the result of the micro-benchmark """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    records = make_records(count)
+    print('{} records/s'.format(int(bench_records(records))))
+
+# -- Classes ------------------------------------------------
+
+
+class BenchApp(AppLogger):
+    """ The standalone import benchmark application class """
+
+    def __init__(self):
+        AppLogger.__init__(self, os.path.basename(sys.argv[0]), '0.0')
+        self.args = None
+        self.settings = None
+        self.updater = None
+        self.workpath = None
+        self.phases = {}
+
+    def init(self):
+        """ Startup of the application """
+        # pylint: disable=line-too-long
+        parser = argparse.ArgumentParser(
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            description='This is the import benchmark. It imports a synthetic full and differential update list into an empty database and reports the throughput'
+        )
+        parser.add_argument(
+            '-v', '--verbose',
+            default=0,
+            action='count',
+            help='show progress messages'
+        )
+        parser.add_argument(
+            '-r', '--records',
+            default=100000,
+            type=int,
+            help='number of records in the full update list'
+        )
+        parser.add_argument(
+            '-D', '--diff',
+            default=5000,
+            type=int,
+            help='number of records in the differential update list'
+        )
+        parser.add_argument(
+            '-w', '--workers',
+            default=0,
+            type=int,
+            help='number of worker processes used for normalizing the update records'
+        )
+        parser.add_argument(
+            '-k', '--keep',
+            default=False,
+            action='store_true',
+            help='keep the generated lists and database'
+        )
+        parser.set_defaults(native=False, intervall=0, stream=False, connections=1, substring=True)
+        subparsers = parser.add_subparsers(
+            dest='dbtype',
+            help='target database'
+        )
+        sqliteopts = subparsers.add_parser(
+            'sqlite', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+        sqliteopts.add_argument(
+            '-p', '--path',
+            dest='path',
+            help='directory in which the temporary benchmark directory is created',
+            default=None
+        )
+        mysqlopts = subparsers.add_parser(
+            'mysql', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+        mysqlopts.add_argument(
+            '-H', '--host',
+            dest='host',
+            help='hostname or ip address',
+            default='localhost'
+        )
+        mysqlopts.add_argument(
+            '-P', '--port',
+            dest='port',
+            help='connection port',
+            default='3306'
+        )
+        mysqlopts.add_argument(
+            '-u', '--user',
+            dest='user',
+            help='connection username',
+            default='mediathekview'
+        )
+        mysqlopts.add_argument(
+            '-p', '--password',
+            dest='password',
+            help='connection password',
+            default=None
+        )
+        mysqlopts.add_argument(
+            '-d', '--database',
+            dest='database',
+            default='mvbench',
+            help='database name. The database is cleared'
+        )
+        self.args = parser.parse_args()
+        self.verbosity = self.args.verbose
+
+        self.workpath = tempfile.mkdtemp(prefix='mvbench-', dir=getattr(self.args, 'path', None))
+        self.args.path = self.workpath
+        self.settings = Settings(self.args)
+        self.settings.datapath = self.workpath
+        self.updater = updater.MediathekViewUpdater(
+            self.get_new_logger('MediathekViewUpdater'),
+            Notifier(),
+            self.settings,
+            MediathekViewMonitor()
+        )
+        self.updater.init(convert=True)
+        # start from an empty database
+        self.updater.database.init(reset=True, convert=True)
+        for (phase, method) in [('start', 'ft_update_start'), ('insert', 'ft_insert_films'), ('end', 'ft_update_end')]:
+            setattr(self.updater.database, method, self._timed(phase, getattr(self.updater.database, method)))
+
+    def run(self):
+        """ Execution of the application """
+        full = make_records(self.args.records)
+        # the differential list repeats the newest records and adds new ones
+        diff = full[len(full) - self.args.diff // 2:] + make_records(self.args.diff - self.args.diff // 2, len(full))
+        stamp = int(time.time())
+        print('Generating lists in {}...'.format(self.workpath))
+        write_filmliste(os.path.join(self.workpath, updater.FILMLISTE_AKT), full, stamp - 3600)
+        write_filmliste(os.path.join(self.workpath, updater.FILMLISTE_DIF), diff, stamp)
+        print('{:<6} {:>9} {:>9} {:>11} {:>9} {:>8} {:>8} {:>8} {:>8}'.format(
+            'update', 'records', 'seconds', 'records/s', 'rss MB', 'start', 'insert', 'end', 'other'))
+        for (name, full) in [('full', True), ('diff', False)]:
+            self.phases = {'start': 0.0, 'insert': 0.0, 'end': 0.0}
+            start = time.time()
+            if not self.updater.import_database(full):
+                print('{:<6} failed'.format(name))
+                continue
+            duration = time.time() - start
+            print('{:<6} {:>9} {:>9.2f} {:>11.0f} {:>9.1f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}'.format(
+                name,
+                self.updater.count,
+                duration,
+                self.updater.count / max(duration, 1e-9),
+                peak_rss() / 1048576.0,
+                self.phases['start'],
+                self.phases['insert'],
+                self.phases['end'],
+                duration - sum(self.phases.values())
+            ))
+        if self.settings.type == 0:
+            self._run_searches()
+
+    def exit(self):
+        """ Shutdown of the application """
+        self.updater.exit()
+        if self.args.keep:
+            print('Lists and database kept in {}'.format(self.workpath))
+        else:
+            shutil.rmtree(self.workpath, ignore_errors=True)
+
+    def _run_searches(self):
+        conn = self.updater.database.database.conn
+        # pylint: disable=protected-access
+        if not StoreSQLite._has_table(conn, 'film_trigram'):
+            print('Substring search index not supported by SQLite {}'.format(sqlite3.sqlite_version))
+            return
+        print('{:<14} {:>9} {:>9} {:>11}'.format('search', 'films', 'like ms', 'trigram ms'))
+        for term in SEARCHES:
+            (count, liketime, trigramtime) = bench_search(conn, term)
+            print('{:<14} {:>9} {:>9.1f} {:>11.1f}'.format(
+                term,
+                count if count is not None else 'mismatch',
+                liketime * 1000,
+                trigramtime * 1000
+            ))
+
+    def _timed(self, phase, method):
+        def _wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.phases[phase] += time.time() - start
+        return _wrapper
+
+
+if __name__ == '__main__':
+    main()
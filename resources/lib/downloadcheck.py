@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+The download check module
+
+Runs `mvutils.url_retrieve` against a local HTTP server that
+stands in for the Filmliste mirrors. The server supports
+validators and byte ranges and can cut off its responses, so
+the revalidation of unchanged lists, the resumption of a
+single stream transfer and the resumption of an interrupted
+segmented transfer can be checked without network access:
+
+    python -m resources.lib.downloadcheck
+
+Copyright 2017-2019, Leo Moll and Dominik Schlösser
+Licensed under MIT License
+"""
+
+# -- Imports ------------------------------------------------
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+
+# pylint: disable=import-error
+try:
+    # Python 3.x
+    from http.server import HTTPServer
+    from http.server import BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+import resources.lib.mvutils as mvutils
+
+from resources.lib.exceptions import ExitRequested
+
+# -- Constants ----------------------------------------------
+# size of the network object. Large enough for four segments
+OBJECT_SIZE = 4 * mvutils.SEGMENT_MIN_SIZE + 12345
+# size of the blocks sent by the server
+BLOCK_SIZE = 65536
+
+# -- Classes ------------------------------------------------
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server serving a single network object from memory
+
+    Args:
+        data(bytes): content of the network object
+    """
+    daemon_threads = True
+
+    def __init__(self, data):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), RequestHandler)
+        self.data = data
+        self.version = 1
+        # seconds between the blocks of a response
+        self.delay = 0.002
+        # cut off the next responses after this fraction of their body
+        self.truncate = None
+        # send weak entity tags and honour range requests
+        self.weak = False
+        self.ranges = True
+        # request headers relevant for the checks
+        self.requests = []
+
+    @property
+    def etag(self):
+        """ The current entity tag of the network object """
+        return '{}"mv-{}"'.format('W/' if self.weak else '', self.version)
+
+    @property
+    def url(self):
+        """ The url of the network object """
+        return 'http://127.0.0.1:{}/Filmliste-akt.xz'.format(self.server_port)
+
+    def handle_error(self, request, client_address):
+        # interrupted transfers close their connections early
+        if not isinstance(sys.exc_info()[1], (IOError, OSError)):
+            HTTPServer.handle_error(self, request, client_address)
+
+    def update(self, data):
+        """
+        Replaces the network object with a new version
+
+        Args:
+            data(bytes): new content of the network object
+        """
+        self.data = data
+        self.version += 1
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """ Request handler of the stand-in server """
+    protocol_version = 'HTTP/1.0'
+
+    # pylint: disable=invalid-name
+    def do_GET(self):
+        """ Serves the network object or a range of it """
+        server = self.server
+        server.requests.append(dict(
+            (key, self.headers.get(key)) for key in ['Range', 'If-Range', 'If-None-Match'] if self.headers.get(key)
+        ))
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        (start, end) = (0, len(server.data))
+        rangespec = self.headers.get('Range')
+        if rangespec and server.ranges and not server.weak and self.headers.get('If-Range') == server.etag:
+            (first, last) = rangespec.split('=')[1].split('-')
+            (start, end) = (int(first), int(last) + 1 if last else len(server.data))
+            if start >= len(server.data):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, end - 1, len(server.data)))
+        else:
+            self.send_response(200)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+        if server.truncate is not None:
+            end = start + int((end - start) * server.truncate)
+        for pos in range(start, end, BLOCK_SIZE):
+            self.wfile.write(server.data[pos:min(pos + BLOCK_SIZE, end)])
+            time.sleep(server.delay)
+
+    def log_message(self, *args):
+        # pylint: disable=arguments-differ
+        pass
+
+
+class DownloadCheck(object):
+    """
+    Runs the download checks in a temporary directory
+
+    Args:
+        server(ThreadingServer): the running stand-in server
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.workpath = tempfile.mkdtemp(prefix='mvdlcheck-')
+        self.filename = os.path.join(self.workpath, 'Filmliste-akt.xz')
+        self.failures = 0
+
+    def run(self):
+        """ Runs all checks and returns the number of failures """
+        try:
+            self.check_revalidation()
+            self.check_range_resume()
+            self.check_segmented_resume()
+            self.check_unsupported_ranges()
+        finally:
+            shutil.rmtree(self.workpath, ignore_errors=True)
+        return self.failures
+
+    def check_revalidation(self):
+        """ An unchanged object is revalidated and a changed one transferred again """
+        self._reset()
+        self._verify('initial transfer', self._retrieve() is True and self._intact())
+        self._verify('revalidation returns 304', self._retrieve() is False and self._intact())
+        self._verify('revalidation sends If-None-Match', self.server.requests[-1].get('If-None-Match') == self.server.etag)
+        self.server.update(os.urandom(OBJECT_SIZE))
+        self._verify('changed object is transferred again', self._retrieve() is True and self._intact())
+
+    def check_range_resume(self):
+        """ A truncated single stream transfer is continued with a range request """
+        self._reset()
+        self.server.truncate = 0.5
+        try:
+            self._retrieve()
+            self._verify('truncated transfer raises', False)
+        except IOError:
+            self._verify('truncated transfer raises', True)
+        self.server.truncate = None
+        self._verify('truncated transfer is not complete', not self._meta().get('complete'))
+        offset = mvutils.file_size(self.filename)
+        self._verify('resumed transfer completes', self._retrieve() is True and self._intact())
+        self._verify(
+            'resumed transfer sends Range',
+            self.server.requests[-1].get('Range') == 'bytes={}-'.format(offset)
+        )
+
+    def check_segmented_resume(self):
+        """ An interrupted segmented transfer is continued where each segment stopped """
+        self._reset()
+        progress = []
+        # slow enough to be interrupted before any segment is complete
+        self.server.delay = 0.1
+        try:
+            mvutils.url_retrieve(
+                self.server.url,
+                self.filename,
+                lambda blocks, size, total: progress.append(blocks * size),
+                aborthook=lambda: len(progress) > 1,
+                segments=4
+            )
+            self._verify('interrupted segmented transfer raises', False)
+        except ExitRequested:
+            self._verify('interrupted segmented transfer raises', True)
+        self.server.delay = 0.002
+        segments = self._meta().get('segments') or []
+        self._verify('segment positions are saved', len(segments) == 4)
+        with open(self.filename, 'rb') as local:
+            synced = True
+            start = 0
+            for (position, end) in segments:
+                # the data in front of a saved position must be on disk
+                local.seek(start)
+                synced = synced and local.read(position - start) == self.server.data[start:position]
+                start = end
+        self._verify('saved positions are covered by the file', synced)
+        count = len(self.server.requests)
+        self._verify('resumed segmented transfer completes', self._retrieve(segments=4) is True and self._intact())
+        self._verify(
+            'resumed segments send Range',
+            sorted(request.get('Range') for request in self.server.requests[count:]) == sorted(
+                'bytes={}-{}'.format(position, end - 1) for (position, end) in segments if position < end
+            )
+        )
+
+    def check_unsupported_ranges(self):
+        """ Objects without usable ranges are transferred once over a single connection """
+        for (name, weak, ranges, requests) in [('ignored ranges', False, False, 6), ('weak entity tag', True, True, 1)]:
+            self._reset()
+            (self.server.weak, self.server.ranges) = (weak, ranges)
+            count = len(self.server.requests)
+            self._verify(name + ' transfer completes', self._retrieve(segments=4) is True and self._intact())
+            self._verify(name + ' requests', len(self.server.requests) - count == requests)
+        (self.server.weak, self.server.ranges) = (False, True)
+
+    def _reset(self):
+        mvutils.file_remove(self.filename)
+        mvutils.file_remove(self.filename + '.meta')
+        self.server.update(os.urandom(OBJECT_SIZE))
+
+    def _retrieve(self, segments=1):
+        return mvutils.url_retrieve(self.server.url, self.filename, lambda blocks, size, total: None, segments=segments)
+
+    def _intact(self):
+        with open(self.filename, 'rb') as local:
+            return local.read() == self.server.data and self._meta().get('complete') is True
+
+    def _meta(self):
+        with open(self.filename + '.meta', 'r') as metafile:
+            return json.load(metafile)
+
+    def _verify(self, name, result):
+        print('{:<44} {}'.format(name, 'ok' if result else 'FAILED'))
+        if not result:
+            self.failures += 1
+
+# -- Functions ----------------------------------------------
+
+
+def main():
+    """ Runs the download checks against the stand-in server """
+    server = ThreadingServer(os.urandom(OBJECT_SIZE))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        failures = DownloadCheck(server).run()
+    finally:
+        server.shutdown()
+        server.server_close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,22 @@ Copyright 2017-2019, Leo Moll and Dominik Schlösser
 Licensed under MIT License
 """
 
+from collections import namedtuple
+
+# pylint: disable=too-few-public-methods
+
+
+class FilmRecord(namedtuple('FilmRecord', [
+        'channel', 'show', 'title', 'aired', 'duration', 'size', 'description', 'website',
+        'url_sub', 'url_video', 'url_video_sd', 'url_video_hd', 'airedepoch', 'geo',
+        'search', 'seconds'
+])):
+    """
+    The film record of an update list. Records are immutable
+    tuples passed from the list parser to the database writer
+    """
+    __slots__ = ()
+
 
 class Film(object):
     """ The film model class """
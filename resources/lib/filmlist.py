@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+The Filmliste stream parser module
+
+Copyright 2017-2019, Leo Moll and Dominik Schlösser
+Licensed under MIT License
+"""
+
+# -- Imports ------------------------------------------------
+import re
+import json
+import codecs
+
+# -- Constants ----------------------------------------------
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# -- Classes ------------------------------------------------
+
+
+class FilmlistParser(object):
+    """
+    Incremental tokenizer for Filmliste JSON documents.
+
+    A Filmliste is a single JSON object whose keys are repeated
+    (`Filmliste` for the header and the column names, `X` for
+    every record). The parser reads the source in chunks and
+    yields each key/value pair as a tuple as soon as it has
+    been read, so the memory footprint does not depend on the
+    size of the list.
+
+    Args:
+        source(file): a file like object opened in binary mode
+
+        chunk_size(int, optional): size of the chunks read from
+            the source. Default is 65536
+    """
+
+    def __init__(self, source, chunk_size=65536):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.scanner = json.JSONDecoder()
+        self.buffer = u''
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self):
+        if not self._expect(u'{'):
+            return
+        if self._peek() == u'}':
+            return
+        while True:
+            key = self._decode()
+            if not self._expect(u':'):
+                raise ValueError('Expecting \':\' delimiter after key "{}"'.format(key))
+            value = self._decode()
+            yield (key, value, )
+            delimiter = self._peek()
+            if delimiter == u',':
+                self.pos += 1
+            elif delimiter == u'}':
+                self.pos += 1
+                return
+            else:
+                raise ValueError('Expecting \',\' delimiter or end of object')
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.source.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b'', True)
+        else:
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(data)
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, char):
+        if self._peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def _decode(self):
+        if self._peek() is None:
+            raise ValueError('Unexpected end of Filmliste')
+        while True:
+            try:
+                (value, end) = self.scanner.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            # the value may continue in the next chunk
+            self._fill()
@@ -33,11 +33,16 @@ class FilmUI(Film):
                 xbmcplugin.SORT_METHOD_SIZE
             ]
             ```
+
+        pageparams(object, optional): the parameters passed to
+            the plugin for listing the next page of a directory.
+            If `None` the directory is not paginated
     """
 
-    def __init__(self, plugin, sortmethods=None):
+    def __init__(self, plugin, sortmethods=None, pageparams=None):
         Film.__init__(self)
         self.plugin = plugin
+        self.pageparams = pageparams
         self.handle = plugin.addon_handle
         self.settings = Settings()
         # define sortmethod for films
@@ -175,6 +180,39 @@ class FilmUI(Film):
                 isFolder=False
             )
 
+    def add_next_page(self, page):
+        """
+        Add a folder item to the directory that lists the
+        next page of films
+
+        Args:
+            page(str): key of the next page. It is passed
+                to the plugin in the `page` parameter
+        """
+        if self.pageparams is None:
+            return
+        params = dict(self.pageparams)
+        params['page'] = page
+        icon = os.path.join(
+            self.plugin.unicodePath,
+            'resources',
+            'icons',
+            'results-m.png'
+        )
+        listitem = xbmcgui.ListItem(self.plugin.language(30996))
+        # keep the item at the end regardless of the sort method
+        listitem.setProperty('SpecialSort', 'bottom')
+        listitem.setArt({
+            'thumb': icon,
+            'icon': icon
+        })
+        xbmcplugin.addDirectoryItem(
+            handle=self.handle,
+            url=self.plugin.build_url(params),
+            listitem=listitem,
+            isFolder=True
+        )
+
     def end(self):
         """ Finish a directory containing films """
         xbmcplugin.endOfDirectory(self.handle, cacheToDisc=False)
@@ -7,6 +7,7 @@ Licensed under MIT License
 """
 import os
 import sys
+import time
 
 # pylint: disable=import-error
 import xbmc
@@ -25,6 +26,10 @@ except ImportError:
 
 from resources.lib.kodi.kodilogger import KodiLogger
 
+# -- Constants ----------------------------------------------
+# seconds after which the instance ownership is read again
+INSTANCE_CHECK_INTERVAL = 5
+
 
 class KodiAddon(KodiLogger):
     """ The Kodi addon class """
@@ -279,6 +284,11 @@ class KodiInterlockedMonitor(xbmc.Monitor):
     Kodi Monitor Class that gets notified about events
     and allows to work as a singleton
 
+    The instance ownership is cached. It is read again
+    when the settings change and at the latest after
+    `INSTANCE_CHECK_INTERVAL` seconds, so that abort checks
+    in tight loops do not access the addon settings.
+
     Args:
         service(KodiService): The Kodi service instance
 
@@ -292,6 +302,8 @@ class KodiInterlockedMonitor(xbmc.Monitor):
                                    for x in bytearray(os.urandom(16)))
         self.setting_id = setting_id
         self.service = service
+        self.instance_bad = False
+        self.instance_checked = 0
 
     def register_instance(self, waittime=1):
         """
@@ -304,7 +316,7 @@ class KodiInterlockedMonitor(xbmc.Monitor):
             waittime(int, optional): Timeout for registering
                 the instance. Default is 1 second
         """
-        if self.bad_instance():
+        if self.refresh_instance():
             self.service.info(
                 'Found other instance with id {}', self.instance_id)
             self.service.info(
@@ -313,6 +325,7 @@ class KodiInterlockedMonitor(xbmc.Monitor):
             xbmc.Monitor.waitForAbort(self, waittime)
         else:
             self.service.set_setting(self.setting_id, self.instance_id)
+        self.refresh_instance()
 
     def unregister_instance(self):
         """ Unregisters the instance """
@@ -322,8 +335,24 @@ class KodiInterlockedMonitor(xbmc.Monitor):
         """
         Returns `True` if another instance is already registered
         """
+        if time.time() - self.instance_checked >= INSTANCE_CHECK_INTERVAL:
+            return self.refresh_instance()
+        return self.instance_bad
+
+    def refresh_instance(self):
+        """
+        Reads the registered instance from the settings and
+        returns `True` if another instance is registered
+        """
         instance_id = self.service.get_setting(self.setting_id)
-        return len(instance_id) > 0 and self.instance_id != instance_id
+        self.instance_bad = len(instance_id) > 0 and self.instance_id != instance_id
+        self.instance_checked = time.time()
+        return self.instance_bad
+
+    # pylint: disable=invalid-name
+    def onSettingsChanged(self):
+        """ Handler method invoked when settings have been changed """
+        self.refresh_instance()
 
     def abort_requested(self):
         """
@@ -15,6 +15,11 @@ from xml.etree import ElementTree as ET
 
 from resources.lib.base.logger import Logger
 from resources.lib.updater import MediathekViewUpdater
+from resources.lib.updatestats import format_stats
+
+# -- Constants ----------------------------------------------
+# number of past update cycles shown in verbose mode
+HISTORY_SHOWN = 10
 
 # -- Classes ------------------------------------------------
 
@@ -25,8 +30,10 @@ class Settings(object):
     def __init__(self, args):
         self.datapath = args.path if args.dbtype == 'sqlite' else './'
         self.type = {'sqlite': 0, 'mysql': 1}.get(args.dbtype, 0)
+        self.substringsearch = False
         if self.type == 0:
             self.updnative = args.native
+            self.substringsearch = args.substring
         elif self.type == 1:
             self.host = args.host
             self.port = int(args.port)
@@ -41,6 +48,9 @@ class Settings(object):
         self.groupshows = False
         self.updmode = 3
         self.updinterval = args.intervall
+        self.updpipeline = args.stream
+        self.updsegments = max(1, args.connections)
+        self.updworkers = args.workers
 
     @staticmethod
     def reload():
@@ -456,6 +466,26 @@ class UpdateApp(AppLogger):
             action='store',
             help='minimum interval between updates'
         )
+        sqliteopts.add_argument(
+            '-S', '--stream',
+            default=False,
+            action='store_true',
+            help='stream the update through an in-process decompressor instead of downloading it into temporary files'
+        )
+        sqliteopts.add_argument(
+            '-c', '--connections',
+            default=1,
+            type=int,
+            action='store',
+            help='number of parallel connections used for downloading the update'
+        )
+        sqliteopts.add_argument(
+            '-w', '--workers',
+            default=0,
+            type=int,
+            action='store',
+            help='number of worker processes used for normalizing the update records'
+        )
         sqliteopts.add_argument(
             '-p', '--path',
             dest='path',
@@ -468,6 +498,12 @@ class UpdateApp(AppLogger):
             action='store_true',
             help='allow native update'
         )
+        sqliteopts.add_argument(
+            '-s', '--substring',
+            default=False,
+            action='store_true',
+            help='maintain the substring search index'
+        )
         mysqlopts = subparsers.add_parser(
             'mysql', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
         mysqlopts.add_argument(
@@ -496,6 +532,26 @@ class UpdateApp(AppLogger):
             action='store',
             help='minimum interval between updates'
         )
+        mysqlopts.add_argument(
+            '-S', '--stream',
+            default=False,
+            action='store_true',
+            help='stream the update through an in-process decompressor instead of downloading it into temporary files'
+        )
+        mysqlopts.add_argument(
+            '-c', '--connections',
+            default=1,
+            type=int,
+            action='store',
+            help='number of parallel connections used for downloading the update'
+        )
+        mysqlopts.add_argument(
+            '-w', '--workers',
+            default=0,
+            type=int,
+            action='store',
+            help='number of worker processes used for normalizing the update records'
+        )
         mysqlopts.add_argument(
             '-H', '--host',
             dest='host',
@@ -554,6 +610,9 @@ class UpdateApp(AppLogger):
             # differential update
             self.info('Initiating differential update...')
             self.updater.update(False)
+        if self.verbosity > 0 and self.updater.database is not None:
+            for stats in reversed(self.updater.database.get_history(HISTORY_SHOWN)):
+                self.info('History: {}', format_stats(stats))
         self.info('Exiting...')
 
     def exit(self):
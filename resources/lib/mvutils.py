@@ -10,17 +10,25 @@ from __future__ import unicode_literals
 
 import os
 import sys
+import json
 import stat
+import time
 import string
+import threading
+import unicodedata
 
 # pylint: disable=import-error
 try:
     # Python 3.x
     from urllib.parse import urlencode
     from urllib.request import urlopen
+    from urllib.request import Request
+    from urllib.error import HTTPError
 except ImportError:
     from urllib import urlencode
     from urllib2 import urlopen
+    from urllib2 import Request
+    from urllib2 import HTTPError
 
 from email.utils import parsedate_tz, mktime_tz
 
@@ -34,6 +42,29 @@ try:
 except ImportError:
     IS_KODI = False
 
+# pylint: disable=invalid-name,redefined-builtin
+try:
+    # Python 2.x
+    chr = unichr
+except NameError:
+    pass
+
+# -- Constants ----------------------------------------------
+# smallest part of a file downloaded over a separate connection
+SEGMENT_MIN_SIZE = 1048576
+# data written to a segment before it is synced and its position published
+SEGMENT_SYNC_SIZE = 262144
+# seconds a streamed network object may stall before the read fails
+STREAM_TIMEOUT = 60
+# characters kept in search keys besides letters and digits
+SEARCH_CHARACTERS = string.ascii_uppercase + string.digits + ' _-#'
+# letters without a canonical decomposition into a base letter
+SEARCH_LETTERS = {
+    'ß': 'SS', 'ẞ': 'SS', 'Æ': 'AE', 'æ': 'AE', 'Œ': 'OE', 'œ': 'OE',
+    'Ø': 'O', 'ø': 'O', 'Đ': 'D', 'đ': 'D', 'Ð': 'D', 'ð': 'D',
+    'Ł': 'L', 'ł': 'L', 'Þ': 'TH', 'þ': 'TH', 'ı': 'I'
+}
+
 
 def dir_exists(name):
     """
@@ -142,11 +173,59 @@ def make_search_string(val):
     """
     Reduces a string to a simplified representation
     containing only a well defined set of characters
-    for a simplified search
+    for a simplified search. Letters are folded to their
+    upper case form without accents and whitespace is
+    collapsed, so that `Käpt'n` and `kapt'n` are both
+    reduced to `KAPTN`.
+
+    Args:
+        val(str): the string to reduce
     """
-    cset = string.ascii_letters + string.digits + ' _-#'
-    search = ''.join([c for c in val if c in cset])
-    return search.upper().strip()
+    if isinstance(val, bytes):
+        val = val.decode('utf-8')
+    search = val.translate(_SEARCH_TABLE)
+    try:
+        search.encode('ascii')
+    except UnicodeEncodeError:
+        # characters beyond the latin scripts are left over
+        search = val.translate(_SEARCH_TABLE_EXTENDED)
+    return ' '.join(search.split())
+
+
+def make_page_key(values):
+    """
+    Encodes the sort key values of the last entry of a
+    page into a string suitable for a plugin URL. `None`
+    values are encoded as empty strings
+
+    Args:
+        values(list): the sort key values
+    """
+    return ','.join(
+        '' if value is None else repr(value) if isinstance(value, float) else '{}'.format(value) for value in values
+    )
+
+
+def parse_page_key(key, count):
+    """
+    Decodes a page key created by `make_page_key()` into
+    a tuple of numbers. Returns `None` if the key is not
+    valid
+
+    Args:
+        key(str): the page key
+
+        count(int): the expected number of values
+    """
+    values = key.split(',')
+    if len(values) != count:
+        return None
+    try:
+        return tuple(
+            None if not value else float(value) if '.' in value or 'e' in value else int(value) for value in values
+        )
+    except ValueError:
+        return None
 
 
 def make_duration(val):
@@ -187,12 +266,26 @@ def url_lastmodified(url):
     Args:
         url(str): the source url of the object to query
     """
-    with closing(urlopen(url)) as src:
+    with closing(urlopen(_HeadRequest(url))) as src:
         return mktime_tz(parsedate_tz(src.info().get('last-modified')))
 
-def url_retrieve(url, filename, reporthook, chunk_size=8192, aborthook=None):
+def url_retrieve(url, filename, reporthook, chunk_size=8192, aborthook=None, segments=1):
     """
-    Copy a network object denoted by a URL to a local file
+    Copy a network object denoted by a URL to a local file.
+
+    The validators of the network object are stored in a
+    metadata file next to the local file. If the local copy
+    is complete, it is only transferred again if the network
+    object has changed. An incomplete local copy is continued
+    where the transfer stopped if the network object is still
+    the same.
+
+    If the server supports byte ranges, large network objects
+    can be split into segments that are transferred in parallel
+    into a preallocated local file.
+
+    Returns `True` if data was transferred and `False` if the
+    local copy is still up to date.
 
     Args:
         url(str): the source url of the object to retrieve
@@ -212,9 +305,74 @@ def url_retrieve(url, filename, reporthook, chunk_size=8192, aborthook=None):
             once on establishment of the network connection and once after
             each block read thereafter. If specified the operation will be
             aborted if the hook function returns `True`
+
+        segments(int, optional): maximum number of parallel connections
+            used for the transfer. Default is 1
     """
-    with closing(urlopen(url)) as src, closing(open(filename, 'wb')) as dst:
-        _chunked_url_copier(src, dst, reporthook, chunk_size, aborthook)
+    meta = _url_meta_load(filename)
+    validator = meta.get('etag') or meta.get('lastmodified')
+    offset = file_size(filename) if meta.get('url') == url and validator else 0
+    if offset > 0 and not meta.get('complete') and _url_range_validator(meta) is None:
+        # weak validators cannot guard a range request
+        offset = 0
+    headers = {}
+    if offset > 0 and meta.get('segments') and not meta.get('complete'):
+        # continue an interrupted segmented transfer
+        return _url_segments_retrieve(url, filename, meta, reporthook, chunk_size, aborthook, segments)
+    elif offset > 0 and meta.get('complete'):
+        # revalidate the local copy
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta.get('etag')
+        if meta.get('lastmodified'):
+            headers['If-Modified-Since'] = meta.get('lastmodified')
+    elif offset > 0:
+        # continue the transfer if the network object is unchanged
+        headers['Range'] = 'bytes={}-'.format(offset)
+        headers['If-Range'] = _url_range_validator(meta)
+    try:
+        src = urlopen(Request(url, headers=headers))
+    except HTTPError as err:
+        if err.code == 304:
+            return False
+        elif err.code == 416 and offset > 0:
+            # the local copy does not fit anymore
+            file_remove(filename)
+            file_remove(filename + '.meta')
+            return url_retrieve(url, filename, reporthook, chunk_size, aborthook, segments)
+        raise
+    with closing(src):
+        info = src.info()
+        if src.getcode() != 206 or not (info.get('Content-Range') or '').startswith('bytes {}-'.format(offset)):
+            offset = 0
+        meta = {
+            'url': url,
+            'etag': info.get('ETag'),
+            'lastmodified': info.get('Last-Modified'),
+            'complete': False
+        }
+        total_size = int(info.get('Content-Length') or 0)
+        segment_size = max(SEGMENT_MIN_SIZE, -(-total_size // max(segments, 1)))
+        if offset == 0 and total_size > segment_size and \
+                info.get('Accept-Ranges') == 'bytes' and _url_range_validator(meta) is not None:
+            # the segments are transferred on their own connections
+            meta['segments'] = [
+                [start, min(start + segment_size, total_size)] for start in range(0, total_size, segment_size)
+            ]
+            with closing(open(filename, 'wb')) as dst:
+                dst.truncate(total_size)
+            _url_meta_save(filename, meta)
+        else:
+            _url_meta_save(filename, meta)
+            with closing(open(filename, 'ab' if offset > 0 else 'wb')) as dst:
+                received = _chunked_url_copier(src, dst, reporthook, chunk_size, aborthook)
+            if total_size > 0 and received != total_size:
+                # the local copy stays incomplete and can be continued
+                raise IOError('Premature end of transfer at {} of {} bytes'.format(
+                    offset + received, offset + total_size))
+            meta['complete'] = True
+            _url_meta_save(filename, meta)
+            return True
+    return _url_segments_retrieve(url, filename, meta, reporthook, chunk_size, aborthook, segments)
 
 
 def url_retrieve_vfs(url, filename, reporthook, chunk_size=8192, aborthook=None):
@@ -245,6 +403,113 @@ def url_retrieve_vfs(url, filename, reporthook, chunk_size=8192, aborthook=None)
         _chunked_url_copier(src, dst, reporthook, chunk_size, aborthook)
 
 
+class DecompressingReader(object):
+    """
+    File like object that decompresses a network object denoted
+    by a URL while it is read. Nothing is written to disk.
+
+    Args:
+        url(str): the source url of the object to retrieve
+
+        decompressor(object): a decompressor object like the ones
+            returned by `lzma.LZMADecompressor()`, `bz2.BZ2Decompressor()`
+            or `zlib.decompressobj()`
+
+        reporthook(function, optional): a hook function that will be
+            called after each block read from the network. The hook
+            will be passed three arguments; a count of blocks transferred
+            so far, a block size in bytes, and the total size of the file.
+
+        chunk_size(int, optional): size of the chunks read from the
+            network. Default is 65536
+
+        aborthook(function, optional): a hook function that will be
+            called before each block read from the network. If specified
+            the operation will be aborted if the hook function returns `True`
+    """
+
+    def __init__(self, url, decompressor, reporthook=None, chunk_size=65536, aborthook=None):
+        self.src = urlopen(url, timeout=STREAM_TIMEOUT)
+        self.decompressor = decompressor
+        self.reporthook = reporthook if reporthook is not None else lambda a, b, c: None
+        self.aborthook = aborthook if aborthook is not None else lambda: False
+        self.chunk_size = chunk_size
+        self.total_size = int(
+            self.src.info().get('Content-Length').strip()
+        ) if self.src.info() and self.src.info().get('Content-Length') else 0
+        self.total_chunks = 0
+        self.bytes_read = 0
+        self.finished = False
+        # seconds spent waiting for the network and decompressing
+        self.read_time = 0.0
+        self.decompress_time = 0.0
+
+    def read(self, size=-1):
+        """
+        Returns up to `size` bytes of decompressed data. An empty
+        result signals the end of the stream.
+
+        Args:
+            size(int, optional): maximum number of bytes to return.
+                Ignored since the decompressor produces as much as
+                it can from one network chunk. Default is -1
+        """
+        while not self.finished:
+            if self.aborthook():
+                raise ExitRequested('Reception interrupted.')
+            start = time.time()
+            chunk = self.src.read(self.chunk_size)
+            self.read_time += time.time() - start
+            if not chunk:
+                self.finished = True
+                flush = getattr(self.decompressor, 'flush', None)
+                return flush() if flush is not None else b''
+            self.total_chunks += 1
+            self.bytes_read += len(chunk)
+            self.reporthook(self.total_chunks, self.chunk_size, self.total_size)
+            start = time.time()
+            data = self.decompressor.decompress(chunk)
+            self.decompress_time += time.time() - start
+            if data:
+                return data
+        return b''
+
+    def close(self):
+        """ Closes the network connection """
+        self.src.close()
+
+
+def _fold_search_character(key):
+    char = chr(key)
+    if char in SEARCH_LETTERS:
+        return SEARCH_LETTERS[char]
+    elif char.isspace():
+        return ' '
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', char).upper() if c in SEARCH_CHARACTERS
+    ) or None
+
+
+class _SearchTable(dict):
+    # folds characters not yet in the table on first use
+    def __missing__(self, key):
+        value = _fold_search_character(key)
+        self[key] = value
+        return value
+
+
+# the latin scripts are folded in advance. A plain dictionary
+# is considerably faster as translate table than a subclass
+_SEARCH_TABLE = dict((key, _fold_search_character(key)) for key in range(0x250))
+_SEARCH_TABLE_EXTENDED = _SearchTable(_SEARCH_TABLE)
+
+
+class _HeadRequest(Request):
+    # pylint: disable=arguments-differ
+    def get_method(self):
+        return 'HEAD'
+
+
 def build_url(query):
     """
     Builds a valid plugin url based on the supplied query object
@@ -255,20 +520,126 @@ def build_url(query):
     return sys.argv[0] + '?' + urlencode(query)
 
 
+def _url_meta_load(filename):
+    # pylint: disable=broad-except
+    try:
+        with closing(open(filename + '.meta', 'r')) as metafile:
+            return json.load(metafile)
+    except Exception:
+        return {}
+
+
+def _url_meta_save(filename, meta):
+    with closing(open(filename + '.meta', 'w')) as metafile:
+        json.dump(meta, metafile)
+
+
+def _url_range_validator(meta):
+    # only strong entity tags and modification dates can be used in If-Range
+    etag = meta.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return meta.get('lastmodified')
+
+
+def _url_segments_retrieve(url, filename, meta, reporthook, chunk_size, aborthook, segments):
+    # every segment is a list of the next position and the end of the segment
+    aborthook = aborthook if aborthook is not None else lambda: False
+    validator = _url_range_validator(meta)
+    total_size = meta['segments'][-1][1]
+    lock = threading.Lock()
+    stop = threading.Event()
+    errors = []
+
+    def _copy_segment(segment):
+        # pylint: disable=broad-except
+        try:
+            request = Request(url, headers={
+                'Range': 'bytes={}-{}'.format(segment[0], segment[1] - 1),
+                'If-Range': validator
+            })
+            with closing(urlopen(request)) as src, closing(open(filename, 'r+b')) as dst:
+                if src.getcode() != 206:
+                    # the network object has changed
+                    raise HTTPError(url, src.getcode(), 'Range not honoured', src.info(), None)
+                dst.seek(segment[0])
+                position = segment[0]
+                try:
+                    while position < segment[1] and not stop.is_set():
+                        chunk = src.read(min(chunk_size, segment[1] - position))
+                        if not chunk:
+                            raise IOError('Premature end of segment at {}'.format(position))
+                        dst.write(chunk)
+                        position += len(chunk)
+                        if position - segment[0] >= SEGMENT_SYNC_SIZE:
+                            _url_segment_sync(dst, lock, segment, position)
+                finally:
+                    # the saved positions must never be ahead of the data on disk
+                    _url_segment_sync(dst, lock, segment, position)
+        except Exception as err:
+            errors.append(err)
+            stop.set()
+
+    threads = [
+        threading.Thread(target=_copy_segment, args=(segment, ))
+        for segment in meta['segments'] if segment[0] < segment[1]
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    # hooks are only called from the calling thread
+    while any(thread.is_alive() for thread in threads):
+        with lock:
+            missing = sum(segment[1] - segment[0] for segment in meta['segments'])
+            _url_meta_save(filename, meta)
+        reporthook((total_size - missing) // chunk_size, chunk_size, total_size)
+        if aborthook():
+            stop.set()
+        for thread in threads:
+            thread.join(0.25)
+    _url_meta_save(filename, meta)
+    missing = sum(segment[1] - segment[0] for segment in meta['segments'])
+    reporthook((total_size - missing) // chunk_size, chunk_size, total_size)
+    if any(isinstance(err, HTTPError) and err.code == 200 for err in errors):
+        # the range was not honoured. Transfer the object once
+        # over a single connection instead of splitting it again
+        file_remove(filename)
+        file_remove(filename + '.meta')
+        return url_retrieve(url, filename, reporthook, chunk_size, aborthook, 1)
+    elif errors:
+        raise errors[0]
+    elif stop.is_set():
+        raise ExitRequested('Reception interrupted.')
+    meta['complete'] = True
+    del meta['segments']
+    _url_meta_save(filename, meta)
+    return True
+
+
+def _url_segment_sync(dst, lock, segment, position):
+    if position > segment[0]:
+        dst.flush()
+        os.fsync(dst.fileno())
+        with lock:
+            segment[0] = position
+
+
 def _chunked_url_copier(src, dst, reporthook, chunk_size, aborthook):
     aborthook = aborthook if aborthook is not None else lambda: False
     total_size = int(
         src.info().get('Content-Length').strip()
     ) if src.info() and src.info().get('Content-Length') else 0
     total_chunks = 0
+    total_bytes = 0
 
     while not aborthook():
         reporthook(total_chunks, chunk_size, total_size)
         chunk = src.read(chunk_size)
         if not chunk:
             # operation has finished
-            return
+            return total_bytes
         dst.write(chunk)
         total_chunks += 1
+        total_bytes += len(chunk)
     # abort requested
     raise ExitRequested('Reception interrupted.')
@@ -138,13 +138,13 @@ class MediathekViewPlugin(KodiPlugin):
         search = self.get_setting(settingid)
         if search:
             # restore previous search
-            self.database.search(search, FilmUI(self), extendedsearch)
+            self.database.search(search, self._get_search_ui(search, extendedsearch), extendedsearch)
         else:
             # enter search term
             (search, confirmed) = self.notifier.get_entered_text('', headingid)
             if len(search) > 2 and confirmed is True:
                 RecentSearches(self, extendedsearch).load().add(search).save()
-                if self.database.search(search, FilmUI(self), extendedsearch) > 0:
+                if self.database.search(search, self._get_search_ui(search, extendedsearch), extendedsearch) > 0:
                     self.set_setting(settingid, search)
             else:
                 # pylint: disable=line-too-long
@@ -219,11 +219,39 @@ class MediathekViewPlugin(KodiPlugin):
         else:
             updinfo = self.language(30966)
 
+        histinfo = ''
+        for stats in self.database.get_history(5):
+            histinfo += '\n\n' + self.language(30995) % (
+                datetime.datetime.fromtimestamp(
+                    stats['started']
+                ).strftime('%Y-%m-%d %H:%M:%S'),
+                self.language(30972 if stats['fullupdate'] > 0 else 30973),
+                self.language({
+                    'IDLE': 30992,
+                    'ABORTED': 30993
+                }.get(stats['status'], 30994)),
+                stats['records'],
+                stats['duration'],
+                stats['rate'],
+                stats['statements'],
+                stats['times']['head'],
+                stats['bytes'] / 1048576.0,
+                stats['times']['download'],
+                stats['times']['decompress'],
+                stats['times']['cache'],
+                stats['times']['parse'],
+                stats['times']['insert'],
+                stats['times']['finalize']
+            )
+        if histinfo:
+            histinfo = '\n\n' + self.language(30991) + histinfo
+
         xbmcgui.Dialog().textviewer(
             heading,
             infostr + '\n\n' +
             totinfo + '\n\n' +
-            updinfo
+            updinfo +
+            histinfo
         )
 
     def _check_outdate(self, maxage=172800):
@@ -248,6 +276,14 @@ class MediathekViewPlugin(KodiPlugin):
         if tsnow - tsold > maxage:
             self.notifier.show_outdated_known(status)
 
+    def _get_search_ui(self, search, extendedsearch):
+        # further pages are listed by repeating the search
+        return FilmUI(self, pageparams={
+            'mode': "research",
+            'search': search,
+            'extendedsearch': extendedsearch
+        })
+
     def init(self):
         """ Initialisation of the plugin """
         if self.database.init():
@@ -272,8 +308,10 @@ class MediathekViewPlugin(KodiPlugin):
         elif mode == 'research':
             search = self.get_arg('search', '')
             extendedsearch = self.get_arg('extendedsearch', 'False') == 'True'
-            self.database.search(search, FilmUI(self), extendedsearch)
-            RecentSearches(self, extendedsearch).load().add(search).save()
+            page = self.get_arg('page', None)
+            self.database.search(search, self._get_search_ui(search, extendedsearch), extendedsearch, page)
+            if page is None:
+                RecentSearches(self, extendedsearch).load().add(search).save()
         elif mode == 'delsearch':
             search = self.get_arg('search', '')
             extendedsearch = self.get_arg('extendedsearch', 'False') == 'True'
@@ -285,7 +323,11 @@ class MediathekViewPlugin(KodiPlugin):
                 FilmUI(self, [xbmcplugin.SORT_METHOD_LABEL]))
         elif mode == 'recent':
             channel = self.get_arg('channel', 0)
-            self.database.get_recents(channel, FilmUI(self))
+            self.database.get_recents(
+                channel,
+                FilmUI(self, pageparams={'mode': "recent", 'channel': channel}),
+                self.get_arg('page', None)
+            )
         elif mode == 'recentchannels':
             self.database.get_recent_channels(
                 ChannelUI(self, nextdir='recent'))
@@ -305,7 +347,11 @@ class MediathekViewPlugin(KodiPlugin):
             self.database.get_shows(channel, initial, ShowUI(self))
         elif mode == 'films':
             show = self.get_arg('show', 0)
-            self.database.get_films(show, FilmUI(self))
+            self.database.get_films(
+                show,
+                FilmUI(self, pageparams={'mode': "films", 'show': show}),
+                self.get_arg('page', None)
+            )
         elif mode == 'downloadmv':
             filmid = self.get_arg('id', 0)
             quality = self.get_arg('quality', 1)
@@ -29,6 +29,7 @@ class MediathekViewMonitor(KodiInterlockedMonitor):
     # pylint: disable=invalid-name
     def onSettingsChanged(self):
         """ Handler method invoked when settings have been changed """
+        super(MediathekViewMonitor, self).onSettingsChanged()
         self.service.reload_settings()
 
 
@@ -55,11 +56,18 @@ class MediathekViewService(KodiService):
         """ Execution of the service """
         self.info('Starting up... (instance id: {})', self.monitor.instance_id)
         while not self.monitor.abort_requested():
+            substringsearch = self.settings.substringsearch
             if self.settings.reload() is True:
                 # database configuration changed
                 self.info(
                     '===== Database Configuration has changed - Reloading the updater =====')
                 self.updater.reload()
+            if self.settings.substringsearch != substringsearch:
+                # the substring search index is created or dropped
+                # when the database is initialized
+                self.info(
+                    '===== Substring search has changed - Updating the search index =====')
+                self.updater.init(convert=True)
 
             updateop = self.updater.get_current_update_operation()
             if updateop == 1:
@@ -48,6 +48,11 @@ class Settings(object):
         self.updnative = addon.getSetting('updnative') == 'true'
         self.updmode = int(addon.getSetting('updmode'))
         self.caching = addon.getSetting('caching') == 'true'
+        self.substringsearch = addon.getSetting('substringsearch') == 'true'
+        self.updpipeline = addon.getSetting('updpipeline') == 'true'
+        self.updsegments = int(float(addon.getSetting('updsegments')))
+        # worker processes are not available inside of Kodi
+        self.updworkers = 0
         self.updinterval = int(float(addon.getSetting('updinterval'))) * 3600
         # download
         self.downloadpathep = addon.getSetting('downloadpathep')
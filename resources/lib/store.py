@@ -10,6 +10,12 @@ import time
 
 from resources.lib.storemysql import StoreMySQL
 from resources.lib.storesqlite import StoreSQLite
+from resources.lib.exceptions import DatabaseCorrupted
+from resources.lib.exceptions import DatabaseLost
+
+# -- Constants ----------------------------------------------
+# seconds between writes of the buffered status during an update
+STATUS_FLUSH_INTERVAL = 2
 
 
 class Store(object):
@@ -28,6 +34,9 @@ class Store(object):
         self.logger = logger
         self.notifier = notifier
         self.settings = settings
+        # status buffered in memory during an update
+        self.status = None
+        self.status_flushed = 0
         # load storage engine
         if settings.type == 0:
             self.logger.info('Database driver: Internal (sqlite)')
@@ -64,9 +73,10 @@ class Store(object):
     def exit(self):
         """ Shutdown of the database system """
         if self.database is not None:
+            self._flush_status()
             self.database.exit()
 
-    def search(self, search, filmui, extendedsearch=False):
+    def search(self, search, filmui, extendedsearch=False, page=None):
         """
         Performs a search for films based on a search term
         and adds the results to the current UI directory
@@ -80,11 +90,15 @@ class Store(object):
             extendedsearch(bool, optional): if `True` the search is
                 performed also on film descriptions. Default is
                 `False`
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
         # pylint: disable=line-too-long
-        return self.database.search(search, filmui, extendedsearch) if self.database is not None else 0
+        return self.database.search(search, filmui, extendedsearch, page) if self.database is not None else 0
 
-    def get_recents(self, channelid, filmui):
+    def get_recents(self, channelid, filmui, page=None):
         """
         Populates the current UI directory with the recent
         film additions based on the configured interval.
@@ -95,8 +109,12 @@ class Store(object):
 
             filmui(FilmUI): an instance of a film model view used
                 for populating the directory
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
-        return self.database.get_recents(channelid, filmui) if self.database is not None else 0
+        return self.database.get_recents(channelid, filmui, page) if self.database is not None else 0
 
     def get_live_streams(self, filmui):
         """
@@ -166,7 +184,7 @@ class Store(object):
         if self.database is not None:
             self.database.get_shows(channelid, initial, showui)
 
-    def get_films(self, showid, filmui):
+    def get_films(self, showid, filmui, page=None):
         """
         Populates the current UI directory with a list
         of films of a specific show.
@@ -176,8 +194,12 @@ class Store(object):
 
             filmui(FilmUI): an instance of a film model view
                 used for populating the directory
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
-        return self.database.get_films(showid, filmui) if self.database is not None else 0
+        return self.database.get_films(showid, filmui, page) if self.database is not None else 0
 
     def retrieve_film_info(self, filmid):
         """
@@ -194,7 +216,9 @@ class Store(object):
 
     def get_status(self):
         """ Retrieves the database status information """
-        if self.database is not None:
+        if self.status is not None:
+            return dict(self.status)
+        elif self.database is not None:
             return self.database.get_status()
         else:
             return {
@@ -220,6 +244,10 @@ class Store(object):
         Updates the database status. Only supplied information
         will be updated.
 
+        During an update the counters are buffered in memory
+        and written every `STATUS_FLUSH_INTERVAL` seconds. All
+        other values are written immediately.
+
         Args:
             status(status, optional): Status of the database. Can be:
                 `NONE`, `UNINIT`, `IDLE`, `UPDATING`, `ABORTED`
@@ -248,7 +276,9 @@ class Store(object):
 
             tot_mov(int, optional): Total films in database
         """
-        if self.database is not None:
+        if self.database is None:
+            return
+        elif self.status is None:
             self.database.update_status(
                 status,
                 lastupdate,
@@ -258,6 +288,52 @@ class Store(object):
                 del_chn, del_shw, del_mov,
                 tot_chn, tot_shw, tot_mov
             )
+            return
+        values = {
+            'status': status,
+            'lastupdate': lastupdate,
+            'filmupdate': filmupdate,
+            'fullupdate': fullupdate,
+            'add_chn': add_chn,
+            'add_shw': add_shw,
+            'add_mov': add_mov,
+            'del_chn': del_chn,
+            'del_shw': del_shw,
+            'del_mov': del_mov,
+            'tot_chn': tot_chn,
+            'tot_shw': tot_shw,
+            'tot_mov': tot_mov
+        }
+        self.status.update((key, value) for (key, value) in values.items() if value is not None)
+        self.status['modified'] = int(time.time())
+        transition = status is not None or lastupdate is not None or \
+            filmupdate is not None or fullupdate is not None
+        if transition or time.time() - self.status_flushed >= STATUS_FLUSH_INTERVAL:
+            self._flush_status()
+
+    def get_history(self, limit=50):
+        """
+        Retrieves the statistics of the most recent update
+        cycles, newest first
+
+        Args:
+            limit(int, optional): maximum number of update
+                cycles returned. Default is 50
+        """
+        if self.database is not None:
+            return self.database.get_history(limit)
+        return []
+
+    def add_history(self, stats):
+        """
+        Stores the statistics of an update cycle
+
+        Args:
+            stats(dict): statistics as returned by
+                `UpdateStats.get_as_dict()`
+        """
+        if self.database is not None:
+            self.database.add_history(stats)
 
     def supports_update(self):
         """
@@ -308,20 +384,40 @@ class Store(object):
         """
         Initializes local database for updating
         """
+        self.status = None
         if self.database is not None:
             return self.database.ft_init()
         return False
 
-    def ft_update_start(self, full):
+    def ft_update_start(self, full, resume=None):
         """
         Begins a local update procedure
 
         Args:
             full(bool): if `True` a full update is started
+
+            resume(int, optional): generation of an interrupted
+                update that should be continued if possible
         """
         if self.database is not None:
-            return self.database.ft_update_start(full)
-        return (0, 0, 0, )
+            result = self.database.ft_update_start(full, resume)
+            # buffer the status until the update ends
+            self.status = self.database.get_status()
+            self.status_flushed = time.time()
+            return result
+        return (0, 0, 0, False, )
+
+    def ft_get_generation(self):
+        """ Returns the generation of the running update """
+        if self.database is not None:
+            return self.database.ft_get_generation()
+        return None
+
+    def ft_get_statements(self):
+        """ Returns the number of statements issued by the running update """
+        if self.database is not None:
+            return self.database.ft_get_statements()
+        return 0
 
     def ft_update_end(self, delete):
         """
@@ -332,19 +428,40 @@ class Store(object):
                 will be deleted
         """
         if self.database is not None:
+            self._flush_status()
+            self.status = None
             return self.database.ft_update_end(delete)
         return (0, 0, 0, 0, 0, 0, )
 
-    def ft_insert_film(self, film, commit=True):
+    def ft_insert_films(self, films, commit=True):
         """
-        Inserts a film emtry into the database
+        Inserts a batch of film entries into the database
 
         Args:
-            film(Film): a film entry
+            films(list): a list of `FilmRecord` entries
 
             commit(bool, optional): the operation will be
                 commited immediately. Default is `True`
         """
         if self.database is not None:
-            return self.database.ft_insert_film(film, commit)
-        return (0, 0, 0, 0, )
+            try:
+                return self.database.ft_insert_films(films, commit)
+            except (DatabaseCorrupted, DatabaseLost):
+                # the buffered status belongs to the lost database
+                self.status = None
+                raise
+        return (0, 0, 0, )
+
+    def _flush_status(self):
+        if self.status is None or self.database is None:
+            return
+        self.database.update_status(
+            self.status['status'],
+            self.status['lastupdate'],
+            self.status['filmupdate'],
+            self.status['fullupdate'],
+            self.status['add_chn'], self.status['add_shw'], self.status['add_mov'],
+            self.status['del_chn'], self.status['del_shw'], self.status['del_mov'],
+            self.status['tot_chn'], self.status['tot_shw'], self.status['tot_mov']
+        )
+        self.status_flushed = time.time()
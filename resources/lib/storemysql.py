@@ -6,12 +6,43 @@ Copyright 2017-2019, Leo Moll and Dominik Schlösser
 """
 # pylint: disable=too-many-lines,line-too-long
 
+import re
 import time
+import hashlib
+import binascii
 import mysql.connector
 
 import resources.lib.mvutils as mvutils
 
 from resources.lib.film import Film
+from resources.lib.updatestats import PHASES
+
+# -- Constants ----------------------------------------------
+# number of update cycles kept in the history
+HISTORY_SIZE = 50
+# searchable tokens of a search key
+FTS_TOKEN = re.compile('[A-Z0-9]+')
+# shorter words are not indexed by InnoDB full text indexes
+# with the default `innodb_ft_min_token_size`
+FULLTEXT_MIN_TOKEN = 3
+# relevance ranking of search results: weights of the full
+# text relevance of titles and shows versus descriptions
+# and the score a film gains per year it is newer than
+# another
+RANK_NAME_WEIGHT = 4.0
+RANK_DESCRIPTION_WEIGHT = 1.0
+RANK_YEAR_BONUS = 0.5
+RANK_YEAR = 31536000
+# films aired less than this number of seconds ago are
+# considered future films
+NOFUTURE_DELAY = 3600
+# recent films are counted per hour. The bounds of the recent
+# condition are full hours as well
+RECENT_RESOLUTION = 3600
+# longest interval of recent films selectable in the settings
+RECENT_MAXAGE = 2592000
+# number of films a differential update looks up per query
+LOOKUP_CHUNK_SIZE = 500
 
 
 class StoreMySQL(object):
@@ -32,17 +63,63 @@ class StoreMySQL(object):
         self.notifier = notifier
         self.settings = settings
         # updater state variables
-        self.ft_channel = None
-        self.ft_channelid = None
-        self.ft_show = None
-        self.ft_showid = None
+        self.ft_generation = None
+        self.ft_counts = None
+        self.ft_dirbase = None
+        self.ft_channels = None
+        self.ft_shows = None
+        self.ft_films = None
+        self.ft_lookup = False
+        self.ft_statements = 0
+        # full text indexes available
+        self.fulltext = False
         # useful query fragments
         # pylint: disable=line-too-long
-        self.sql_query_films = "SELECT film.id,`title`,`show`,`channel`,`description`,TIME_TO_SEC(`duration`) AS `seconds`,`size`,`aired`,`url_sub`,`url_video`,`url_video_sd`,`url_video_hd` FROM `film` LEFT JOIN `show` ON show.id=film.showid LEFT JOIN `channel` ON channel.id=film.channelid"
-        self.sql_query_filmcnt = "SELECT COUNT(*) FROM `film` LEFT JOIN `show` ON show.id=film.showid LEFT JOIN `channel` ON channel.id=film.channelid"
-        self.sql_cond_recent = "( TIMESTAMPDIFF(SECOND,{},CURRENT_TIMESTAMP()) <= {} )".format(
-            "aired" if settings.recentmode == 0 else "film.dtCreated", settings.maxage)
-        self.sql_cond_nofuture = " AND ( ( `aired` IS NULL ) OR ( TIMESTAMPDIFF(HOUR,`aired`,CURRENT_TIMESTAMP()) > 0 ) )" if settings.nofuture else ""
+        self.sql_select_films = "SELECT film.id,`title`,`show`,`channel`,`description`,TIME_TO_SEC(`duration`) AS `seconds`,`size`,`aired`,`url_sub`,`url_video`,`url_video_sd`,`url_video_hd`"
+        self.sql_from_films = " FROM `film` LEFT JOIN `show` ON show.id=film.showid LEFT JOIN `channel` ON channel.id=film.channelid"
+        self.sql_query_films = self.sql_select_films + self.sql_from_films
+        self.sql_insert_film = """
+                INSERT INTO `film` (
+                    `idhash`,
+                    `touched`,
+                    `channelid`,
+                    `showid`,
+                    `title`,
+                    `search`,
+                    `aired`,
+                    `duration`,
+                    `size`,
+                    `description`,
+                    `website`,
+                    `url_sub`,
+                    `url_video`,
+                    `url_video_sd`,
+                    `url_video_hd`,
+                    `airedepoch`
+                )
+                VALUES (
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s,
+                    %s
+                )
+                """
+        # time conditions are index backed ranges on bound timestamps
+        self.sql_cond_recent = "( {} >= FROM_UNIXTIME( %s ) )".format(
+            "film.aired" if settings.recentmode == 0 else "film.dtCreated")
+        self.sql_cond_nofuture = " AND ( ( film.aired IS NULL ) OR ( film.aired <= FROM_UNIXTIME( %s ) ) )" if settings.nofuture else ""
         self.sql_cond_minlength = " AND ( ( `duration` IS NULL ) OR ( TIME_TO_SEC(`duration`) >= %d ) )" % settings.minlength if settings.minlength > 0 else ""
 
     def init(self, reset=False, convert=False):
@@ -102,7 +179,10 @@ class StoreMySQL(object):
             return False
 
         # handle schema versioning
-        return self._handle_database_update(convert)
+        if not self._handle_database_update(convert):
+            return False
+        self.fulltext = self._has_fulltext()
+        return True
 
     def exit(self):
         """ Shutdown of the database system """
@@ -110,7 +190,7 @@ class StoreMySQL(object):
             self.conn.close()
             self.conn = None
 
-    def search(self, search, filmui, extendedsearch=False):
+    def search(self, search, filmui, extendedsearch=False, page=None):
         """
         Performs a search for films based on a search term
         and adds the results to the current UI directory
@@ -124,14 +204,48 @@ class StoreMySQL(object):
             extendedsearch(bool, optional): if `True` the search is
                 performed also on film descriptions. Default is
                 `False`
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
+        searchkey = mvutils.make_search_string(search)
+        # every word of the term has to start a word of the title,
+        # the show name or in extended search the description.
+        # Terms with words too short for the full text index are
+        # searched as a whole by LIKE
+        tokens = FTS_TOKEN.findall(searchkey)
+        # results are ranked by relevance and age. Without
+        # a relevance score the newest films come first
+        recency = 'IFNULL( UNIX_TIMESTAMP( `aired` ), 0 ) / {}'.format(RANK_YEAR / RANK_YEAR_BONUS)
+        if self.fulltext and tokens and min(len(token) for token in tokens) >= FULLTEXT_MIN_TOKEN:
+            query = ' '.join('+{}*'.format(token) for token in tokens)
+            searchcond = '( ( MATCH( film.search ) AGAINST( %s IN BOOLEAN MODE ) ) OR ( MATCH( show.search ) AGAINST( %s IN BOOLEAN MODE ) ) OR ( MATCH( `description` ) AGAINST( %s IN BOOLEAN MODE ) ) )' if extendedsearch is True else '( ( MATCH( film.search ) AGAINST( %s IN BOOLEAN MODE ) ) OR ( MATCH( show.search ) AGAINST( %s IN BOOLEAN MODE ) ) )'
+            searchparm = (query, query, query, ) if extendedsearch is True else (query, query, )
+            searchrank = '( MATCH( film.search ) AGAINST( %s IN BOOLEAN MODE ) + MATCH( show.search ) AGAINST( %s IN BOOLEAN MODE ) ) * {}'.format(RANK_NAME_WEIGHT)
+            if extendedsearch is True:
+                searchrank += ' + MATCH( `description` ) AGAINST( %s IN BOOLEAN MODE ) * {}'.format(RANK_DESCRIPTION_WEIGHT)
+            return self._search_condition(
+                searchcond,
+                searchparm,
+                filmui,
+                True,
+                True,
+                self.settings.maxresults,
+                sortkey='( ' + searchrank + ' + ' + recency + ' )',
+                sortparams=searchparm,
+                page=page
+            )
         searchmask = '%' + search.decode('utf-8') + '%'
-        searchcond = '( ( `title` LIKE %s ) OR ( `show` LIKE %s ) OR ( `description` LIKE %s ) )' if extendedsearch is True else '( ( `title` LIKE %s ) OR ( `show` LIKE %s ) )'
-        searchparm = (searchmask, searchmask, searchmask) if extendedsearch is True else (
-            searchmask, searchmask, )
-        return self._search_condition(searchcond, searchparm, filmui, True, True, self.settings.maxresults)
-
-    def get_recents(self, channelid, filmui):
+        # titles and shows are searched by their search keys.
+        # Terms without searchable characters find nothing
+        searchkey = '%' + (searchkey or search.decode('utf-8')) + '%'
+        searchcond = '( ( film.search LIKE %s ) OR ( show.search LIKE %s ) OR ( `description` LIKE %s ) )' if extendedsearch is True else '( ( film.search LIKE %s ) OR ( show.search LIKE %s ) )'
+        searchparm = (searchkey, searchkey, searchmask) if extendedsearch is True else (
+            searchkey, searchkey, )
+        return self._search_condition(searchcond, searchparm, filmui, True, True, self.settings.maxresults, page=page)
+
+    def get_recents(self, channelid, filmui, page=None):
         """
         Populates the current UI directory with the recent
         film additions based on the configured interval.
@@ -142,23 +256,29 @@ class StoreMySQL(object):
 
             filmui(FilmUI): an instance of a film model view used
                 for populating the directory
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
         if channelid != '0':
             return self._search_condition(
                 self.sql_cond_recent + ' AND ( film.channelid=%s )',
-                (int(channelid), ),
+                (self._get_recent_start(), int(channelid), ),
                 filmui,
                 True,
                 False,
-                10000
+                self.settings.maxresults,
+                page=page
             )
         return self._search_condition(
             self.sql_cond_recent,
-            (),
+            (self._get_recent_start(), ),
             filmui,
             True,
             False,
-            10000
+            self.settings.maxresults,
+            page=page
         )
 
     def get_live_streams(self, filmui):
@@ -189,7 +309,7 @@ class StoreMySQL(object):
             channelui(ChannelUI): an instance of a channel model
                 view used for populating the directory
         """
-        self._search_channels_condition(None, channelui)
+        self._search_channels_condition(None, (), channelui)
 
     def get_recent_channels(self, channelui):
         """
@@ -201,7 +321,36 @@ class StoreMySQL(object):
             channelui(ChannelUI): an instance of a channel model
                 view used for populating the directory
         """
-        self._search_channels_condition(self.sql_cond_recent, channelui)
+        if self.conn is None:
+            return
+        try:
+            # recent films are counted per channel and hour
+            # during the update
+            self.logger.info(
+                'MySQL Query: SELECT channel.id,channel,SUM(count) FROM dir_recent INNER JOIN channel WHERE ( mode={} ) AND ( start>=%s ) GROUP BY channel.id',
+                self.settings.recentmode
+            )
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT      channel.id,
+                            channel.channel,
+                            CAST( SUM( dir_recent.count ) AS SIGNED )
+                FROM        `dir_recent`
+                INNER JOIN  `channel`
+                    ON      ( channel.id = dir_recent.channelid )
+                WHERE       ( dir_recent.mode = %s )
+                            AND
+                            ( dir_recent.start >= %s )
+                GROUP BY    channel.id, channel.channel
+            """, (self.settings.recentmode, self._get_recent_start(), ))
+            channelui.begin()
+            for (channelui.channelid, channelui.channel, channelui.count) in cursor:
+                channelui.add()
+            channelui.end()
+            cursor.close()
+        except mysql.connector.Error as err:
+            self.logger.error('Database error: {}, {}', err.errno, err)
+            self.notifier.show_database_error(err)
 
     def get_initials(self, channelid, initialui):
         """
@@ -220,28 +369,18 @@ class StoreMySQL(object):
         try:
             channelid = int(channelid)
             cursor = self.conn.cursor()
-            if channelid != 0:
-                self.logger.info(
-                    'MySQL Query: SELECT LEFT(`search`,1) AS letter,COUNT(*) AS `count` FROM `show` WHERE ( `channelid`={} ) GROUP BY LEFT(search,1)',
-                    channelid
-                )
-                cursor.execute("""
-                    SELECT      LEFT(`search`,1)    AS `letter`,
-                                COUNT(*)            AS `count`
-                    FROM        `show`
-                    WHERE       ( `channelid`=%s )
-                    GROUP BY    LEFT(`search`,1)
-                """, (channelid, ))
-            else:
-                self.logger.info(
-                    'MySQL Query: SELECT LEFT(`search`,1) AS letter,COUNT(*) AS `count` FROM `show` GROUP BY LEFT(search,1)'
-                )
-                cursor.execute("""
-                    SELECT      LEFT(`search`,1)    AS `letter`,
-                                COUNT(*)            AS `count`
-                    FROM        `show`
-                    GROUP BY    LEFT(`search`,1)
-                """)
+            # the initials of all channels are stored as channel 0
+            self.logger.info(
+                'MySQL Query: SELECT `initial`,`count` FROM `dir_initial` WHERE ( `channelid`={} )',
+                channelid
+            )
+            cursor.execute("""
+                SELECT      `initial`,
+                            `count`
+                FROM        `dir_initial`
+                WHERE       ( `channelid`=%s )
+                ORDER BY    `initial`
+            """, (channelid, ))
             initialui.begin(channelid)
             for (initialui.initial, initialui.count) in cursor:
                 initialui.add()
@@ -272,16 +411,13 @@ class StoreMySQL(object):
             cursor = self.conn.cursor()
             if channelid == 0 and self.settings.groupshows:
                 cursor.execute("""
-                    SELECT      GROUP_CONCAT(show.id),
-                                GROUP_CONCAT(`channelid`),
+                    SELECT      `showids`,
+                                `channelids`,
                                 `show`,
-                                GROUP_CONCAT(`channel`)
-                    FROM        `show`
-                    LEFT JOIN   `channel`
-                        ON      ( channel.id = show.channelid )
-                    WHERE       ( `show` LIKE %s )
-                    GROUP BY    `show`
-                """, (initial + '%', ))
+                                `channels`
+                    FROM        `dir_showgroup`
+                    WHERE       ( `initial`=%s )
+                """, (initial, ))
             elif channelid == 0:
                 cursor.execute("""
                     SELECT      show.id,
@@ -291,7 +427,7 @@ class StoreMySQL(object):
                     FROM        `show`
                     LEFT JOIN   `channel`
                         ON      ( channel.id = show.channelid )
-                    WHERE       ( `show` LIKE %s )
+                    WHERE       ( show.search LIKE %s )
                 """, (initial + '%', ))
             elif initial:
                 cursor.execute("""
@@ -305,7 +441,7 @@ class StoreMySQL(object):
                     WHERE       (
                                     ( `channelid` = %s )
                                     AND
-                                    ( `show` LIKE %s )
+                                    ( show.search LIKE %s )
                                 )
                 """, (channelid, initial + '%', ))
             else:
@@ -328,7 +464,7 @@ class StoreMySQL(object):
             self.logger.error('Database error: {}, {}', err.errno, err)
             self.notifier.show_database_error(err)
 
-    def get_films(self, showid, filmui):
+    def get_films(self, showid, filmui, page=None):
         """
         Populates the current UI directory with a list
         of films of a specific show.
@@ -338,6 +474,10 @@ class StoreMySQL(object):
 
             filmui(FilmUI): an instance of a film model view
                 used for populating the directory
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
         if self.conn is None:
             return
@@ -349,7 +489,8 @@ class StoreMySQL(object):
                 filmui,
                 False,
                 False,
-                10000
+                self.settings.maxresults,
+                page=page
             )
         # multiple channel ids
         return self._search_condition(
@@ -358,10 +499,11 @@ class StoreMySQL(object):
             filmui,
             False,
             True,
-            10000
+            self.settings.maxresults,
+            page=page
         )
 
-    def _search_channels_condition(self, condition, channelui):
+    def _search_channels_condition(self, condition, params, channelui):
         if self.conn is None:
             return
         try:
@@ -372,10 +514,11 @@ class StoreMySQL(object):
                 query = 'SELECT channel.id AS `id`,`channel`,COUNT(*) AS `count` FROM `film` LEFT JOIN `channel` ON channel.id=film.channelid'
                 qtail = ' WHERE ' + condition + self.sql_cond_nofuture + \
                     self.sql_cond_minlength + ' GROUP BY channel.id'
+                params = tuple(params) + self._get_nofuture_params()
             self.logger.info('MySQL Query: {}', query + qtail)
 
             cursor = self.conn.cursor()
-            cursor.execute(query + qtail)
+            cursor.execute(query + qtail, params)
             channelui.begin()
             for (channelui.channelid, channelui.channel, channelui.count) in cursor:
                 channelui.add()
@@ -385,52 +528,103 @@ class StoreMySQL(object):
             self.logger.error('Database error: {}, {}', err.errno, err)
             self.notifier.show_database_error(err)
 
-    def _search_condition(self, condition, params, filmui, showshows, showchannels, maxresults, limiting=True):
+    def _search_condition(self, condition, params, filmui, showshows, showchannels, maxresults, limiting=True, sortkey=None, sortparams=(), descending=True, page=None):
         if self.conn is None:
             return 0
         try:
             if limiting:
                 sql_cond_limit = self.sql_cond_nofuture + self.sql_cond_minlength
+                limitparams = self._get_nofuture_params()
             else:
                 sql_cond_limit = ''
-            self.logger.info(
-                'MySQL Query: {}',
-                self.sql_query_films +
-                ' WHERE ' +
-                condition +
-                sql_cond_limit
-            )
+                limitparams = ()
+            # films are listed in the order of the sort key. The
+            # film id breaks ties, so that every film has a unique
+            # position from which the next page can be fetched
+            nullable = sortkey is None
+            if nullable:
+                # the bare column lets the aired index deliver the order.
+                # Films without date have no position in that index and
+                # are fetched by a separate branch
+                (sortkey, sortcolumn, sortvalue) = ('UNIX_TIMESTAMP( film.aired )', 'film.aired', 'FROM_UNIXTIME( %s )')
+                sql_order = ' ORDER BY film.aired{0}, film.id{0}'.format(' DESC' if descending else '')
+            else:
+                (sortcolumn, sortvalue) = (sortkey, '%s')
+                sql_order = ' ORDER BY `pagekey`{0}, film.id{0}'.format(' DESC' if descending else '')
+            params = tuple(params)
+            # the branches are queried in turn until the page is full
+            branches = [(condition, params, )]
+            if page is not None:
+                values = mvutils.parse_page_key(page, 2)
+                if values is None or values[1] is None:
+                    self.logger.warn('Ignoring invalid page key {}', page)
+                elif values[0] is None and nullable:
+                    # the page ends within the films without date
+                    branches = [(
+                        '( ' + condition + ' ) AND ( film.aired IS NULL ) AND ( film.id {} %s )'.format('<' if descending else '>'),
+                        params + (values[1], ),
+                    )]
+                    if not descending:
+                        branches.append(('( ' + condition + ' ) AND ( film.aired IS NOT NULL )', params, ))
+                else:
+                    branches = [(
+                        '( ' + condition + ' ) AND ' + self._page_condition(sortcolumn, descending, sortvalue),
+                        params + tuple(sortparams) + (values[0], ) + tuple(sortparams) + (values[0], values[1], ),
+                    )]
+                    if nullable and descending:
+                        branches.append(('( ' + condition + ' ) AND ( film.aired IS NULL )', params, ))
+            films = []
             cursor = self.conn.cursor()
-            cursor.execute(
-                self.sql_query_filmcnt +
-                ' WHERE ' +
-                condition +
-                sql_cond_limit +
-                (' LIMIT {}'.format(maxresults + 1) if maxresults else ''),
-                params
-            )
-            (results, ) = cursor.fetchone()
-            if maxresults and results > maxresults:
-                self.notifier.show_limit_results(maxresults)
-            cursor.execute(
-                self.sql_query_films +
-                ' WHERE ' +
-                condition +
-                sql_cond_limit +
-                (' LIMIT {}'.format(maxresults + 1) if maxresults else ''),
-                params
-            )
+            for (branchcondition, branchparams) in branches:
+                query = self.sql_select_films + ',' + sortkey + ' AS `pagekey`' + \
+                    self.sql_from_films + ' WHERE ' + branchcondition + \
+                    sql_cond_limit + sql_order + \
+                    (' LIMIT {}'.format(maxresults + 1 - len(films)) if maxresults else '')
+                self.logger.info('MySQL Query: {}', query)
+                cursor.execute(query, tuple(sortparams) + branchparams + limitparams)
+                films += cursor.fetchall()
+                if maxresults and len(films) > maxresults:
+                    break
+            cursor.close()
+            if maxresults and len(films) > maxresults:
+                # there is at least one more film
+                films = films[:maxresults]
+                page = mvutils.make_page_key((films[-1][12], films[-1][0], ))
+            else:
+                page = None
+            results = len(films)
             filmui.begin(showshows, showchannels)
-            for (filmui.filmid, filmui.title, filmui.show, filmui.channel, filmui.description, filmui.seconds, filmui.size, filmui.aired, filmui.url_sub, filmui.url_video, filmui.url_video_sd, filmui.url_video_hd) in cursor:
+            for row in films:
+                (filmui.filmid, filmui.title, filmui.show, filmui.channel, filmui.description, filmui.seconds, filmui.size, filmui.aired, filmui.url_sub, filmui.url_video, filmui.url_video_sd, filmui.url_video_hd) = row[:12]
                 filmui.add(total_items=results)
+            if page is not None:
+                filmui.add_next_page(page)
             filmui.end()
-            cursor.close()
             return results
         except mysql.connector.Error as err:
             self.logger.error('Database error: {}, {}', err.errno, err)
             self.notifier.show_database_error(err)
             return 0
 
+    @staticmethod
+    def _page_condition(sortkey, descending, value='%s'):
+        # keyset predicate equivalent to ( sortkey, film.id ) < ( value, %s ).
+        # The range on the sort key can be served by an index if the
+        # sort key is a bare indexed column
+        return '( ( {0} {1}= {2} ) AND ( ( {0} {1} {2} ) OR ( film.id {1} %s ) ) )'.format(
+            sortkey,
+            '<' if descending else '>',
+            value
+        )
+
+    def _get_recent_start(self):
+        # lower bound of the recent condition
+        return int(time.time()) // RECENT_RESOLUTION * RECENT_RESOLUTION - self.settings.maxage
+
+    def _get_nofuture_params(self):
+        # bound of the no future condition
+        return (int(time.time()) - NOFUTURE_DELAY, ) if self.sql_cond_nofuture else ()
+
     def retrieve_film_info(self, filmid):
         """
         Retrieves the spcified film information
@@ -685,6 +879,77 @@ class StoreMySQL(object):
             self.logger.error('Database error: {}, {}', err.errno, err)
             self.notifier.show_database_error(err)
 
+    def get_history(self, limit=HISTORY_SIZE):
+        """
+        Retrieves the statistics of the most recent update
+        cycles, newest first
+
+        Args:
+            limit(int, optional): maximum number of update
+                cycles returned. Default is 50
+        """
+        if self.conn is None:
+            return []
+        history = []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'SELECT `started`,`fullupdate`,`status`,`duration`,`bytes`,`records`,`rate`,`statements`,{} FROM `history` ORDER BY `id` DESC LIMIT %s'.format(
+                    ','.join('`tm_{}`'.format(phase) for phase in PHASES)),
+                (limit, )
+            )
+            for row in cursor:
+                history.append({
+                    'started': row[0],
+                    'fullupdate': row[1],
+                    'status': row[2],
+                    'duration': row[3],
+                    'bytes': row[4],
+                    'records': row[5],
+                    'rate': row[6],
+                    'statements': row[7],
+                    'times': dict(zip(PHASES, row[8:]))
+                })
+            cursor.close()
+        except mysql.connector.Error as err:
+            self.logger.error('Database error: {}, {}', err.errno, err)
+        return history
+
+    def add_history(self, stats):
+        """
+        Stores the statistics of an update cycle. Only the
+        most recent update cycles are kept.
+
+        Args:
+            stats(dict): statistics as returned by
+                `UpdateStats.get_as_dict()`
+        """
+        if self.conn is None:
+            return
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO `history` ( `started`,`fullupdate`,`status`,`duration`,`bytes`,`records`,`rate`,`statements`,{} ) VALUES ( {} )'.format(
+                    ','.join('`tm_{}`'.format(phase) for phase in PHASES),
+                    ','.join(['%s'] * (8 + len(PHASES)))),
+                (
+                    stats['started'],
+                    stats['fullupdate'],
+                    stats['status'],
+                    stats['duration'],
+                    stats['bytes'],
+                    stats['records'],
+                    stats['rate'],
+                    stats['statements'],
+                ) + tuple(stats['times'][phase] for phase in PHASES)
+            )
+            cursor.execute(
+                'DELETE FROM `history` WHERE ( `id` <= %s )', (cursor.lastrowid - HISTORY_SIZE, ))
+            cursor.close()
+            self.conn.commit()
+        except mysql.connector.Error as err:
+            self.logger.error('Database error: {}, {}', err.errno, err)
+
     @staticmethod
     def supports_update():
         """
@@ -754,53 +1019,95 @@ class StoreMySQL(object):
         retval = cursor.rowcount > 0
         self.conn.commit()
         cursor.close()
-        self.ft_channel = None
-        self.ft_channelid = None
-        self.ft_show = None
-        self.ft_showid = None
+        self.ft_generation = None
+        self.ft_counts = None
+        self.ft_dirbase = None
+        self.ft_channels = None
+        self.ft_shows = None
+        self.ft_films = None
+        self.ft_lookup = False
+        self.ft_statements = 1
         return retval
 
-    def ft_update_start(self, full):
+    def ft_update_start(self, full, resume=None):
         """
-        Begins a local update procedure
+        Begins a local update procedure. Every update works
+        on a generation number which is written into the
+        `touched` column of all records seen by the update.
+        A full update starts a new generation so that all
+        records not seen can be found by their lower number.
+
+        Returns the number of channels, shows and films and
+        if the interrupted update has been resumed.
 
         Args:
             full(bool): if `True` a full update is started
+
+            resume(int, optional): generation of an interrupted
+                update that should be continued if possible
         """
         param = (1, ) if full else (0, )
         try:
             cursor = self.conn.cursor()
             cursor.callproc('ftUpdateStart', param)
+            self.ft_statements += 1
             for result in cursor.stored_results():
-                for (cnt_chn, cnt_shw, cnt_mov) in result:
+                for (cnt_chn, cnt_shw, cnt_mov, generation) in result:
                     cursor.close()
                     self.conn.commit()
-                    return (cnt_chn, cnt_shw, cnt_mov)
+                    # an interrupted full update has already touched
+                    # records with the generation it started with
+                    candidates = (generation - 1, generation, ) if full else (generation, )
+                    resumed = resume is not None and resume in candidates
+                    self.ft_generation = resume if resumed else generation
+                    self.ft_counts = [cnt_chn, cnt_shw, cnt_mov]
+                    self._ft_load_maps(full)
+                    self.ft_dirbase = None if full or resumed else self._ft_get_maxids()
+                    return (cnt_chn, cnt_shw, cnt_mov, resumed, )
             # should never happen
             cursor.close()
             self.conn.commit()
         except mysql.connector.Error as err:
             self.logger.error('Database error: {}, {}', err.errno, err)
             self.notifier.show_database_error(err)
-        return (0, 0, 0, )
+        return (0, 0, 0, False, )
 
     def ft_update_end(self, delete):
         """
-        Finishes a local update procedure
+        Finishes a local update procedure. Stale films are
+        deleted by their generation, followed by the shows
+        and channels left without films. The totals are
+        derived from the counters maintained during the
+        update instead of counting the tables again.
+
+        The summaries of the browsing directories are
+        rebuilt after full and resumed updates. After a
+        differential update they are extended by the
+        records it added.
 
         Args:
             delete(bool): if `True` all records not updated
                 will be deleted
         """
-        param = (1, ) if delete else (0, )
         try:
+            if self.ft_generation is None:
+                self.ft_generation = self._ft_get_generation()
+            if self.ft_counts is None:
+                self.ft_counts = self._ft_get_counts()
+            param = (1 if delete else 0, self.ft_generation, )
             cursor = self.conn.cursor()
             cursor.callproc('ftUpdateEnd', param)
+            self.ft_statements += 1
             for result in cursor.stored_results():
-                for (del_chn, del_shw, del_mov, cnt_chn, cnt_shw, cnt_mov) in result:
+                for (del_chn, del_shw, del_mov) in result:
+                    if self.ft_dirbase is None or delete:
+                        self._fill_directory(cursor)
+                    else:
+                        self._update_directory(cursor, *self.ft_dirbase)
                     cursor.close()
                     self.conn.commit()
-                    return (del_chn, del_shw, del_mov, cnt_chn, cnt_shw, cnt_mov)
+                    (cnt_chn, cnt_shw, cnt_mov) = self.ft_counts
+                    return (del_chn, del_shw, del_mov, cnt_chn - del_chn, cnt_shw - del_shw, cnt_mov - del_mov)
             # should never happen
             cursor.close()
             self.conn.commit()
@@ -809,86 +1116,157 @@ class StoreMySQL(object):
             self.notifier.show_database_error(err)
         return (0, 0, 0, 0, 0, 0, )
 
-    def ft_insert_film(self, film, commit=True):
+    def ft_insert_films(self, films, commit=True):
         """
-        Inserts a film emtry into the database
+        Inserts a batch of film entries into the database.
+        Existing films are resolved from the maps loaded by
+        `ft_update_start()` and new films are inserted with
+        a single `executemany` in the same transaction.
+        A differential update looks up the films of the
+        batch that are not yet known by their idhash.
 
         Args:
-            film(Film): a film entry
+            films(list): a list of `FilmRecord` entries
 
             commit(bool, optional): the operation will be
                 commited immediately. Default is `True`
         """
-        newchn = False
+        if self.ft_films is None:
+            try:
+                self._ft_load_maps()
+            except mysql.connector.Error as err:
+                self.logger.error('Database error: {}, {}', err.errno, err)
+                self.notifier.show_database_error(err)
+                return (0, 0, 0, )
         inschn = 0
         insshw = 0
-        insmov = 0
-        channel = film['channel'][:64]
-        show = film['show'][:128]
-        title = film['title'][:128]
-
-        # handle channel
-        if self.ft_channel != channel:
-            # process changed channel
-            newchn = True
-            self.ft_channel = channel
-            (self.ft_channelid, inschn) = self._insert_channel(self.ft_channel)
-            if self.ft_channelid == 0:
-                self.logger.info(
-                    'Undefined error adding channel "{}"', self.ft_channel)
-                return (0, 0, 0, 0, )
-
-        if newchn or self.ft_show != show:
-            # process changed show
-            self.ft_show = show
-            (self.ft_showid, insshw) = self._insert_show(self.ft_channelid,
-                                                         self.ft_show, mvutils.make_search_string(self.ft_show))
-            if self.ft_showid == 0:
+        touch = []
+        insert = []
+        resolved = []
+        for film in films:
+            channel = film.channel[:64]
+            show = film.show[:128]
+            (channelid, added) = self._insert_channel(channel)
+            inschn += added
+            (showid, added) = self._insert_show(
+                channelid, show, mvutils.make_search_string(show)[:128])
+            insshw += added
+            if channelid == 0 or showid == 0:
                 self.logger.info(
-                    'Undefined error adding show "{}"', self.ft_show)
-                return (0, 0, 0, 0, )
+                    'Undefined error adding channel "{}" or show "{}"', channel, show)
+                continue
+            digest = hashlib.md5("{}:{}:{}".format(
+                channelid, showid, film.url_video).encode('utf8')).digest()
+            resolved.append((digest, channelid, showid, film, ))
+        if self.ft_lookup:
+            try:
+                self._ft_lookup_films([digest for (digest, _, _, _) in resolved])
+            except mysql.connector.Error as err:
+                self.logger.error('Database error: {}, {}', err.errno, err)
+                self.notifier.show_database_error(err)
+                return (inschn, insshw, 0, )
+        for (digest, channelid, showid, film) in resolved:
+            filmid = self.ft_films.get(digest)
+            if filmid is not None:
+                if filmid > 0:
+                    touch.append((digest, filmid, ))
+                    self.ft_films[digest] = -filmid
+                continue
+            title = film.title[:128]
+            insert.append((
+                binascii.hexlify(digest).decode('ascii'),
+                self.ft_generation,
+                channelid,
+                showid,
+                title,
+                film.search[:128],
+                film.aired if film.aired != '1980-01-01 00:00:00' else None,
+                film.duration if film.duration != '00:00:00' else None,
+                film.size,
+                film.description,
+                film.website,
+                film.url_sub,
+                film.url_video,
+                film.url_video_sd,
+                film.url_video_hd,
+                film.airedepoch,
+            ))
+            # duplicates inside the batch are inserted only once
+            self.ft_films[digest] = 0
 
         try:
             cursor = self.conn.cursor()
-            cursor.callproc('ftInsertFilm', (
-                self.ft_channelid,
-                self.ft_showid,
-                title,
-                mvutils.make_search_string(title),
-                film["aired"],
-                film["duration"],
-                film["size"],
-                film["description"],
-                film["website"],
-                film["url_sub"],
-                film["url_video"],
-                film["url_video_sd"],
-                film["url_video_hd"],
-                film["airedepoch"],
-            ))
-            for result in cursor.stored_results():
-                for (filmid, insmov) in result:
-                    cursor.close()
-                    if commit:
-                        self.conn.commit()
-                    return (filmid, inschn, insshw, insmov)
-                # should never happen
-                cursor.close()
-                if commit:
-                    self.conn.commit()
+            # executemany counts as one statement
+            self.ft_statements += (len(touch) + 499) // 500 + (1 if insert else 0)
+            for index in range(0, len(touch), 500):
+                chunk = [filmid for (_, filmid) in touch[index:index + 500]]
+                cursor.execute(
+                    'UPDATE `film` SET `touched` = %s WHERE ( `id` IN ( {} ) )'.format(
+                        ','.join(['%s'] * len(chunk))),
+                    [self.ft_generation] + chunk
+                )
+            if insert:
+                cursor.executemany(self.sql_insert_film, insert)
+            cursor.close()
+            if commit:
+                self.conn.commit()
+            if self.ft_counts is not None:
+                self.ft_counts[2] += len(insert)
+            return (inschn, insshw, len(insert), )
         except mysql.connector.Error as err:
-            self.logger.error('Database error: {}, {}', err.errno, err)
-            self.notifier.show_database_error(err)
-        return (0, 0, 0, 0, )
+            self.logger.error('Database error: {}, {} - writing the batch film by film', err.errno, err)
+            self.conn.rollback()
+        return (inschn, insshw, self._ft_insert_rows(touch, insert), )
+
+    def _ft_insert_rows(self, touch, insert):
+        # every film of a failed batch is written on its own, so that
+        # an error loses only the affected film. Failed films are
+        # removed from the map, so that later duplicates are retried
+        inserted = 0
+        failure = None
+        cursor = self.conn.cursor()
+        for (digest, filmid) in touch:
+            try:
+                self.ft_statements += 1
+                cursor.execute(
+                    'UPDATE `film` SET `touched` = %s WHERE ( `id` = %s )', (self.ft_generation, filmid, ))
+            except mysql.connector.Error as err:
+                self.logger.error('Database error: {}, {}', err.errno, err)
+                self.ft_films[digest] = filmid
+                failure = err
+        for row in insert:
+            try:
+                self.ft_statements += 1
+                cursor.execute(self.sql_insert_film, row)
+                inserted += 1
+            except mysql.connector.Error as err:
+                self.logger.error('Database error: {}, {}', err.errno, err)
+                self.ft_films.pop(binascii.unhexlify(row[0]), None)
+                failure = err
+        cursor.close()
+        self.conn.commit()
+        if self.ft_counts is not None:
+            self.ft_counts[2] += inserted
+        if failure is not None:
+            self.notifier.show_database_error(failure)
+        return inserted
 
     def _insert_channel(self, channel):
+        entry = self.ft_channels.get(channel) if self.ft_channels is not None else None
+        if entry is not None and entry[1]:
+            return (entry[0], 0, )
         try:
             cursor = self.conn.cursor()
-            cursor.callproc('ftInsertChannel', (channel, ))
+            cursor.callproc('ftInsertChannel', (channel, self.ft_generation, ))
+            self.ft_statements += 1
             for result in cursor.stored_results():
                 for (idd, added) in result:
                     cursor.close()
                     self.conn.commit()
+                    if self.ft_channels is not None:
+                        self.ft_channels[channel] = (idd, True, )
+                    if self.ft_counts is not None:
+                        self.ft_counts[0] += added
                     return (idd, added)
             # should never happen
             cursor.close()
@@ -899,13 +1277,21 @@ class StoreMySQL(object):
         return (0, 0, )
 
     def _insert_show(self, channelid, show, search):
+        entry = self.ft_shows.get((channelid, show, )) if self.ft_shows is not None else None
+        if entry is not None and entry[1]:
+            return (entry[0], 0, )
         try:
             cursor = self.conn.cursor()
-            cursor.callproc('ftInsertShow', (channelid, show, search, ))
+            cursor.callproc('ftInsertShow', (channelid, show, search, self.ft_generation, ))
+            self.ft_statements += 1
             for result in cursor.stored_results():
                 for (idd, added) in result:
                     cursor.close()
                     self.conn.commit()
+                    if self.ft_shows is not None:
+                        self.ft_shows[(channelid, show, )] = (idd, True, )
+                    if self.ft_counts is not None:
+                        self.ft_counts[1] += added
                     return (idd, added)
             # should never happen
             cursor.close()
@@ -915,6 +1301,103 @@ class StoreMySQL(object):
             self.notifier.show_database_error(err)
         return (0, 0, )
 
+    def ft_get_generation(self):
+        """ Returns the generation of the running update """
+        return self.ft_generation
+
+    def ft_get_statements(self):
+        """
+        Returns the number of statements issued by the
+        running update. Each `executemany` counts once.
+        """
+        return self.ft_statements
+
+    def _ft_get_generation(self):
+        # the generation of a running differential update
+        self.ft_statements += 1
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT  GREATEST(
+                        IFNULL( ( SELECT MAX( `touched` ) FROM `channel` ), 0 ),
+                        IFNULL( ( SELECT MAX( `touched` ) FROM `show` ), 0 ),
+                        IFNULL( ( SELECT MAX( `touched` ) FROM `film` ), 0 ),
+                        1
+                    )
+        """)
+        (generation, ) = cursor.fetchone()
+        cursor.close()
+        return generation
+
+    def _ft_get_counts(self):
+        self.ft_statements += 1
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT  ( SELECT COUNT(*) FROM `channel` ),
+                    ( SELECT COUNT(*) FROM `show` ),
+                    ( SELECT COUNT(*) FROM `film` )
+        """)
+        counts = list(cursor.fetchone())
+        cursor.close()
+        return counts
+
+    def _ft_get_maxids(self):
+        # a differential update only adds records. The directory
+        # is extended by the records above the current ids
+        self.ft_statements += 1
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT IFNULL( ( SELECT MAX( `id` ) FROM `show` ), 0 ),IFNULL( ( SELECT MAX( `id` ) FROM `film` ), 0 )')
+        maxids = cursor.fetchone()
+        cursor.close()
+        return maxids
+
+    def _ft_load_maps(self, full=False):
+        # channels and shows map to `( id, touched )`, films map the
+        # binary idhash to their id. The id of a film already touched
+        # in the current generation is stored negated. Only a full
+        # update needs all films. A differential update looks up
+        # the films of each batch by `_ft_lookup_films()`
+        if self.ft_generation is None:
+            self.ft_generation = self._ft_get_generation()
+        generation = self.ft_generation
+        self.ft_statements += 2
+        cursor = self.conn.cursor()
+        self.ft_channels = {}
+        cursor.execute('SELECT `id`,`channel`,`touched` FROM `channel`')
+        for (channelid, channel, touched) in cursor:
+            self.ft_channels[channel] = (channelid, touched >= generation, )
+        self.ft_shows = {}
+        cursor.execute('SELECT `id`,`channelid`,`show`,`touched` FROM `show`')
+        for (showid, channelid, show, touched) in cursor:
+            self.ft_shows[(channelid, show, )] = (showid, touched >= generation, )
+        self.ft_films = {}
+        self.ft_lookup = not full
+        if not self.ft_lookup:
+            self.ft_statements += 1
+            cursor.execute('SELECT `idhash`,`id`,`touched` FROM `film`')
+            for (idhash, filmid, touched) in cursor:
+                self.ft_films[binascii.unhexlify(idhash)] = -filmid if touched >= generation else filmid
+        cursor.close()
+
+    def _ft_lookup_films(self, digests):
+        # films looked up once stay in the map. Films not found
+        # are inserted by the batch and mapped afterwards
+        generation = self.ft_generation
+        missing = list(set(digest for digest in digests if digest not in self.ft_films))
+        cursor = self.conn.cursor()
+        for index in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            chunk = missing[index:index + LOOKUP_CHUNK_SIZE]
+            self.ft_statements += 1
+            cursor.execute(
+                'SELECT `idhash`,`id`,`touched` FROM `film` WHERE ( `idhash` IN ( {} ) )'.format(
+                    ','.join(['%s'] * len(chunk))
+                ),
+                [binascii.hexlify(digest).decode('ascii') for digest in chunk]
+            )
+            for (idhash, filmid, touched) in cursor.fetchall():
+                self.ft_films[binascii.unhexlify(idhash)] = -filmid if touched >= generation else filmid
+        cursor.close()
+
     def _get_schema_version(self):
         if self.conn is None:
             return 0
@@ -938,7 +1421,7 @@ class StoreMySQL(object):
             # should never happen - something went wrong...
             self.exit()
             return False
-        elif version == 2:
+        elif version == 9:
             # current version
             return True
         elif convert is False:
@@ -1001,8 +1484,236 @@ class StoreMySQL(object):
                 self.notifier.close_update_scheme_progress()
                 self.notifier.show_database_error(err)
                 return False
+            return self._handle_database_update(convert, 2)
+        elif version == 2:
+            # convert from 2 to 3
+            self.logger.info('Converting database to version 3')
+            self.notifier.show_update_scheme_progress()
+            try:
+                cursor = self.conn.cursor()
+                self.logger.info('Converting touched flags to update generations...')
+                cursor.execute(
+                    'ALTER TABLE `channel` CHANGE COLUMN `touched` `touched` int(11) NOT NULL DEFAULT 1, ADD KEY `touched` (`touched`)')
+                self.notifier.update_update_scheme_progress(5)
+                cursor.execute(
+                    'ALTER TABLE `show` CHANGE COLUMN `touched` `touched` int(11) NOT NULL DEFAULT 1, ADD KEY `touched` (`touched`)')
+                self.notifier.update_update_scheme_progress(15)
+                cursor.execute(
+                    'ALTER TABLE `film` CHANGE COLUMN `touched` `touched` int(11) NOT NULL DEFAULT 1, ADD KEY `touched` (`touched`)')
+                self.notifier.update_update_scheme_progress(90)
+                self.logger.info('Recreating stored procedures...')
+                self._recreate_procedures(cursor)
+                self.logger.info('Updating version info in status table...')
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 3')
+                cursor.execute('UPDATE `status` SET `version` = 3')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 3')
+                self.notifier.close_update_scheme_progress()
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.close_update_scheme_progress()
+                self.notifier.show_database_error(err)
+                return False
+            return self._handle_database_update(convert, 3)
+        elif version == 3:
+            # convert from 3 to 4
+            self.logger.info('Converting database to version 4')
+            try:
+                cursor = self.conn.cursor()
+                self.logger.info('Recreating stored procedures...')
+                self._recreate_procedures(cursor)
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 4')
+                cursor.execute('UPDATE `status` SET `version` = 4')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 4')
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.show_database_error(err)
+                return False
+            return self._handle_database_update(convert, 4)
+        elif version == 4:
+            # convert from 4 to 5
+            self.logger.info('Converting database to version 5')
+            try:
+                cursor = self.conn.cursor()
+                self.logger.info('Creating update history table...')
+                self._create_history(cursor)
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 5')
+                cursor.execute('UPDATE `status` SET `version` = 5')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 5')
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.show_database_error(err)
+                return False
+            return self._handle_database_update(convert, 5)
+        elif version == 5:
+            # convert from 5 to 6
+            self.logger.info('Converting database to version 6')
+            self.notifier.show_update_scheme_progress()
+            try:
+                cursor = self.conn.cursor()
+                self.logger.info('Rebuilding search keys of shows...')
+                self._rekey_search(cursor, 'show', 'show')
+                self.notifier.update_update_scheme_progress(10)
+                self.logger.info('Rebuilding search keys of films...')
+                self._rekey_search(cursor, 'film', 'title')
+                self.notifier.update_update_scheme_progress(99)
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 6')
+                cursor.execute('UPDATE `status` SET `version` = 6')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 6')
+                self.notifier.close_update_scheme_progress()
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.close_update_scheme_progress()
+                self.notifier.show_database_error(err)
+                return False
+            return self._handle_database_update(convert, 6)
+        elif version == 6:
+            # convert from 6 to 7
+            self.logger.info('Converting database to version 7')
+            self.notifier.show_update_scheme_progress()
+            try:
+                cursor = self.conn.cursor()
+                self.logger.info('Creating full text indexes...')
+                self._create_fulltext(cursor)
+                self.notifier.update_update_scheme_progress(99)
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 7')
+                cursor.execute('UPDATE `status` SET `version` = 7')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 7')
+                self.notifier.close_update_scheme_progress()
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.close_update_scheme_progress()
+                self.notifier.show_database_error(err)
+                return False
+            return self._handle_database_update(convert, 7)
+        elif version == 7:
+            # convert from 7 to 8
+            self.logger.info('Converting database to version 8')
+            self.notifier.show_update_scheme_progress()
+            try:
+                cursor = self.conn.cursor()
+                self.logger.info('Creating indexes of airing and creation dates...')
+                cursor.execute(
+                    'ALTER TABLE `film` ADD KEY `aired` (`aired`), ADD KEY `created` (`dtCreated`)')
+                self.notifier.update_update_scheme_progress(99)
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 8')
+                cursor.execute('UPDATE `status` SET `version` = 8')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 8')
+                self.notifier.close_update_scheme_progress()
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.close_update_scheme_progress()
+                self.notifier.show_database_error(err)
+                return False
+            return self._handle_database_update(convert, 8)
+        elif version == 8:
+            # convert from 8 to 9
+            self.logger.info('Converting database to version 9')
+            self.notifier.show_update_scheme_progress()
+            try:
+                cursor = self.conn.cursor()
+                self._create_directory(cursor)
+                self.notifier.update_update_scheme_progress(10)
+                self.logger.info('Creating directory summaries...')
+                self._fill_directory(cursor)
+                self.notifier.update_update_scheme_progress(99)
+                cursor.execute(
+                    'ALTER TABLE `status` CHANGE COLUMN `version` `version` int(11) NOT NULL DEFAULT 9')
+                cursor.execute('UPDATE `status` SET `version` = 9')
+                self.conn.commit()
+                self.logger.info('Scheme successfully updated to version 9')
+                self.notifier.close_update_scheme_progress()
+            except mysql.connector.Error as err:
+                self.logger.error(
+                    '=== DATABASE SCHEME UPDATE ERROR: {} ===', err)
+                self.exit()
+                self.notifier.close_update_scheme_progress()
+                self.notifier.show_database_error(err)
+                return False
         return True
 
+    def _create_fulltext(self, cursor):
+        # servers without InnoDB full text support keep searching
+        # with LIKE. InnoDB creates one full text index at a time
+        try:
+            cursor.execute('ALTER TABLE `film` ADD FULLTEXT KEY `ft_search` (`search`)')
+            cursor.execute('ALTER TABLE `film` ADD FULLTEXT KEY `ft_description` (`description`)')
+            cursor.execute('ALTER TABLE `show` ADD FULLTEXT KEY `ft_search` (`search`)')
+            return True
+        except mysql.connector.Error as err:
+            self.logger.warn('Full text search not supported by the server: {}', err)
+            return False
+
+    def _has_fulltext(self):
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT  COUNT( DISTINCT `TABLE_NAME`, `INDEX_NAME` )
+                FROM    information_schema.STATISTICS
+                WHERE   ( `TABLE_SCHEMA` = DATABASE() )
+                        AND
+                        ( `INDEX_TYPE` = 'FULLTEXT' )
+                        AND
+                        ( `INDEX_NAME` IN ( 'ft_search', 'ft_description' ) )
+            """)
+            (count, ) = cursor.fetchone()
+            cursor.close()
+            return count == 3
+        except mysql.connector.Error as err:
+            self.logger.error('Database error: {}, {}', err.errno, err)
+            return False
+
+    def _rekey_search(self, cursor, table, column):
+        # the search keys are computed in batches into a temporary
+        # table which is joined into the target table at once
+        cursor.execute("""
+            CREATE TEMPORARY TABLE `rekey` (
+                `id`        int(11)         NOT NULL,
+                `search`    varchar(128)    NOT NULL,
+                PRIMARY KEY                 (`id`)
+            ) DEFAULT CHARSET=utf8
+        """)
+        reader = self.conn.cursor()
+        lastid = 0
+        while True:
+            reader.execute(
+                'SELECT `id`,`{}` FROM `{}` WHERE ( `id` > %s ) ORDER BY `id` LIMIT 10000'.format(column, table),
+                (lastid, )
+            )
+            rows = [(rowid, mvutils.make_search_string(value)[:128], ) for (rowid, value) in reader.fetchall()]
+            if not rows:
+                break
+            cursor.executemany('INSERT INTO `rekey` ( `id`,`search` ) VALUES ( %s,%s )', rows)
+            lastid = rows[-1][0]
+        reader.close()
+        cursor.execute(
+            'UPDATE `{0}` JOIN `rekey` ON ( rekey.id = `{0}`.`id` ) SET `{0}`.`search` = rekey.search'.format(table))
+        cursor.execute('DROP TEMPORARY TABLE `rekey`')
+        self.conn.commit()
+
     def _handle_database_initialization(self):
         cursor = None
         dbcreated = False
@@ -1019,10 +1730,11 @@ class StoreMySQL(object):
 CREATE TABLE `channel` (
     `id`            int(11)         NOT NULL AUTO_INCREMENT,
     `dtCreated`     timestamp       NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    `touched`       smallint(1)     NOT NULL DEFAULT '1',
+    `touched`       int(11)         NOT NULL DEFAULT '1',
     `channel`       varchar(64)     NOT NULL,
     PRIMARY KEY                     (`id`),
-    KEY             `channel`       (`channel`)
+    KEY             `channel`       (`channel`),
+    KEY             `touched`       (`touched`)
 ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
                 """
             )
@@ -1033,7 +1745,7 @@ CREATE TABLE `film` (
     `id`            int(11)         NOT NULL AUTO_INCREMENT,
     `idhash`        varchar(32)     DEFAULT NULL,
     `dtCreated`     timestamp       NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    `touched`       smallint(1)     NOT NULL DEFAULT '1',
+    `touched`       int(11)         NOT NULL DEFAULT '1',
     `channelid`     int(11)         NOT NULL,
     `showid`        int(11)         NOT NULL,
     `title`         varchar(128)    NOT NULL,
@@ -1052,6 +1764,9 @@ CREATE TABLE `film` (
     KEY             `index_1`       (`showid`,`title`),
     KEY             `index_2`       (`channelid`,`title`),
     KEY             `dupecheck`     (`idhash`),
+    KEY             `touched`       (`touched`),
+    KEY             `aired`         (`aired`),
+    KEY             `created`       (`dtCreated`),
     CONSTRAINT `FK_FilmChannel` FOREIGN KEY (`channelid`) REFERENCES `channel` (`id`) ON DELETE CASCADE ON UPDATE NO ACTION,
     CONSTRAINT `FK_FilmShow` FOREIGN KEY (`showid`) REFERENCES `show` (`id`) ON DELETE CASCADE ON UPDATE NO ACTION
 ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
@@ -1062,7 +1777,7 @@ CREATE TABLE `film` (
 CREATE TABLE `show` (
     `id`            int(11)         NOT NULL AUTO_INCREMENT,
     `dtCreated`     timestamp       NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    `touched`       smallint(1)     NOT NULL DEFAULT '1',
+    `touched`       int(11)         NOT NULL DEFAULT '1',
     `channelid`     int(11)         NOT NULL,
     `show`          varchar(128)    NOT NULL,
     `search`        varchar(128)    NOT NULL,
@@ -1071,6 +1786,7 @@ CREATE TABLE `show` (
     KEY             `search`        (`search`),
     KEY             `combined_1`    (`channelid`,`search`),
     KEY             `combined_2`    (`channelid`,`show`),
+    KEY             `touched`       (`touched`),
     CONSTRAINT `FK_ShowChannel` FOREIGN KEY (`channelid`) REFERENCES `channel` (`id`) ON DELETE CASCADE ON UPDATE NO ACTION
 ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
             """)
@@ -1092,25 +1808,213 @@ CREATE TABLE `status` (
     `tot_chn`       int(11)         NOT NULL,
     `tot_shw`       int(11)         NOT NULL,
     `tot_mov`       int(11)         NOT NULL,
-    `version`       int(11)         NOT NULL DEFAULT 2
+    `version`       int(11)         NOT NULL DEFAULT 9
 ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
             """)
             self.conn.commit()
 
             cursor.execute(
-                'INSERT INTO `status` VALUES (0,"IDLE",0,0,0,0,0,0,0,0,0,0,0,0,2);')
+                'INSERT INTO `status` VALUES (0,"IDLE",0,0,0,0,0,0,0,0,0,0,0,0,9);')
             self.conn.commit()
 
+            self._create_history(cursor)
+            self.conn.commit()
+
+            self._create_directory(cursor)
+            self.conn.commit()
+
+            self.fulltext = self._create_fulltext(cursor)
+
             cursor.execute('SET FOREIGN_KEY_CHECKS=1')
             self.conn.commit()
 
+            self._create_procedures(cursor)
+
+            cursor.close()
+            self.logger.info('Database creation successfully completed')
+            return True
+        except mysql.connector.Error as err:
+            self.logger.error('=== DATABASE CREATION ERROR: {} ===', err)
+            self.notifier.show_database_error(err)
+            try:
+                if dbcreated:
+                    cursor.execute('DROP DATABASE `{}`'.format(
+                        self.settings.database))
+                    self.conn.commit()
+                if cursor is not None:
+                    cursor.close()
+                    del cursor
+                if self.conn is not None:
+                    self.conn.close()
+                    self.conn = None
+            except mysql.connector.Error as err:
+                # should never happen
+                self.conn = None
+        return False
+
+    @staticmethod
+    def _create_history(cursor):
+        cursor.execute("""
+CREATE TABLE IF NOT EXISTS `history` (
+    `id`            int(11)         NOT NULL AUTO_INCREMENT,
+    `started`       int(11)         NOT NULL,
+    `fullupdate`    int(1)          NOT NULL,
+    `status`        varchar(32)     NOT NULL,
+    `duration`      double          NOT NULL DEFAULT 0,
+    `bytes`         bigint(20)      NOT NULL DEFAULT 0,
+    `records`       int(11)         NOT NULL DEFAULT 0,
+    `rate`          int(11)         NOT NULL DEFAULT 0,
+    `statements`    int(11)         NOT NULL DEFAULT 0,
+    `tm_head`       double          NOT NULL DEFAULT 0,
+    `tm_download`   double          NOT NULL DEFAULT 0,
+    `tm_decompress` double          NOT NULL DEFAULT 0,
+    `tm_cache`      double          NOT NULL DEFAULT 0,
+    `tm_parse`      double          NOT NULL DEFAULT 0,
+    `tm_insert`     double          NOT NULL DEFAULT 0,
+    `tm_finalize`   double          NOT NULL DEFAULT 0,
+    `tm_import`     double          NOT NULL DEFAULT 0,
+    PRIMARY KEY                     (`id`)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
+        """)
+
+    @staticmethod
+    def _create_directory(cursor):
+        cursor.execute("""
+CREATE TABLE IF NOT EXISTS `dir_initial` (
+    `channelid`     int(11)         NOT NULL,
+    `initial`       varchar(1)      NOT NULL,
+    `count`         int(11)         NOT NULL,
+    PRIMARY KEY                     (`channelid`,`initial`)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
+        """)
+        cursor.execute("""
+CREATE TABLE IF NOT EXISTS `dir_showgroup` (
+    `show`          varchar(128)    NOT NULL,
+    `initial`       varchar(1)      NOT NULL,
+    `showids`       text            NOT NULL,
+    `channelids`    text            NOT NULL,
+    `channels`      text,
+    PRIMARY KEY                     (`show`),
+    KEY             `initial`       (`initial`)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
+        """)
+        cursor.execute("""
+CREATE TABLE IF NOT EXISTS `dir_recent` (
+    `mode`          int(1)          NOT NULL,
+    `start`         int(11)         NOT NULL,
+    `channelid`     int(11)         NOT NULL,
+    `count`         int(11)         NOT NULL,
+    PRIMARY KEY                     (`mode`,`start`,`channelid`)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC DEFAULT CHARSET=utf8;
+        """)
+
+    @staticmethod
+    def _fill_directory(cursor):
+        # summaries of the browsing directories. The initials of
+        # all channels are stored as channel 0. Recent films are
+        # counted per hour of their airing (mode 0) or creation
+        # date (mode 1)
+        cursor.execute('SET SESSION group_concat_max_len = 65535')
+        cursor.execute('DELETE FROM `dir_initial`')
+        cursor.execute("""
+            INSERT INTO `dir_initial` ( `channelid`,`initial`,`count` )
+            SELECT      `channelid`,LEFT( `search`,1 ),COUNT(*)
+            FROM        `show`
+            GROUP BY    `channelid`,LEFT( `search`,1 )
+        """)
+        cursor.execute("""
+            INSERT INTO `dir_initial` ( `channelid`,`initial`,`count` )
+            SELECT      0,LEFT( `search`,1 ),COUNT(*)
+            FROM        `show`
+            GROUP BY    LEFT( `search`,1 )
+        """)
+        cursor.execute('DELETE FROM `dir_showgroup`')
+        cursor.execute("""
+            INSERT INTO `dir_showgroup` ( `show`,`initial`,`showids`,`channelids`,`channels` )
+            SELECT      show.show,
+                        LEFT( MIN( show.search ),1 ),
+                        GROUP_CONCAT( show.id ),
+                        GROUP_CONCAT( show.channelid ),
+                        GROUP_CONCAT( channel.channel )
+            FROM        `show`
+            LEFT JOIN   `channel`
+                ON      ( channel.id = show.channelid )
+            GROUP BY    show.show
+        """)
+        cursor.execute('DELETE FROM `dir_recent`')
+        start = int(time.time()) // RECENT_RESOLUTION * RECENT_RESOLUTION - RECENT_MAXAGE
+        for (mode, column) in [(0, 'aired'), (1, 'dtCreated')]:
             cursor.execute("""
+                INSERT INTO `dir_recent` ( `mode`,`start`,`channelid`,`count` )
+                SELECT      {0},UNIX_TIMESTAMP( `{1}` ) DIV {2} * {2},`channelid`,COUNT(*)
+                FROM        `film`
+                WHERE       ( `{1}` >= FROM_UNIXTIME( %s ) )
+                GROUP BY    UNIX_TIMESTAMP( `{1}` ) DIV {2} * {2},`channelid`
+            """.format(mode, column, RECENT_RESOLUTION), (start, ))
+
+    @staticmethod
+    def _update_directory(cursor, showid, filmid):
+        # extends the summaries by the shows and films with ids above
+        # the given ids. Show groups containing new shows are rebuilt
+        cursor.execute('SET SESSION group_concat_max_len = 65535')
+        cursor.execute("""
+            INSERT INTO `dir_initial` ( `channelid`,`initial`,`count` )
+            SELECT      `channelid`,LEFT( `search`,1 ),COUNT(*)
+            FROM        `show`
+            WHERE       ( `id` > %s )
+            GROUP BY    `channelid`,LEFT( `search`,1 )
+            ON DUPLICATE KEY UPDATE `count`=`count`+VALUES( `count` )
+        """, (showid, ))
+        cursor.execute("""
+            INSERT INTO `dir_initial` ( `channelid`,`initial`,`count` )
+            SELECT      0,LEFT( `search`,1 ),COUNT(*)
+            FROM        `show`
+            WHERE       ( `id` > %s )
+            GROUP BY    LEFT( `search`,1 )
+            ON DUPLICATE KEY UPDATE `count`=`count`+VALUES( `count` )
+        """, (showid, ))
+        cursor.execute("""
+            REPLACE INTO `dir_showgroup` ( `show`,`initial`,`showids`,`channelids`,`channels` )
+            SELECT      show.show,
+                        LEFT( MIN( show.search ),1 ),
+                        GROUP_CONCAT( show.id ),
+                        GROUP_CONCAT( show.channelid ),
+                        GROUP_CONCAT( channel.channel )
+            FROM        `show`
+            LEFT JOIN   `channel`
+                ON      ( channel.id = show.channelid )
+            WHERE       show.show IN ( SELECT `show` FROM `show` WHERE ( `id` > %s ) )
+            GROUP BY    show.show
+        """, (showid, ))
+        start = int(time.time()) // RECENT_RESOLUTION * RECENT_RESOLUTION - RECENT_MAXAGE
+        cursor.execute('DELETE FROM `dir_recent` WHERE ( `start` < %s )', (start, ))
+        for (mode, column) in [(0, 'aired'), (1, 'dtCreated')]:
+            cursor.execute("""
+                INSERT INTO `dir_recent` ( `mode`,`start`,`channelid`,`count` )
+                SELECT      {0},UNIX_TIMESTAMP( `{1}` ) DIV {2} * {2},`channelid`,COUNT(*)
+                FROM        `film`
+                WHERE       ( `id` > %s )
+                            AND
+                            ( `{1}` >= FROM_UNIXTIME( %s ) )
+                GROUP BY    UNIX_TIMESTAMP( `{1}` ) DIV {2} * {2},`channelid`
+                ON DUPLICATE KEY UPDATE `count`=`count`+VALUES( `count` )
+            """.format(mode, column, RECENT_RESOLUTION), (filmid, start, ))
+
+    def _recreate_procedures(self, cursor):
+        for procedure in ['ftInsertChannel', 'ftInsertShow', 'ftUpdateEnd', 'ftUpdateStart']:
+            cursor.execute('DROP PROCEDURE IF EXISTS `{}`'.format(procedure))
+        self.conn.commit()
+        self._create_procedures(cursor)
+
+    def _create_procedures(self, cursor):
+        cursor.execute("""
 CREATE PROCEDURE `ftInsertChannel`(
-    _channel    VARCHAR(255)
+    _channel    VARCHAR(255),
+    _generation INT(11)
 )
 BEGIN
     DECLARE channelid_  INT(11);
-    DECLARE touched_    INT(1);
+    DECLARE touched_    INT(11);
     DECLARE added_      INT(1) DEFAULT 0;
 
     SELECT  `id`,
@@ -1122,111 +2026,37 @@ BEGIN
 
     IF ( channelid_ IS NULL ) THEN
         INSERT INTO `channel` (
+            `touched`,
             `channel`
         )
         VALUES (
+            _generation,
             _channel
         );
         SET channelid_  = LAST_INSERT_ID();
         SET added_ = 1;
-    ELSE
+    ELSEIF ( touched_ < _generation ) THEN
         UPDATE  `channel`
-        SET     `touched` = 1
+        SET     `touched` = _generation
         WHERE   ( `id` = channelid_ );
     END IF;
 
     SELECT  channelid_  AS `id`,
             added_      AS `added`;
 END
-            """)
-            self.conn.commit()
-
-            cursor.execute("""
-CREATE PROCEDURE `ftInsertFilm`(
-    _channelid      INT(11),
-    _showid         INT(11),
-    _title          VARCHAR(255),
-    _search         VARCHAR(255),
-    _aired          TIMESTAMP,
-    _duration       TIME,
-    _size           INT(11),
-    _description    LONGTEXT,
-    _website        VARCHAR(384),
-    _url_sub        VARCHAR(384),
-    _url_video      VARCHAR(384),
-    _url_video_sd   VARCHAR(384),
-    _url_video_hd   VARCHAR(384),
-    _airedepoch     INT(11)
-)
-BEGIN
-    DECLARE     id_         INT;
-    DECLARE     added_      INT DEFAULT 0;
-    DECLARE     idhash_     VARCHAR(32);
-
-    SET idhash_ = MD5( CONCAT( _channelid, ':', _showid, ':', _url_video ) );
-
-    SELECT      `id`
-    INTO        id_
-    FROM        `film` AS f
-    WHERE       ( f.idhash = idhash_ );
-
-    IF ( id_ IS NULL ) THEN
-        INSERT INTO `film` (
-            `idhash`,
-            `channelid`,
-            `showid`,
-            `title`,
-            `search`,
-            `aired`,
-            `duration`,
-            `size`,
-            `description`,
-            `website`,
-            `url_sub`,
-            `url_video`,
-            `url_video_sd`,
-            `url_video_hd`,
-            `airedepoch`
-        )
-        VALUES (
-            idhash_,
-            _channelid,
-            _showid,
-            _title,
-            _search,
-            IF(_aired = "1980-01-01 00:00:00", NULL, _aired),
-            IF(_duration = "00:00:00", NULL, _duration),
-            _size,
-            _description,
-            _website,
-            _url_sub,
-            _url_video,
-            _url_video_sd,
-            _url_video_hd,
-            _airedepoch
-        );
-        SET id_         = LAST_INSERT_ID();
-        SET added_      = 1;
-    ELSE
-        UPDATE  `film`
-        SET     `touched` = 1
-        WHERE   ( `id` = id_ );
-    END IF;
-    SELECT  id_         AS `id`,
-            added_      AS `added`;
-END
-            """)
-            self.conn.commit()
+        """)
+        self.conn.commit()
 
-            cursor.execute("""
+        cursor.execute("""
 CREATE PROCEDURE `ftInsertShow`(
     _channelid  INT(11),
     _show       VARCHAR(255),
-    _search     VARCHAR(255)
+    _search     VARCHAR(255),
+    _generation INT(11)
 )
 BEGIN
     DECLARE showid_     INT(11);
-    DECLARE touched_    INT(1);
+    DECLARE touched_    INT(11);
     DECLARE added_      INT(1) DEFAULT 0;
 
     SELECT  `id`,
@@ -1240,20 +2070,22 @@ BEGIN
 
     IF ( showid_ IS NULL ) THEN
         INSERT INTO `show` (
+            `touched`,
             `channelid`,
             `show`,
             `search`
         )
         VALUES (
+            _generation,
             _channelid,
             _show,
             _search
         );
         SET showid_ = LAST_INSERT_ID();
         SET added_ = 1;
-    ELSE
+    ELSEIF ( touched_ < _generation ) THEN
         UPDATE  `show`
-        SET     `touched` = 1
+        SET     `touched` = _generation
         WHERE   ( `id` = showid_ );
     END IF;
 
@@ -1261,61 +2093,51 @@ BEGIN
     SELECT  showid_     AS `id`,
             added_      AS `added`;
 END
-            """)
-            self.conn.commit()
+        """)
+        self.conn.commit()
 
-            cursor.execute("""
+        cursor.execute("""
 CREATE PROCEDURE `ftUpdateEnd`(
-    _full   INT(1)
+    _full       INT(1),
+    _generation INT(11)
 )
 BEGIN
     DECLARE     del_chn_        INT DEFAULT 0;
     DECLARE     del_shw_        INT DEFAULT 0;
     DECLARE     del_mov_        INT DEFAULT 0;
-    DECLARE     cnt_chn_        INT DEFAULT 0;
-    DECLARE     cnt_shw_        INT DEFAULT 0;
-    DECLARE     cnt_mov_        INT DEFAULT 0;
 
     IF ( _full = 1 ) THEN
-        SELECT      COUNT(*)
-        INTO        del_chn_
-        FROM        `channel`
-        WHERE       ( `touched` = 0 );
+        DELETE FROM `film`
+        WHERE       ( `touched` < _generation );
+        SET del_mov_ = ROW_COUNT();
 
-        SELECT      COUNT(*)
-        INTO        del_shw_
+        DELETE      `show`
         FROM        `show`
-        WHERE       ( `touched` = 0 );
-
-        SELECT      COUNT(*)
-        INTO        del_mov_
-        FROM        `film`
-        WHERE       ( `touched` = 0 );
-
-        DELETE FROM `show`
-        WHERE       ( `show`.`touched` = 0 )
+        LEFT JOIN   `film`
+        ON          ( `film`.`showid` = `show`.`id` )
+        WHERE       ( `show`.`touched` < _generation )
                     AND
-                    ( ( SELECT SUM( `film`.`touched` ) FROM `film` WHERE `film`.`showid` = `show`.`id` ) = 0 );
+                    ( `film`.`id` IS NULL );
+        SET del_shw_ = ROW_COUNT();
 
-        DELETE FROM `film`
-        WHERE       ( `touched` = 0 );
-    ELSE
-        SET del_chn_ = 0;
-        SET del_shw_ = 0;
-        SET del_mov_ = 0;
+        DELETE      `channel`
+        FROM        `channel`
+        LEFT JOIN   `show`
+        ON          ( `show`.`channelid` = `channel`.`id` )
+        WHERE       ( `channel`.`touched` < _generation )
+                    AND
+                    ( `show`.`id` IS NULL );
+        SET del_chn_ = ROW_COUNT();
     END IF;
 
     SELECT  del_chn_    AS  `del_chn`,
             del_shw_    AS  `del_shw`,
-            del_mov_    AS  `del_mov`,
-            cnt_chn_    AS  `cnt_chn`,
-            cnt_shw_    AS  `cnt_shw`,
-            cnt_mov_    AS  `cnt_mov`;
+            del_mov_    AS  `del_mov`;
 END
-            """)
-            self.conn.commit()
+        """)
+        self.conn.commit()
 
-            cursor.execute("""
+        cursor.execute("""
 CREATE PROCEDURE `ftUpdateStart`(
     _full   INT(1)
 )
@@ -1323,16 +2145,19 @@ BEGIN
     DECLARE     cnt_chn_        INT DEFAULT 0;
     DECLARE     cnt_shw_        INT DEFAULT 0;
     DECLARE     cnt_mov_        INT DEFAULT 0;
+    DECLARE     generation_     INT DEFAULT 0;
 
-    IF ( _full = 1 ) THEN
-        UPDATE  `channel`
-        SET     `touched` = 0;
-
-        UPDATE  `show`
-        SET     `touched` = 0;
+    SELECT  GREATEST(
+                IFNULL( ( SELECT MAX( `touched` ) FROM `channel` ), 0 ),
+                IFNULL( ( SELECT MAX( `touched` ) FROM `show` ), 0 ),
+                IFNULL( ( SELECT MAX( `touched` ) FROM `film` ), 0 )
+            )
+    INTO    generation_;
 
-        UPDATE  `film`
-        SET     `touched` = 0;
+    IF ( _full = 1 ) THEN
+        SET generation_ = generation_ + 1;
+    ELSEIF ( generation_ = 0 ) THEN
+        SET generation_ = 1;
     END IF;
 
     SELECT  COUNT(*)
@@ -1347,31 +2172,10 @@ BEGIN
     INTO    cnt_mov_
     FROM    `film`;
 
-    SELECT  cnt_chn_    AS `cnt_chn`,
-            cnt_shw_    AS `cnt_shw`,
-            cnt_mov_    AS `cnt_mov`;
+    SELECT  cnt_chn_        AS `cnt_chn`,
+            cnt_shw_        AS `cnt_shw`,
+            cnt_mov_        AS `cnt_mov`,
+            generation_     AS `generation`;
 END
-            """)
-            self.conn.commit()
-
-            cursor.close()
-            self.logger.info('Database creation successfully completed')
-            return True
-        except mysql.connector.Error as err:
-            self.logger.error('=== DATABASE CREATION ERROR: {} ===', err)
-            self.notifier.show_database_error(err)
-            try:
-                if dbcreated:
-                    cursor.execute('DROP DATABASE `{}`'.format(
-                        self.settings.database))
-                    self.conn.commit()
-                if cursor is not None:
-                    cursor.close()
-                    del cursor
-                if self.conn is not None:
-                    self.conn.close()
-                    self.conn = None
-            except mysql.connector.Error as err:
-                # should never happen
-                self.conn = None
-        return False
+        """)
+        self.conn.commit()
@@ -8,10 +8,12 @@ Licensed under MIT License
 # pylint: disable=too-many-lines,line-too-long
 
 import os
+import re
 import json
 import time
 import sqlite3
 import hashlib
+import binascii
 
 from contextlib import closing
 
@@ -19,11 +21,49 @@ import resources.lib.mvutils as mvutils
 
 from resources.lib.film import Film
 from resources.lib.exceptions import DatabaseCorrupted
+from resources.lib.updatestats import PHASES
 
 # -- Constants ----------------------------------------------
 # DATABASE_URL = 'https://mvupdate.yeasoft.com/filmliste-v2.db.xz'
 DATABASE_URL = 'https://liste.mediathekview.de/filmliste-v2.db.xz'
 DATABASE_AKT = 'filmliste-v2.db.update'
+DATABASE_TMP = 'filmliste-v2.db.shadow'
+# version of the local database scheme
+SCHEMA_VERSION = 7
+# full text index modules in order of preference. The index
+# is contentless, its rowid is the id of the indexed film.
+# Names and descriptions are indexed by their search keys
+FTS_MODULES = [
+    ('fts5', "`name`, `description`, content='', tokenize='unicode61'"),
+    ('fts4', '`name`, `description`, content="", tokenize=unicode61'),
+    ('fts4', '`name`, `description`, content=""'),
+]
+# searchable tokens of a search key
+FTS_TOKEN = re.compile('[A-Z0-9]+')
+# shorter terms are not found by the trigram index
+TRIGRAM_MIN_LENGTH = 3
+# relevance ranking of search results: bm25 weights of the
+# indexed columns and the score a film gains per year it is
+# newer than another
+RANK_NAME_WEIGHT = 4.0
+RANK_DESCRIPTION_WEIGHT = 1.0
+RANK_TITLE_WEIGHT = 2.0
+RANK_SHOW_WEIGHT = 1.0
+RANK_YEAR_BONUS = 0.5
+RANK_YEAR = 31536000
+# the lower time bounds of the recent conditions are rounded
+# down to full hours, so that cached results stay valid
+TIMESTAMP_RESOLUTION = 3600
+# the upper time bound of the no future condition is rounded
+# up to full minutes, so that no aired film is hidden
+NOFUTURE_RESOLUTION = 60
+# longest interval of recent films selectable in the settings
+RECENT_MAXAGE = 2592000
+# number of update cycles kept in the history
+HISTORY_SIZE = 50
+# number of films a differential update looks up per query.
+# Stays below the host parameter limit of older SQLite versions
+LOOKUP_CHUNK_SIZE = 500
 
 
 class StoreSQLite(object):
@@ -46,18 +86,90 @@ class StoreSQLite(object):
         self.conn = None
         self.dbfile = os.path.join(self.settings.datapath, 'filmliste-v2.db')
         # useful query fragments
-        self.sql_query_films = "SELECT film.id,title,show,channel,description,duration,size,datetime(aired, 'unixepoch', 'localtime'),url_sub,url_video,url_video_sd,url_video_hd FROM film LEFT JOIN show ON show.id=film.showid LEFT JOIN channel ON channel.id=film.channelid"
-        self.sql_cond_recent = "( ( UNIX_TIMESTAMP() - {} ) <= {} )".format(
-            "aired" if settings.recentmode == 0 else "film.dtCreated",
-            settings.maxage
+        self.sql_select_films = "SELECT film.id,title,show,channel,description,duration,size,datetime(aired, 'unixepoch', 'localtime'),url_sub,url_video,url_video_sd,url_video_hd"
+        self.sql_from_films = " FROM film LEFT JOIN show ON show.id=film.showid LEFT JOIN channel ON channel.id=film.channelid"
+        self.sql_query_films = self.sql_select_films + self.sql_from_films
+        # time conditions are index backed ranges on bound timestamps
+        self.sql_cond_recent = "( {} >= ? )".format(
+            "film.aired" if settings.recentmode == 0 else "film.dtCreated"
         )
-        self.sql_cond_nofuture = " AND ( ( aired IS NULL ) OR ( ( UNIX_TIMESTAMP() - aired ) > 0 ) )" if settings.nofuture else ""
+        self.sql_cond_nofuture = " AND ( ( film.aired IS NULL ) OR ( film.aired < ? ) )" if settings.nofuture else ""
         self.sql_cond_minlength = " AND ( ( duration IS NULL ) OR ( duration >= %d ) )" % settings.minlength if settings.minlength > 0 else ""
+        self.sql_insert_film = """
+            INSERT INTO `film` (
+                `id`,
+                `idhash`,
+                `dtCreated`,
+                `touched`,
+                `channelid`,
+                `showid`,
+                `title`,
+                `search`,
+                `aired`,
+                `duration`,
+                `size`,
+                `description`,
+                `website`,
+                `url_sub`,
+                `url_video`,
+                `url_video_sd`,
+                `url_video_hd`
+            )
+            VALUES (
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?
+            )
+        """
+        self.sql_insert_show = """
+            INSERT INTO `show` (
+                `id`,
+                `dtCreated`,
+                `touched`,
+                `channelid`,
+                `show`,
+                `search`
+            )
+            VALUES (
+                ?,
+                ?,
+                ?,
+                ?,
+                ?,
+                ?
+            )
+        """
         # update helper
-        self.ft_channel = None
-        self.ft_channelid = None
-        self.ft_show = None
-        self.ft_showid = None
+        self.ft_conn = None
+        self.ft_shadow = None
+        self.ft_generation = None
+        self.ft_base = None
+        self.ft_counts = None
+        self.ft_kept = None
+        self.ft_dirbase = None
+        self.ft_channels = None
+        self.ft_shows = None
+        self.ft_films = None
+        self.ft_lookup = False
+        self.ft_statements = 0
+        # module of the full text index and availability
+        # of the substring search index
+        self.fts = None
+        self.trigram = False
 
     def init(self, reset=False, convert=False, failedCount = 0):
         """
@@ -95,14 +207,14 @@ class StoreSQLite(object):
             self.exit()
             mvutils.file_remove(self.dbfile)
             if self._handle_update_substitution():
-                self.conn = sqlite3.connect(self.dbfile, timeout=60)
+                self.conn = self._connect(self.dbfile)
             else:
-                self.conn = sqlite3.connect(self.dbfile, timeout=60)
+                self.conn = self._connect(self.dbfile)
                 self._handle_database_initialization()
         else:
             self._handle_update_substitution()
             try:
-                self.conn = sqlite3.connect(self.dbfile, timeout=60)
+                self.conn = self._connect(self.dbfile)
             except sqlite3.DatabaseError as err:
                 self.logger.error(
                     'Error while opening database: {}. trying to fully reset the Database...', err)
@@ -115,6 +227,13 @@ class StoreSQLite(object):
             cursor.execute('SELECT * FROM `status` LIMIT 1')
             cursor.fetchall()
             cursor.close()
+            # the native update delivers databases with older schemes
+            if not self._handle_database_update(convert):
+                return False
+            if convert:
+                self._handle_trigram_index()
+            self.fts = self._get_module(self.conn, 'film_fts')
+            self.trigram = self._has_table(self.conn, 'film_trigram')
         except sqlite3.DatabaseError as err:
             failedCount += 1
             if (failedCount > 3):
@@ -124,8 +243,6 @@ class StoreSQLite(object):
             return self.init(reset=True, convert=convert, failedCount=failedCount)
         # that is a bit dangerous :-) but faaaast
         self.conn.execute('pragma synchronous=off')
-        self.conn.create_function('UNIX_TIMESTAMP', 0, get_unix_timestamp)
-        self.conn.create_aggregate('GROUP_CONCAT', 1, GroupConcatClass)
         return True
 
     def exit(self):
@@ -134,7 +251,7 @@ class StoreSQLite(object):
             self.conn.close()
             self.conn = None
 
-    def search(self, search, filmui, extendedsearch=False):
+    def search(self, search, filmui, extendedsearch=False, page=None):
         """
         Performs a search for films based on a search term
         and adds the results to the current UI directory
@@ -148,14 +265,77 @@ class StoreSQLite(object):
             extendedsearch(bool, optional): if `True` the search is
                 performed also on film descriptions. Default is
                 `False`
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
+        searchkey = mvutils.make_search_string(search)
+        tokens = FTS_TOKEN.findall(searchkey)
+        # results are ranked by relevance and age. Without
+        # a relevance score the newest films come first
+        recency = 'IFNULL( film.aired, 0 ) / {}'.format(RANK_YEAR / RANK_YEAR_BONUS)
+        if self.trigram and self.settings.substringsearch and len(searchkey) >= TRIGRAM_MIN_LENGTH:
+            # titles and shows containing the term are found by the
+            # trigrams of their search keys
+            if extendedsearch is not True:
+                return self._search_condition(
+                    '( hits.id = film.id )',
+                    ('"{}"'.format(searchkey), ),
+                    filmui,
+                    True,
+                    True,
+                    self.settings.maxresults,
+                    join='INNER JOIN ( SELECT `rowid` AS `id`, bm25( `film_trigram`, {}, {} ) AS `score` FROM `film_trigram` WHERE `film_trigram` MATCH ? ) AS `hits`'.format(RANK_TITLE_WEIGHT, RANK_SHOW_WEIGHT),
+                    sortkey='hits.score - ' + recency,
+                    descending=False,
+                    page=page
+                )
+            searchcond = 'film.id IN ( SELECT `rowid` FROM `film_trigram` WHERE `film_trigram` MATCH ? )'
+            searchparm = ('"{}"'.format(searchkey), )
+            if self.fts and tokens:
+                searchcond += ' OR film.id IN ( SELECT `rowid` FROM `film_fts` WHERE `film_fts` MATCH ? )'
+                searchparm += (' '.join('description:{}*'.format(token.lower()) for token in tokens), )
+            else:
+                searchcond += ' OR ( description LIKE ? )'
+                searchparm += ('%' + search.decode('utf-8') + '%', )
+            return self._search_condition('( ' + searchcond + ' )', searchparm, filmui, True, True, self.settings.maxresults, page=page)
+        # every word of the term has to start a word of the title
+        # or show name, or of the description in extended search
+        if self.fts and tokens:
+            query = ' '.join(('{}*' if extendedsearch is True else 'name:{}*').format(token.lower()) for token in tokens)
+            if self.fts == 'fts5':
+                return self._search_condition(
+                    '( hits.id = film.id )',
+                    (query, ),
+                    filmui,
+                    True,
+                    True,
+                    self.settings.maxresults,
+                    join='INNER JOIN ( SELECT `rowid` AS `id`, bm25( `film_fts`, {}, {} ) AS `score` FROM `film_fts` WHERE `film_fts` MATCH ? ) AS `hits`'.format(RANK_NAME_WEIGHT, RANK_DESCRIPTION_WEIGHT),
+                    sortkey='hits.score - ' + recency,
+                    descending=False,
+                    page=page
+                )
+            return self._search_condition(
+                '( film.id IN ( SELECT `rowid` FROM `film_fts` WHERE `film_fts` MATCH ? ) )',
+                (query, ),
+                filmui,
+                True,
+                True,
+                self.settings.maxresults,
+                page=page
+            )
         searchmask = '%' + search.decode('utf-8') + '%'
-        searchcond = '( ( title LIKE ? ) OR ( show LIKE ? ) OR ( description LIKE ? ) )' if extendedsearch is True else '( ( title LIKE ? ) OR ( show LIKE ? ) )'
-        searchparm = (searchmask, searchmask, searchmask) if extendedsearch is True else (
-            searchmask, searchmask, )
-        return self._search_condition(searchcond, searchparm, filmui, True, True, self.settings.maxresults)
-
-    def get_recents(self, channelid, filmui):
+        # titles and shows are searched by their search keys.
+        # Terms without searchable characters find nothing
+        searchkey = '%' + (searchkey or search.decode('utf-8')) + '%'
+        searchcond = '( ( film.search LIKE ? ) OR ( show.search LIKE ? ) OR ( description LIKE ? ) )' if extendedsearch is True else '( ( film.search LIKE ? ) OR ( show.search LIKE ? ) )'
+        searchparm = (searchkey, searchkey, searchmask) if extendedsearch is True else (
+            searchkey, searchkey, )
+        return self._search_condition(searchcond, searchparm, filmui, True, True, self.settings.maxresults, page=page)
+
+    def get_recents(self, channelid, filmui, page=None):
         """
         Populates the current UI directory with the recent
         film additions based on the configured interval.
@@ -166,25 +346,29 @@ class StoreSQLite(object):
 
             filmui(FilmUI): an instance of a film model view used
                 for populating the directory
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
         if channelid != '0':
             return self._search_condition(
                 self.sql_cond_recent + ' AND ( film.channelid=? )',
-                (int(channelid), ),
+                (self._get_timestamp() - self.settings.maxage, int(channelid), ),
                 filmui,
                 True,
                 False,
                 self.settings.maxresults,
-                order='film.aired'
+                page=page
             )
         return self._search_condition(
             self.sql_cond_recent,
-            (),
+            (self._get_timestamp() - self.settings.maxage, ),
             filmui,
             True,
             False,
             self.settings.maxresults,
-            order='film.aired'
+            page=page
         )
 
     def get_live_streams(self, filmui):
@@ -215,7 +399,7 @@ class StoreSQLite(object):
             channelui(ChannelUI): an instance of a channel model
                 view used for populating the directory
         """
-        self._search_channels_condition(None, channelui)
+        self._search_channels_condition(None, (), channelui)
 
     def get_recent_channels(self, channelui):
         """
@@ -227,7 +411,36 @@ class StoreSQLite(object):
             channelui(ChannelUI): an instance of a channel model
                 view used for populating the directory
         """
-        self._search_channels_condition(self.sql_cond_recent, channelui)
+        if self.conn is None:
+            return
+        try:
+            # recent films are counted per channel and hour
+            # during the update
+            self.logger.info(
+                'SQLite Query: SELECT channel.id,channel,SUM(count) FROM dir_recent INNER JOIN channel WHERE ( mode={} ) AND ( start>=? ) GROUP BY channel.id',
+                self.settings.recentmode
+            )
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT      channel.id,
+                            channel.channel,
+                            SUM( dir_recent.count )
+                FROM        `dir_recent`
+                INNER JOIN  `channel`
+                    ON      ( channel.id = dir_recent.channelid )
+                WHERE       ( dir_recent.mode = ? )
+                            AND
+                            ( dir_recent.start >= ? )
+                GROUP BY    channel.id
+            """, (self.settings.recentmode, self._get_timestamp() - self.settings.maxage, ))
+            channelui.begin()
+            for (channelui.channelid, channelui.channel, channelui.count) in cursor:
+                channelui.add()
+            channelui.end()
+            cursor.close()
+        except sqlite3.Error as err:
+            self.logger.error('Database error: {}', err)
+            self.notifier.show_database_error(err)
 
     def get_initials(self, channelid, initialui):
         """
@@ -246,26 +459,17 @@ class StoreSQLite(object):
         try:
             channelid = int(channelid)
             cursor = self.conn.cursor()
-            if channelid != 0:
-                self.logger.info(
-                    'SQlite Query: SELECT SUBSTR(search,1,1),COUNT(*) FROM show WHERE ( channelid={} ) GROUP BY LEFT(search,1)',
-                    channelid
-                )
-                cursor.execute("""
-                    SELECT      SUBSTR(search,1,1),COUNT(*)
-                    FROM        show
-                    WHERE       ( channelid=? )
-                    GROUP BY    SUBSTR(search,1,1)
-                """, (channelid, ))
-            else:
-                self.logger.info(
-                    'SQlite Query: SELECT SUBSTR(search,1,1),COUNT(*) FROM show GROUP BY LEFT(search,1)'
-                )
-                cursor.execute("""
-                    SELECT      SUBSTR(search,1,1),COUNT(*)
-                    FROM        show
-                    GROUP BY    SUBSTR(search,1,1)
-                """)
+            # the initials of all channels are stored as channel 0
+            self.logger.info(
+                'SQlite Query: SELECT initial,count FROM dir_initial WHERE ( channelid={} )',
+                channelid
+            )
+            cursor.execute("""
+                SELECT      `initial`,`count`
+                FROM        `dir_initial`
+                WHERE       ( `channelid`=? )
+                ORDER BY    `initial`
+            """, (channelid, ))
             initialui.begin(channelid)
             for (initialui.initial, initialui.count) in cursor:
                 initialui.add()
@@ -317,16 +521,13 @@ class StoreSQLite(object):
             cursor = self.conn.cursor()
             if channelid == 0 and self.settings.groupshows:
                 cursor.execute("""
-                    SELECT      GROUP_CONCAT(show.id),
-                                GROUP_CONCAT(channelid),
-                                show,
-                                GROUP_CONCAT(channel)
-                    FROM        show
-                    LEFT JOIN   channel
-                        ON      ( channel.id = show.channelid )
-                    WHERE       ( show LIKE ? )
-                    GROUP BY    show
-                """, (initial + '%', ))
+                    SELECT      `showids`,
+                                `channelids`,
+                                `show`,
+                                `channels`
+                    FROM        `dir_showgroup`
+                    WHERE       ( `initial`=? )
+                """, (initial, ))
             elif channelid == 0:
                 cursor.execute("""
                     SELECT      show.id,
@@ -336,7 +537,7 @@ class StoreSQLite(object):
                     FROM        show
                     LEFT JOIN   channel
                         ON      ( channel.id = show.channelid )
-                    WHERE       ( show LIKE ? )
+                    WHERE       ( show.search LIKE ? )
                 """, (initial + '%', ))
             elif initial:
                 cursor.execute("""
@@ -350,7 +551,7 @@ class StoreSQLite(object):
                     WHERE       (
                                     ( channelid=? )
                                     AND
-                                    ( show LIKE ? )
+                                    ( show.search LIKE ? )
                                 )
                 """, (channelid, initial + '%', ))
             else:
@@ -377,7 +578,7 @@ class StoreSQLite(object):
             self.logger.error('Database error: {}', err)
             self.notifier.show_database_error(err)
 
-    def get_films(self, showid, filmui):
+    def get_films(self, showid, filmui, page=None):
         """
         Populates the current UI directory with a list
         of films of a specific show.
@@ -387,6 +588,10 @@ class StoreSQLite(object):
 
             filmui(FilmUI): an instance of a film model view
                 used for populating the directory
+
+            page(str, optional): key of the requested page as
+                passed to `FilmUI.add_next_page()`. If `None` the
+                first page is listed
         """
         if self.conn is None:
             return
@@ -398,7 +603,8 @@ class StoreSQLite(object):
                 filmui,
                 False,
                 False,
-                10000
+                self.settings.maxresults,
+                page=page
             )
         # multiple channel ids
         return self._search_condition(
@@ -407,14 +613,16 @@ class StoreSQLite(object):
             filmui,
             False,
             True,
-            10000
+            self.settings.maxresults,
+            page=page
         )
 
-    def _search_channels_condition(self, condition, channelui, caching=True):
+    def _search_channels_condition(self, condition, params, channelui, caching=True):
         if self.conn is None:
             return
         if caching and self.settings.caching:
-            cached_data = self._load_cache('search_channels', condition)
+            cache_condition = '{}:{}'.format(condition, params)
+            cached_data = self._load_cache('search_channels', cache_condition)
             if cached_data is not None:
                 channelui.begin()
                 for channel_data in cached_data:
@@ -433,7 +641,7 @@ class StoreSQLite(object):
             self.logger.info('SQLite Query: {}', query + qtail)
             cached_data = []
             cursor = self.conn.cursor()
-            cursor.execute(query + qtail)
+            cursor.execute(query + qtail, params)
             channelui.begin()
             for (channelui.channelid, channelui.channel, channelui.count) in cursor:
                 channelui.add()
@@ -442,81 +650,112 @@ class StoreSQLite(object):
             channelui.end()
             cursor.close()
             if caching and self.settings.caching:
-                self._save_cache('search_channels', condition, cached_data)
+                self._save_cache('search_channels', cache_condition, cached_data)
         except sqlite3.Error as err:
             self.logger.error('Database error: {}', err)
             self.notifier.show_database_error(err)
 
-    def _search_condition(self, condition, params, filmui, showshows, showchannels, maxresults, limiting=True, caching=True, order=None):
+    def _search_condition(self, condition, params, filmui, showshows, showchannels, maxresults, limiting=True, caching=True, join=None, sortkey=None, descending=True, page=None):
         if self.conn is None:
             return 0
 
         maxresults = int(maxresults)
         if limiting:
             sql_cond_limit = self.sql_cond_nofuture + self.sql_cond_minlength
+            limitparams = (self._get_nofuture_timestamp(), ) if self.sql_cond_nofuture else ()
         else:
             sql_cond_limit = ''
+            limitparams = ()
+
+        # films are listed in the order of the sort key. The
+        # film id breaks ties, so that every film has a unique
+        # position from which the next page can be fetched
+        nullable = sortkey is None
+        if nullable:
+            # the bare column lets the index on film.aired deliver the
+            # order. Films without date have no position in that index
+            # and are fetched by a separate branch
+            sortkey = 'film.aired'
+        sql_order = ' ORDER BY `pagekey`{0}, film.id{0}'.format(' DESC' if descending else '')
+        # the branches are queried in turn until the page is full
+        branches = [(condition, tuple(params), )]
+        if page is not None:
+            values = mvutils.parse_page_key(page, 2)
+            if values is None or values[1] is None:
+                self.logger.warn('Ignoring invalid page key {}', page)
+            elif values[0] is None and nullable:
+                # the page ends within the films without date
+                branches = [(
+                    '( ' + condition + ' ) AND ( film.aired IS NULL ) AND ( film.id {} ? )'.format('<' if descending else '>'),
+                    tuple(params) + (values[1], ),
+                )]
+                if not descending:
+                    branches.append(('( ' + condition + ' ) AND ( film.aired IS NOT NULL )', tuple(params), ))
+            else:
+                branches = [(
+                    '( ' + condition + ' ) AND ' + self._page_condition(sortkey, descending),
+                    tuple(params) + (values[0], values[0], values[1], ),
+                )]
+                if nullable and descending:
+                    branches.append(('( ' + condition + ' ) AND ( film.aired IS NULL )', tuple(params), ))
 
         if caching and self.settings.caching:
-            cache_condition = condition + sql_cond_limit + \
+            cache_condition = (join + ' ' if join is not None else '') + \
+                ' / '.join(branch[0] for branch in branches) + sql_cond_limit + sql_order + \
                 (' LIMIT {}'.format(maxresults + 1)
-                 if maxresults else '') + ':{}'.format(params)
+                 if maxresults else '') + ':{}:{}'.format([branch[1] for branch in branches], limitparams)
             start = time.time()
             cached_data = self._load_cache('search_films', cache_condition)
             self.logger.info('LOAD_CACHE:{}', time.time() - start)
-            if cached_data is not None:
-                results = len(cached_data)
+            if isinstance(cached_data, dict):
+                results = len(cached_data['films'])
                 filmui.begin(showshows, showchannels)
                 start = time.time()
-                for film_data in cached_data:
+                for film_data in cached_data['films']:
                     filmui.set_from_dict(film_data)
                     filmui.add(total_items=results)
+                if cached_data['page'] is not None:
+                    filmui.add_next_page(cached_data['page'])
                 filmui.end()
                 self.logger.info('FILL_KODI_LIST:{}', time.time() - start)
                 return results
 
         try:
-            cached_data = []
-            order = (' ORDER BY ' + order) if order is not None else ''
-            self.logger.info(
-                'SQLite Query: {}',
-                self.sql_query_films +
-                ' WHERE ' +
-                condition +
-                sql_cond_limit +
-                order
-            )
-            start = time.time()
+            cached_data = {'films': [], 'page': None}
+            join = (' ' + join) if join is not None else ''
             cursor = self.conn.cursor()
-            cursor.execute(
-                self.sql_query_films +
-                ' WHERE ' +
-                condition +
-                sql_cond_limit +
-                order +
-                (' LIMIT {}'.format(maxresults + 1) if maxresults else ''),
-                params
-            )
-            self.logger.info('QUERY_TIME:{}', time.time() - start)
+            lastkey = None
+            for (branchcondition, branchparams) in branches:
+                query = self.sql_select_films + ',' + sortkey + ' AS `pagekey`' + \
+                    self.sql_from_films + join + ' WHERE ' + branchcondition + \
+                    sql_cond_limit + sql_order + \
+                    (' LIMIT {}'.format(maxresults + 1 - len(cached_data['films'])) if maxresults else '')
+                self.logger.info('SQLite Query: {}', query)
+                start = time.time()
+                cursor.execute(query, branchparams + limitparams)
+                self.logger.info('QUERY_TIME:{}', time.time() - start)
+                for row in cursor:
+                    if maxresults and len(cached_data['films']) == maxresults:
+                        # there is at least one more film
+                        cached_data['page'] = mvutils.make_page_key(lastkey)
+                        break
+                    (filmui.filmid, filmui.title, filmui.show, filmui.channel, filmui.description, filmui.seconds, filmui.size, filmui.aired, filmui.url_sub, filmui.url_video, filmui.url_video_sd, filmui.url_video_hd) = row[:12]
+                    lastkey = (row[12], row[0], )
+                    # write data to dict anyway because we want the total number of rows to be passed to add function
+                    cached_data['films'].append(filmui.get_as_dict())
+                if cached_data['page'] is not None:
+                    break
+            cursor.close()
             start = time.time()
-            resultCount = 0
-            for (filmui.filmid, filmui.title, filmui.show, filmui.channel, filmui.description, filmui.seconds, filmui.size, filmui.aired, filmui.url_sub, filmui.url_video, filmui.url_video_sd, filmui.url_video_hd) in cursor:
-                resultCount += 1
-                if maxresults and resultCount > maxresults:
-                    break;
-                cached_data.append(filmui.get_as_dict()) #write data to dict anyway because we want the total number of rows to be passed to add function
-            ###
-            results = len(cached_data)
+            results = len(cached_data['films'])
             filmui.begin(showshows, showchannels)
-            for film_data in cached_data:
+            for film_data in cached_data['films']:
                 filmui.set_from_dict(film_data)
                 filmui.add(total_items=results)
-            filmui.end()
-            if maxresults and resultCount > maxresults:
-                self.notifier.show_limit_results(maxresults)        
+            if cached_data['page'] is not None:
+                filmui.add_next_page(cached_data['page'])
             filmui.end()
             self.logger.info('FILL_KODI_LIST:{}', time.time() - start)
-            cursor.close()
             if caching and self.settings.caching:
                 self._save_cache('search_films', cache_condition, cached_data)
             return results
@@ -525,6 +764,26 @@ class StoreSQLite(object):
             self.notifier.show_database_error(err)
             return 0
 
+    @staticmethod
+    def _page_condition(sortkey, descending):
+        # keyset predicate equivalent to ( sortkey, film.id ) < ( ?, ? ).
+        # The range on the sort key can be served by an index if the
+        # sort key is a bare indexed column
+        return '( ( {0} {1}= ? ) AND ( ( {0} {1} ? ) OR ( film.id {1} ? ) ) )'.format(
+            sortkey,
+            '<' if descending else '>'
+        )
+
+    @staticmethod
+    def _get_timestamp():
+        # current time as lower bound of the time conditions
+        return int(time.time()) // TIMESTAMP_RESOLUTION * TIMESTAMP_RESOLUTION
+
+    @staticmethod
+    def _get_nofuture_timestamp():
+        # current time as upper bound of the no future condition
+        return -(-int(time.time()) // NOFUTURE_RESOLUTION) * NOFUTURE_RESOLUTION
+
     def retrieve_film_info(self, filmid):
         """
         Retrieves the spcified film information
@@ -761,6 +1020,77 @@ class StoreSQLite(object):
         cursor.close()
         self.conn.commit()
 
+    def get_history(self, limit=HISTORY_SIZE):
+        """
+        Retrieves the statistics of the most recent update
+        cycles, newest first
+
+        Args:
+            limit(int, optional): maximum number of update
+                cycles returned. Default is 50
+        """
+        if self.conn is None:
+            return []
+        history = []
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'SELECT `started`,`fullupdate`,`status`,`duration`,`bytes`,`records`,`rate`,`statements`,{} FROM `history` ORDER BY `id` DESC LIMIT ?'.format(
+                    ','.join('`tm_{}`'.format(phase) for phase in PHASES)),
+                (limit, )
+            )
+            for row in cursor:
+                history.append({
+                    'started': row[0],
+                    'fullupdate': row[1],
+                    'status': row[2],
+                    'duration': row[3],
+                    'bytes': row[4],
+                    'records': row[5],
+                    'rate': row[6],
+                    'statements': row[7],
+                    'times': dict(zip(PHASES, row[8:]))
+                })
+            cursor.close()
+        except sqlite3.Error as err:
+            self.logger.error('Database error: {}', err)
+        return history
+
+    def add_history(self, stats):
+        """
+        Stores the statistics of an update cycle. Only the
+        most recent update cycles are kept.
+
+        Args:
+            stats(dict): statistics as returned by
+                `UpdateStats.get_as_dict()`
+        """
+        if self.conn is None:
+            return
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO `history` ( `started`,`fullupdate`,`status`,`duration`,`bytes`,`records`,`rate`,`statements`,{} ) VALUES ( {} )'.format(
+                    ','.join('`tm_{}`'.format(phase) for phase in PHASES),
+                    ','.join(['?'] * (8 + len(PHASES)))),
+                (
+                    stats['started'],
+                    stats['fullupdate'],
+                    stats['status'],
+                    stats['duration'],
+                    stats['bytes'],
+                    stats['records'],
+                    stats['rate'],
+                    stats['statements'],
+                ) + tuple(stats['times'][phase] for phase in PHASES)
+            )
+            cursor.execute(
+                'DELETE FROM `history` WHERE ( `id` <= ? )', (cursor.lastrowid - HISTORY_SIZE, ))
+            cursor.close()
+            self.conn.commit()
+        except sqlite3.Error as err:
+            self.logger.error('Database error: {}', err)
+
     @staticmethod
     def supports_update():
         """
@@ -801,7 +1131,8 @@ class StoreSQLite(object):
         """
         if full:
             self.exit()
-            self.init()
+            # the updater opens and converts the substituted database
+            self._handle_update_substitution()
         return full
 
     def ft_init(self):
@@ -828,45 +1159,66 @@ class StoreSQLite(object):
             retval = cursor.rowcount > 0
             self.conn.commit()
             cursor.close()
-            self.ft_channel = None
-            self.ft_channelid = None
-            self.ft_show = None
-            self.ft_showid = None
+            self.ft_conn = self.conn
+            self.ft_shadow = None
+            self.ft_generation = None
+            self.ft_dirbase = None
+            self.ft_channels = None
+            self.ft_shows = None
+            self.ft_films = None
+            self.ft_lookup = False
+            self.ft_statements = 1
             return retval
         except sqlite3.DatabaseError as err:
             self._handle_database_corruption(err)
             raise DatabaseCorrupted(
                 'Database error during critical operation: {} - Database will be rebuilt from scratch.'.format(err))
 
-    def ft_update_start(self, full):
+    def ft_update_start(self, full, resume=None):
         """
-        Begins a local update procedure
+        Begins a local update procedure. Every update works
+        on a generation number which is written into the
+        `touched` column of all records seen by the update.
+        A full update starts a new generation so that all
+        records not seen can be found by their lower number.
+
+        A full update is written into a shadow database that
+        replaces the live database when the update finishes.
+        Records already known keep their id and creation date.
+
+        Returns the number of channels, shows and films and
+        if the interrupted update has been resumed.
 
         Args:
             full(bool): if `True` a full update is started
+
+            resume(int, optional): generation of an interrupted
+                update that should be continued if possible
         """
         try:
             cursor = self.conn.cursor()
+            self.ft_conn = self.conn
+            self.ft_shadow = None
+            self.ft_generation = self._ft_get_generation(cursor, full)
+            self._ft_load_maps(cursor, full)
+            self.ft_base = list(self.ft_counts)
+            resumed = resume is not None and resume == self.ft_generation
+            self.ft_dirbase = None
             if full:
-                cursor.executescript("""
-                    UPDATE  `channel`
-                    SET     `touched` = 0;
-
-                    UPDATE  `show`
-                    SET     `touched` = 0;
-
-                    UPDATE  `film`
-                    SET     `touched` = 0;
-                """)
-            cursor.execute('SELECT COUNT(*) FROM `channel`')
-            result1 = cursor.fetchone()
-            cursor.execute('SELECT COUNT(*) FROM `show`')
-            result2 = cursor.fetchone()
-            cursor.execute('SELECT COUNT(*) FROM `film`')
-            result3 = cursor.fetchone()
+                resumed = self._ft_open_shadow(cursor, resumed)
+            else:
+                # a left over shadow database cannot be resumed anymore
+                mvutils.file_remove(os.path.join(self.settings.datapath, DATABASE_TMP))
+            if not full and not resumed:
+                # a differential update only adds records. The directory
+                # is extended by the records above the current ids
+                self.ft_statements += 1
+                cursor.execute(
+                    'SELECT IFNULL( ( SELECT MAX( `id` ) FROM `show` ), 0 ),IFNULL( ( SELECT MAX( `id` ) FROM `film` ), 0 )')
+                self.ft_dirbase = cursor.fetchone()
             cursor.close()
             self.conn.commit()
-            return (result1[0], result2[0], result3[0], )
+            return tuple(self.ft_base) + (resumed, )
         except sqlite3.DatabaseError as err:
             self._handle_database_corruption(err)
             raise DatabaseCorrupted(
@@ -874,210 +1226,469 @@ class StoreSQLite(object):
 
     def ft_update_end(self, delete):
         """
-        Finishes a local update procedure
+        Finishes a local update procedure. Stale films are
+        deleted by their generation, followed by the shows
+        and channels left without films. The totals are
+        derived from the counters maintained during the
+        update instead of counting the tables again.
+
+        The summaries of the browsing directories are
+        rebuilt after full and resumed updates. After a
+        differential update they are extended by the
+        records it added.
+
+        If the update was written into a shadow database,
+        the shadow database is either finalized and swapped
+        in or discarded.
 
         Args:
             delete(bool): if `True` all records not updated
                 will be deleted
         """
+        if self.ft_shadow is not None:
+            return self._ft_close_shadow(delete)
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                'SELECT COUNT(*) FROM `channel` WHERE ( touched = 0 )')
-            (del_chn, ) = cursor.fetchone()
-            cursor.execute('SELECT COUNT(*) FROM `show` WHERE ( touched = 0 )')
-            (del_shw, ) = cursor.fetchone()
-            cursor.execute('SELECT COUNT(*) FROM `film` WHERE ( touched = 0 )')
-            (del_mov, ) = cursor.fetchone()
+            if self.ft_films is None:
+                self._ft_load_maps(cursor)
+            generation = self.ft_generation
+            del_chn = 0
+            del_shw = 0
+            del_mov = 0
             if delete:
-                cursor.execute(
-                    'DELETE FROM `show` WHERE ( show.touched = 0 ) AND ( ( SELECT SUM( film.touched ) FROM `film` WHERE film.showid = show.id ) = 0 )')
-                cursor.execute('DELETE FROM `film` WHERE ( touched = 0 )')
-            else:
-                del_chn = 0
-                del_shw = 0
-                del_mov = 0
-            cursor.execute('SELECT COUNT(*) FROM `channel`')
-            (cnt_chn, ) = cursor.fetchone()
-            cursor.execute('SELECT COUNT(*) FROM `show`')
-            (cnt_shw, ) = cursor.fetchone()
-            cursor.execute('SELECT COUNT(*) FROM `film`')
-            (cnt_mov, ) = cursor.fetchone()
+                cursor.execute('DELETE FROM `film` WHERE ( touched < ? )', (generation, ))
+                del_mov = cursor.rowcount
+                self.ft_statements += 3
+                cursor.execute("""
+                    DELETE FROM `show`
+                    WHERE       ( show.touched < ? )
+                                AND
+                                NOT EXISTS ( SELECT 1 FROM `film` WHERE film.showid = show.id )
+                """, (generation, ))
+                del_shw = cursor.rowcount
+                cursor.execute("""
+                    DELETE FROM `channel`
+                    WHERE       ( channel.touched < ? )
+                                AND
+                                NOT EXISTS ( SELECT 1 FROM `show` WHERE show.channelid = channel.id )
+                """, (generation, ))
+                del_chn = cursor.rowcount
             cursor.close()
-            self.conn.commit()
-            return (del_chn, del_shw, del_mov, cnt_chn, cnt_shw, cnt_mov, )
+            if self.ft_dirbase is None or delete:
+                self._fill_directory(self.conn)
+            else:
+                self._update_directory(self.conn, *self.ft_dirbase)
+            (cnt_chn, cnt_shw, cnt_mov) = self.ft_counts
+            return (del_chn, del_shw, del_mov, cnt_chn - del_chn, cnt_shw - del_shw, cnt_mov - del_mov, )
         except sqlite3.DatabaseError as err:
             self._handle_database_corruption(err)
             raise DatabaseCorrupted(
                 'Database error during critical operation: {} - Database will be rebuilt from scratch.'.format(err))
 
-    def ft_insert_film(self, film, commit=True):
+    def ft_insert_films(self, films, commit=True):
         """
-        Inserts a film emtry into the database
+        Inserts a batch of film entries into the database.
+        Existing films are resolved from the maps loaded by
+        `ft_update_start()` and new films are inserted with
+        a single `executemany` in the same transaction.
+        A differential update looks up the films of the
+        batch that are not yet known by their idhash.
 
         Args:
-            film(Film): a film entry
+            films(list): a list of `FilmRecord` entries
 
             commit(bool, optional): the operation will be
                 commited immediately. Default is `True`
         """
         try:
-            cursor = self.conn.cursor()
-            newchn = False
+            if self.ft_films is None:
+                self._ft_load_maps(self.conn.cursor())
+            cursor = self.ft_conn.cursor()
             inschn = 0
             insshw = 0
-            insmov = 0
-            channel = film['channel'][:64]
-            show = film['show'][:128]
-            title = film['title'][:128]
-
-            # handle channel
-            if self.ft_channel != channel:
-                # process changed channel
-                newchn = True
-                cursor.execute(
-                    'SELECT `id`,`touched` FROM `channel` WHERE channel.channel=?', (channel, ))
-                result = cursor.fetchall()
-                if result:
-                    # get the channel data
-                    self.ft_channel = channel
-                    self.ft_channelid = result[0][0]
-                    if result[0][1] == 0:
-                        # updated touched
-                        cursor.execute(
-                            'UPDATE `channel` SET `touched`=1 WHERE ( channel.id=? )', (self.ft_channelid, ))
-                else:
-                    # insert the new channel
-                    inschn = 1
-                    cursor.execute('INSERT INTO `channel` ( `dtCreated`,`channel` ) VALUES ( ?,? )', (int(
-                        time.time()), channel))
-                    self.ft_channel = channel
-                    self.ft_channelid = cursor.lastrowid
-
-            # handle show
-            if newchn or self.ft_show != show:
-                # process changed show
-                cursor.execute(
-                    'SELECT `id`,`touched` FROM `show` WHERE ( show.channelid=? ) AND ( show.show=? )', (self.ft_channelid, show))
-                result = cursor.fetchall()
-                if result:
-                    # get the show data
-                    self.ft_show = show
-                    self.ft_showid = result[0][0]
-                    if result[0][1] == 0:
-                        # updated touched
-                        cursor.execute(
-                            'UPDATE `show` SET `touched`=1 WHERE ( show.id=? )', (self.ft_showid, ))
-                else:
-                    # insert the new show
-                    insshw = 1
-                    cursor.execute(
-                        """
-                        INSERT INTO `show` (
-                            `dtCreated`,
-                            `channelid`,
-                            `show`,
-                            `search`
-                        )
-                        VALUES (
-                            ?,
-                            ?,
-                            ?,
-                            ?
-                        )
-                        """, (
-                            int(time.time()),
-                            self.ft_channelid, show,
-                            mvutils.make_search_string(show)
-                        )
-                    )
-                    self.ft_show = show
-                    self.ft_showid = cursor.lastrowid
-
-            # check if the movie is there
-            idhash = hashlib.md5("{}:{}:{}".format(
-                self.ft_channelid, self.ft_showid, film['url_video']).encode('utf8')).hexdigest()
-            cursor.execute("""
-                SELECT      `id`,
-                            `touched`
-                FROM        `film`
-                WHERE       ( film.idhash = ? )
-            """, (idhash, ))
-            result = cursor.fetchall()
-            if result:
-                # film found
-                filmid = result[0][0]
-                if result[0][1] == 0:
-                    # update touched
-                    cursor.execute(
-                        'UPDATE `film` SET `touched`=1 WHERE ( film.id=? )', (filmid, ))
-            else:
-                # insert the new film
-                insmov = 1
-                cursor.execute(
-                    """
-                    INSERT INTO `film` (
-                        `idhash`,
-                        `dtCreated`,
-                        `channelid`,
-                        `showid`,
-                        `title`,
-                        `search`,
-                        `aired`,
-                        `duration`,
-                        `size`,
-                        `description`,
-                        `website`,
-                        `url_sub`,
-                        `url_video`,
-                        `url_video_sd`,
-                        `url_video_hd`
-                    )
-                    VALUES (
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?,
-                        ?
-                    )
-                    """, (
-                        idhash,
-                        int(time.time()),
-                        self.ft_channelid,
-                        self.ft_showid,
-                        title,
-                        mvutils.make_search_string(film['title']),
-                        film['airedepoch'],
-                        mvutils.make_duration(film['duration']),
-                        film['size'],
-                        film['description'],
-                        film['website'],
-                        film['url_sub'],
-                        film['url_video'],
-                        film['url_video_sd'],
-                        film['url_video_hd']
-                    )
-                )
-                filmid = cursor.lastrowid
+            touch = []
+            carry = []
+            insert = []
+            digests = []
+            resolved = []
+            for film in films:
+                (channelid, added) = self._ft_insert_channel(cursor, film.channel[:64])
+                inschn += added
+                (showid, added) = self._ft_insert_show(cursor, channelid, film.show[:128])
+                insshw += added
+                resolved.append((self._ft_film_digest(channelid, showid, film), channelid, showid, film, ))
+            if self.ft_lookup:
+                self._ft_lookup_films(cursor, [digest for (digest, _, _, _) in resolved])
+            for (digest, channelid, showid, film) in resolved:
+                filmid = self.ft_films.get(digest)
+                if filmid is None:
+                    insert.append(self._ft_film_row(None, digest, self.ft_generation, channelid, showid, film))
+                    digests.append(digest)
+                    # duplicates inside the batch are inserted only once
+                    self.ft_films[digest] = 0
+                elif filmid > 0:
+                    if self.ft_shadow is None:
+                        touch.append((self.ft_generation, filmid, ))
+                    else:
+                        carry.append(self._ft_film_row(filmid, digest, self.ft_generation, channelid, showid, film))
+                    self.ft_films[digest] = -filmid
+            # executemany counts as one statement
+            self.ft_statements += (1 if touch else 0) + (1 if carry else 0) + (2 if insert else 0)
+            if touch:
+                cursor.executemany(
+                    'UPDATE `film` SET `touched`=? WHERE ( film.id=? )', touch)
+            if carry:
+                cursor.executemany(self.sql_insert_film, carry)
+                self.ft_counts[2] += len(carry)
+                self.ft_kept[2] += len(carry)
+            if insert:
+                cursor.executemany(self.sql_insert_film, insert)
+                self.ft_counts[2] += len(insert)
+                # AUTOINCREMENT assigns consecutive ids inside the transaction
+                cursor.execute('SELECT last_insert_rowid()')
+                (lastid, ) = cursor.fetchone()
+                for (index, digest) in enumerate(digests, lastid - len(digests) + 1):
+                    self.ft_films[digest] = -index
+                self._ft_index_films(cursor, lastid - len(digests) + 1, lastid)
             if commit:
-                self.conn.commit()
+                self.ft_conn.commit()
             cursor.close()
-            return (filmid, inschn, insshw, insmov)
+            return (inschn, insshw, len(insert), )
         except sqlite3.DatabaseError as err:
+            if self.ft_shadow is not None:
+                # the live database is not affected
+                raise
             self._handle_database_corruption(err)
             raise DatabaseCorrupted(
                 'Database error during critical operation: {} - Database will be rebuilt from scratch.'.format(err))
 
+    def ft_get_generation(self):
+        """ Returns the generation of the running update """
+        return self.ft_generation
+
+    def ft_get_statements(self):
+        """
+        Returns the number of statements issued by the
+        running update. Each `executemany` counts once.
+        """
+        return self.ft_statements
+
+    def _ft_index_films(self, cursor, firstid, lastid):
+        # films inserted into the live database are indexed in the
+        # same transaction. A shadow database is indexed at once
+        # when it is finalized. Deleted films are not removed from
+        # the contentless index. Their ids are never used again.
+        if self.ft_shadow is None and self.fts:
+            self.ft_statements += 1
+            self._fill_index(cursor, 'film_fts', firstid, lastid)
+        if self.ft_shadow is None and self.trigram:
+            self.ft_statements += 1
+            self._fill_index(cursor, 'film_trigram', firstid, lastid)
+
+    def _ft_get_generation(self, cursor, full):
+        self.ft_statements += 1
+        cursor.execute("""
+            SELECT  MAX(
+                        IFNULL( ( SELECT MAX( `touched` ) FROM `channel` ), 0 ),
+                        IFNULL( ( SELECT MAX( `touched` ) FROM `show` ), 0 ),
+                        IFNULL( ( SELECT MAX( `touched` ) FROM `film` ), 0 )
+                    )
+        """)
+        (generation, ) = cursor.fetchone()
+        return generation + 1 if full else max(generation, 1)
+
+    def _ft_load_maps(self, cursor, full=False):
+        # channels and shows map to `( id, touched )`, films map the
+        # binary idhash to their id. The id of a film already touched
+        # in the current generation is stored negated. The rows read
+        # are the base of the counters maintained during the update.
+        # Only a full update needs all films. A differential update
+        # looks up the films of each batch by `_ft_lookup_films()`
+        if self.ft_conn is None:
+            self.ft_conn = self.conn
+        if self.ft_generation is None:
+            self.ft_generation = self._ft_get_generation(cursor, False)
+        generation = self.ft_generation
+        self.ft_statements += 3
+        self.ft_counts = [0, 0, 0]
+        self.ft_channels = {}
+        cursor.execute('SELECT `id`,`channel`,`touched` FROM `channel`')
+        for (channelid, channel, touched) in cursor:
+            self.ft_channels[channel] = (channelid, touched >= generation, )
+            self.ft_counts[0] += 1
+        self.ft_shows = {}
+        cursor.execute('SELECT `id`,`channelid`,`show`,`touched` FROM `show`')
+        for (showid, channelid, show, touched) in cursor:
+            self.ft_shows[(channelid, show, )] = (showid, touched >= generation, )
+            self.ft_counts[1] += 1
+        self.ft_films = {}
+        self.ft_lookup = not full
+        if self.ft_lookup:
+            cursor.execute('SELECT COUNT(*) FROM `film`')
+            (self.ft_counts[2], ) = cursor.fetchone()
+            return
+        cursor.execute('SELECT `idhash`,`id`,`touched` FROM `film`')
+        for (idhash, filmid, touched) in cursor:
+            self.ft_films[binascii.unhexlify(idhash)] = -filmid if touched >= generation else filmid
+            self.ft_counts[2] += 1
+
+    def _ft_lookup_films(self, cursor, digests):
+        # films looked up once stay in the map. Films not found
+        # are inserted by the batch and mapped afterwards
+        generation = self.ft_generation
+        missing = list(set(digest for digest in digests if digest not in self.ft_films))
+        for index in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            chunk = missing[index:index + LOOKUP_CHUNK_SIZE]
+            self.ft_statements += 1
+            cursor.execute(
+                'SELECT `idhash`,`id`,`touched` FROM `film` WHERE ( `idhash` IN ( {} ) )'.format(
+                    ','.join(['?'] * len(chunk))
+                ),
+                [binascii.hexlify(digest).decode('ascii') for digest in chunk]
+            )
+            for (idhash, filmid, touched) in cursor.fetchall():
+                self.ft_films[binascii.unhexlify(idhash)] = -filmid if touched >= generation else filmid
+
+    def _ft_open_shadow(self, cursor, resume):
+        shadowfile = os.path.join(self.settings.datapath, DATABASE_TMP)
+        if resume and mvutils.file_exists(shadowfile):
+            try:
+                conn = self._connect(shadowfile)
+                conn.execute('pragma journal_mode=off')
+                conn.execute('pragma synchronous=off')
+                self._ft_load_shadow(conn)
+                self.logger.info('Resuming full update in shadow database {}', shadowfile)
+                self.ft_conn = conn
+                self.ft_shadow = shadowfile
+                return True
+            except sqlite3.DatabaseError as err:
+                self.logger.error(
+                    'Failed to resume shadow database {}: {} - starting over', shadowfile, err)
+                conn.close()
+                # the maps may already contain records of the shadow database
+                self._ft_load_maps(cursor, True)
+        mvutils.file_remove(shadowfile)
+        try:
+            conn = self._connect(shadowfile)
+            conn.execute('pragma journal_mode=off')
+            conn.execute('pragma synchronous=off')
+            self._create_tables(conn)
+            # new records get ids above all ids ever used in the live database
+            for table in ['channel', 'show', 'film']:
+                cursor.execute(
+                    'SELECT MAX( IFNULL( ( SELECT `seq` FROM `sqlite_sequence` WHERE `name` = ? ), 0 ), IFNULL( ( SELECT MAX( `id` ) FROM `{}` ), 0 ) )'.format(table), (table, ))
+                conn.execute(
+                    'INSERT INTO `sqlite_sequence` ( `name`,`seq` ) VALUES ( ?,? )', (table, cursor.fetchone()[0], ))
+            conn.commit()
+        except sqlite3.DatabaseError as err:
+            self.logger.error(
+                'Failed to create shadow database {}: {} - updating in place', shadowfile, err)
+            mvutils.file_remove(shadowfile)
+            return False
+        self.logger.info('Writing full update into shadow database {}', shadowfile)
+        self.ft_conn = conn
+        self.ft_shadow = shadowfile
+        self.ft_counts = [0, 0, 0]
+        self.ft_kept = [0, 0, 0]
+        return False
+
+    def _ft_load_shadow(self, conn):
+        # records already written into the shadow database are
+        # marked as touched in the maps of the live database
+        (counts, kept) = ([0, 0, 0], [0, 0, 0])
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX( `touched` ) FROM `film`')
+        (generation, ) = cursor.fetchone()
+        if generation is not None and generation != self.ft_generation:
+            raise sqlite3.DatabaseError('Shadow database has generation {}'.format(generation))
+        cursor.execute('SELECT `id`,`channel` FROM `channel`')
+        for (channelid, channel) in cursor:
+            kept[0] += 1 if channel in self.ft_channels else 0
+            self.ft_channels[channel] = (channelid, True, )
+            counts[0] += 1
+        cursor.execute('SELECT `id`,`channelid`,`show` FROM `show`')
+        for (showid, channelid, show) in cursor:
+            kept[1] += 1 if (channelid, show, ) in self.ft_shows else 0
+            self.ft_shows[(channelid, show, )] = (showid, True, )
+            counts[1] += 1
+        cursor.execute('SELECT `idhash`,`id` FROM `film`')
+        for (idhash, filmid) in cursor:
+            digest = binascii.unhexlify(idhash)
+            kept[2] += 1 if digest in self.ft_films else 0
+            self.ft_films[digest] = -filmid
+            counts[2] += 1
+        cursor.close()
+        self.ft_counts = counts
+        self.ft_kept = kept
+
+    def _ft_close_shadow(self, swap):
+        conn = self.ft_conn
+        shadowfile = self.ft_shadow
+        self.ft_conn = self.conn
+        self.ft_shadow = None
+        try:
+            if swap:
+                self._ft_finalize_shadow(conn)
+        except sqlite3.DatabaseError:
+            swap = False
+            mvutils.file_remove(shadowfile)
+            raise
+        finally:
+            conn.close()
+            if not swap:
+                # the shadow database is kept for a resumed update
+                self.ft_counts = list(self.ft_base)
+        if not swap:
+            (cnt_chn, cnt_shw, cnt_mov) = self.ft_base
+            return (0, 0, 0, cnt_chn, cnt_shw, cnt_mov, )
+        # replace the live database
+        self.exit()
+        if not mvutils.file_rename(shadowfile, self.dbfile):
+            # probably still opened somewhere. Substitute on next start
+            self.logger.error(
+                'Failed to replace database {} - will be replaced on next start', self.dbfile)
+            mvutils.file_rename(shadowfile, os.path.join(
+                self.settings.datapath, DATABASE_AKT))
+        self.init()
+        self.ft_conn = self.conn
+        (cnt_chn, cnt_shw, cnt_mov) = self.ft_counts
+        return (
+            self.ft_base[0] - self.ft_kept[0],
+            self.ft_base[1] - self.ft_kept[1],
+            self.ft_base[2] - self.ft_kept[2],
+            cnt_chn, cnt_shw, cnt_mov,
+        )
+
+    def _ft_finalize_shadow(self, conn):
+        self.logger.info('Creating indexes of the new database...')
+        self._create_indexes(conn)
+        if self._create_fts(conn):
+            self.logger.info('Creating full text index of the new database...')
+            self._fill_index(conn, 'film_fts')
+        if self.settings.substringsearch and self._create_trigram(conn):
+            self.logger.info('Creating substring search index of the new database...')
+            self._fill_index(conn, 'film_trigram')
+        conn.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+        conn.commit()
+        # keep creation dates and status of the live database
+        conn.execute('ATTACH DATABASE ? AS `live`', (self.dbfile, ))
+        conn.executescript("""
+            UPDATE  `channel`
+            SET     `dtCreated` = ( SELECT l.dtCreated FROM live.channel AS l WHERE l.id = channel.id )
+            WHERE   ( `id` IN ( SELECT `id` FROM live.channel ) );
+
+            UPDATE  `show`
+            SET     `dtCreated` = ( SELECT l.dtCreated FROM live.show AS l WHERE l.id = show.id )
+            WHERE   ( `id` IN ( SELECT `id` FROM live.show ) );
+
+            UPDATE  `film`
+            SET     `dtCreated` = ( SELECT l.dtCreated FROM live.film AS l WHERE l.id = film.id )
+            WHERE   ( `id` IN ( SELECT `id` FROM live.film ) );
+
+            DELETE FROM `status`;
+
+            INSERT INTO `status` SELECT * FROM live.status;
+
+            INSERT INTO `history` SELECT * FROM live.history;
+        """)
+        conn.commit()
+        conn.execute('DETACH DATABASE `live`')
+        self.logger.info('Creating directory summaries of the new database...')
+        self._fill_directory(conn)
+        # verify the result before it goes live
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA quick_check')
+        (result, ) = cursor.fetchone()
+        if result != 'ok':
+            raise sqlite3.DatabaseError('Shadow database check failed: {}'.format(result))
+        cursor.execute('SELECT COUNT(*) FROM `film`')
+        (count, ) = cursor.fetchone()
+        if count != self.ft_counts[2]:
+            raise sqlite3.DatabaseError(
+                'Shadow database contains {} instead of {} films'.format(count, self.ft_counts[2]))
+        cursor.close()
+
+    def _ft_insert_channel(self, cursor, channel):
+        entry = self.ft_channels.get(channel)
+        if entry is not None:
+            if not entry[1]:
+                self.ft_statements += 1
+                if self.ft_shadow is None:
+                    # updated touched
+                    cursor.execute(
+                        'UPDATE `channel` SET `touched`=? WHERE ( channel.id=? )', (self.ft_generation, entry[0], ))
+                else:
+                    # carry over into the shadow database
+                    cursor.execute('INSERT INTO `channel` ( `id`,`dtCreated`,`touched`,`channel` ) VALUES ( ?,?,?,? )', (
+                        entry[0], int(time.time()), self.ft_generation, channel))
+                    self.ft_counts[0] += 1
+                    self.ft_kept[0] += 1
+                self.ft_channels[channel] = (entry[0], True, )
+            return (entry[0], 0, )
+        # insert the new channel
+        self.ft_statements += 1
+        cursor.execute('INSERT INTO `channel` ( `dtCreated`,`touched`,`channel` ) VALUES ( ?,?,? )', (int(
+            time.time()), self.ft_generation, channel))
+        self.ft_channels[channel] = (cursor.lastrowid, True, )
+        self.ft_counts[0] += 1
+        return (cursor.lastrowid, 1, )
+
+    def _ft_insert_show(self, cursor, channelid, show):
+        entry = self.ft_shows.get((channelid, show, ))
+        if entry is not None:
+            if not entry[1]:
+                self.ft_statements += 1
+                if self.ft_shadow is None:
+                    # updated touched
+                    cursor.execute(
+                        'UPDATE `show` SET `touched`=? WHERE ( show.id=? )', (self.ft_generation, entry[0], ))
+                else:
+                    # carry over into the shadow database
+                    cursor.execute(
+                        self.sql_insert_show,
+                        (entry[0], int(time.time()), self.ft_generation, channelid, show, mvutils.make_search_string(show), )
+                    )
+                    self.ft_counts[1] += 1
+                    self.ft_kept[1] += 1
+                self.ft_shows[(channelid, show, )] = (entry[0], True, )
+            return (entry[0], 0, )
+        # insert the new show
+        self.ft_statements += 1
+        cursor.execute(
+            self.sql_insert_show,
+            (None, int(time.time()), self.ft_generation, channelid, show, mvutils.make_search_string(show), )
+        )
+        self.ft_shows[(channelid, show, )] = (cursor.lastrowid, True, )
+        self.ft_counts[1] += 1
+        return (cursor.lastrowid, 1, )
+
+    @staticmethod
+    def _ft_film_digest(channelid, showid, film):
+        return hashlib.md5("{}:{}:{}".format(
+            channelid, showid, film.url_video).encode('utf8')).digest()
+
+    @staticmethod
+    def _ft_film_row(filmid, digest, generation, channelid, showid, film):
+        return (
+            filmid,
+            binascii.hexlify(digest).decode('ascii'),
+            int(time.time()),
+            generation,
+            channelid,
+            showid,
+            film.title[:128],
+            film.search,
+            film.airedepoch,
+            film.seconds,
+            film.size,
+            film.description,
+            film.website,
+            film.url_sub,
+            film.url_video,
+            film.url_video_sd,
+            film.url_video_hd
+        )
+
     def _load_cache(self, reqtype, condition):
         filename = os.path.join(self.settings.datapath, reqtype + '.cache')
         dbLastUpdate = self.get_status()['modified']
@@ -1092,7 +1703,7 @@ class StoreSQLite(object):
                     if int(dbLastUpdate) != data.get('time', 0):
                         return None
                     data = data.get('data', [])
-                    if isinstance(data, list):
+                    if isinstance(data, (list, dict, )):
                         return data
                     return None
         # pylint: disable=broad-except
@@ -1102,7 +1713,7 @@ class StoreSQLite(object):
         return None
 
     def _save_cache(self, reqtype, condition, data):
-        if not isinstance(data, list):
+        if not isinstance(data, (list, dict, )):
             return False
         filename = os.path.join(self.settings.datapath, reqtype + '.cache')
         dbLastUpdate = self.get_status()['modified']
@@ -1137,8 +1748,142 @@ class StoreSQLite(object):
         self.exit()
         self.init(reset=True, convert=False)
 
+    def _handle_database_update(self, convert):
+        cursor = self.conn.cursor()
+        cursor.execute('PRAGMA user_version')
+        (version, ) = cursor.fetchone()
+        if version >= SCHEMA_VERSION:
+            # current version
+            cursor.close()
+            return True
+        elif convert is False:
+            # do not convert (Addon threads)
+            cursor.close()
+            self.exit()
+            self.notifier.show_updating_scheme()
+            return False
+        self.notifier.show_update_scheme_progress()
+        try:
+            if version < 1:
+                # convert from 0 to 1
+                self.logger.info('Converting database to version 1')
+                cursor.executescript("""
+                    CREATE INDEX IF NOT EXISTS "channel_touched" ON channel ("touched");
+                    CREATE INDEX IF NOT EXISTS "show_touched" ON show ("touched");
+                    CREATE INDEX IF NOT EXISTS "film_touched" ON film ("touched");
+                    PRAGMA user_version = 1;
+                """)
+                self.logger.info('Scheme successfully updated to version 1')
+                self.notifier.update_update_scheme_progress(5)
+            if version < 2:
+                # convert from 1 to 2
+                self.logger.info('Converting database to version 2')
+                self._create_history(self.conn)
+                cursor.execute('PRAGMA user_version = 2')
+                self.logger.info('Scheme successfully updated to version 2')
+                self.notifier.update_update_scheme_progress(10)
+            if version < 3:
+                # convert from 2 to 3
+                self.logger.info('Converting database to version 3')
+                self.logger.info('Rebuilding search keys of shows...')
+                self._rekey_search(cursor, 'show', 'show')
+                self.notifier.update_update_scheme_progress(15)
+                self.logger.info('Rebuilding search keys of films...')
+                self._rekey_search(cursor, 'film', 'title')
+                cursor.execute('PRAGMA user_version = 3')
+                self.logger.info('Scheme successfully updated to version 3')
+                self.notifier.update_update_scheme_progress(50)
+            if version < 4:
+                # convert from 3 to 4
+                self.logger.info('Converting database to version 4')
+                module = self._create_fts(self.conn)
+                if module is not None:
+                    self.logger.info('Building full text index using {}...', module)
+                    self._fill_index(self.conn, 'film_fts')
+                else:
+                    self.logger.warn('Full text search not supported by SQLite {}', sqlite3.sqlite_version)
+                self.conn.commit()
+                cursor.execute('PRAGMA user_version = 4')
+                self.logger.info('Scheme successfully updated to version 4')
+                self.notifier.update_update_scheme_progress(80)
+            if version < 5:
+                # convert from 4 to 5
+                self.logger.info('Converting database to version 5')
+                cursor.executescript("""
+                    CREATE INDEX IF NOT EXISTS "film_aired" ON film ("aired");
+                    CREATE INDEX IF NOT EXISTS "film_created" ON film ("dtCreated");
+                    PRAGMA user_version = 5;
+                """)
+                self.logger.info('Scheme successfully updated to version 5')
+                self.notifier.update_update_scheme_progress(90)
+            if version < 6:
+                # convert from 5 to 6
+                self.logger.info('Converting database to version 6')
+                self._create_directory(self.conn)
+                self.logger.info('Creating directory summaries...')
+                self._fill_directory(self.conn)
+                cursor.execute('PRAGMA user_version = 6')
+                self.logger.info('Scheme successfully updated to version 6')
+                self.notifier.update_update_scheme_progress(95)
+            if version < 7:
+                # convert from 6 to 7
+                self.logger.info('Converting database to version 7')
+                if version >= 4 and self._create_fts(self.conn) is not None:
+                    # descriptions were indexed without folding
+                    self.logger.info('Rebuilding full text index...')
+                    self._fill_index(self.conn, 'film_fts')
+                self.conn.commit()
+                cursor.execute('PRAGMA user_version = 7')
+                self.logger.info('Scheme successfully updated to version 7')
+                self.notifier.update_update_scheme_progress(99)
+            cursor.close()
+        finally:
+            self.notifier.close_update_scheme_progress()
+        return True
+
+    def _rekey_search(self, cursor, table, column):
+        # the search keys are computed in batches and written
+        # back with a single statement per batch
+        reader = self.conn.cursor()
+        lastid = 0
+        while True:
+            reader.execute(
+                'SELECT `id`,`{}` FROM `{}` WHERE ( `id` > ? ) ORDER BY `id` LIMIT 10000'.format(column, table),
+                (lastid, )
+            )
+            rows = [(mvutils.make_search_string(value), rowid, ) for (rowid, value) in reader.fetchall()]
+            if not rows:
+                break
+            cursor.executemany('UPDATE `{}` SET `search` = ? WHERE ( `id` = ? )'.format(table), rows)
+            lastid = rows[-1][1]
+        reader.close()
+        self.conn.commit()
+
+    def _handle_trigram_index(self):
+        # the substring search index follows the setting
+        exists = self._has_table(self.conn, 'film_trigram')
+        if self.settings.substringsearch and not exists:
+            if self._create_trigram(self.conn):
+                self.logger.info('Building substring search index...')
+                self._fill_index(self.conn, 'film_trigram')
+            else:
+                self.logger.warn('Substring search not supported by SQLite {}', sqlite3.sqlite_version)
+            self.conn.commit()
+        elif exists and not self.settings.substringsearch:
+            self.logger.info('Dropping substring search index...')
+            self.conn.execute('DROP TABLE `film_trigram`')
+            self.conn.commit()
+
     def _handle_database_initialization(self):
-        self.conn.executescript("""
+        self._create_tables(self.conn)
+        self._create_indexes(self.conn)
+        self._create_fts(self.conn)
+        self.conn.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+        self.update_status('IDLE')
+
+    @staticmethod
+    def _create_tables(conn):
+        conn.executescript("""
 PRAGMA foreign_keys = false;
 
 -- ----------------------------
@@ -1148,7 +1893,7 @@ DROP TABLE IF EXISTS "channel";
 CREATE TABLE "channel" (
      "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
      "dtCreated" integer(11,0) NOT NULL DEFAULT 0,
-     "touched" integer(1,0) NOT NULL DEFAULT 1,
+     "touched" integer(11,0) NOT NULL DEFAULT 1,
      "channel" TEXT(64,0) NOT NULL
 );
 
@@ -1160,7 +1905,7 @@ CREATE TABLE "film" (
      "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
      "idhash" TEXT(32,0) NOT NULL,
      "dtCreated" integer(11,0) NOT NULL DEFAULT 0,
-     "touched" integer(1,0) NOT NULL DEFAULT 1,
+     "touched" integer(11,0) NOT NULL DEFAULT 1,
      "channelid" INTEGER(11,0) NOT NULL,
      "showid" INTEGER(11,0) NOT NULL,
      "title" TEXT(128,0) NOT NULL,
@@ -1185,7 +1930,7 @@ DROP TABLE IF EXISTS "show";
 CREATE TABLE "show" (
      "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
      "dtCreated" integer(11,0) NOT NULL DEFAULT 0,
-     "touched" integer(1,0) NOT NULL DEFAULT 1,
+     "touched" integer(11,0) NOT NULL DEFAULT 1,
      "channelid" INTEGER(11,0) NOT NULL DEFAULT 0,
      "show" TEXT(128,0) NOT NULL,
      "search" TEXT(128,0) NOT NULL,
@@ -1212,13 +1957,292 @@ CREATE TABLE "status" (
      "tot_shw" integer(11,0),
      "tot_mov" integer(11,0)
 );
+        """)
+        StoreSQLite._create_history(conn)
+        StoreSQLite._create_directory(conn)
+
+    @staticmethod
+    def _create_history(conn):
+        conn.executescript("""
+-- ----------------------------
+--  Table structure for history
+-- ----------------------------
+DROP TABLE IF EXISTS "history";
+CREATE TABLE "history" (
+     "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+     "started" integer(11,0) NOT NULL,
+     "fullupdate" integer(1,0) NOT NULL,
+     "status" TEXT(32,0) NOT NULL,
+     "duration" REAL NOT NULL DEFAULT 0,
+     "bytes" integer(11,0) NOT NULL DEFAULT 0,
+     "records" integer(11,0) NOT NULL DEFAULT 0,
+     "rate" integer(11,0) NOT NULL DEFAULT 0,
+     "statements" integer(11,0) NOT NULL DEFAULT 0,
+     "tm_head" REAL NOT NULL DEFAULT 0,
+     "tm_download" REAL NOT NULL DEFAULT 0,
+     "tm_decompress" REAL NOT NULL DEFAULT 0,
+     "tm_cache" REAL NOT NULL DEFAULT 0,
+     "tm_parse" REAL NOT NULL DEFAULT 0,
+     "tm_insert" REAL NOT NULL DEFAULT 0,
+     "tm_finalize" REAL NOT NULL DEFAULT 0,
+     "tm_import" REAL NOT NULL DEFAULT 0
+);
+        """)
+
+    @staticmethod
+    def _create_directory(conn):
+        conn.executescript("""
+-- ----------------------------
+--  Table structure for dir_initial
+-- ----------------------------
+DROP TABLE IF EXISTS "dir_initial";
+CREATE TABLE "dir_initial" (
+     "channelid" integer(11,0) NOT NULL,
+     "initial" TEXT(1,0) NOT NULL,
+     "count" integer(11,0) NOT NULL,
+     PRIMARY KEY ("channelid", "initial")
+);
 
+-- ----------------------------
+--  Table structure for dir_showgroup
+-- ----------------------------
+DROP TABLE IF EXISTS "dir_showgroup";
+CREATE TABLE "dir_showgroup" (
+     "show" TEXT(128,0) NOT NULL PRIMARY KEY,
+     "initial" TEXT(1,0) NOT NULL,
+     "showids" TEXT NOT NULL,
+     "channelids" TEXT NOT NULL,
+     "channels" TEXT
+);
+CREATE INDEX "dir_showgroup_initial" ON dir_showgroup ("initial");
+
+-- ----------------------------
+--  Table structure for dir_recent
+-- ----------------------------
+DROP TABLE IF EXISTS "dir_recent";
+CREATE TABLE "dir_recent" (
+     "mode" integer(1,0) NOT NULL,
+     "start" integer(11,0) NOT NULL,
+     "channelid" integer(11,0) NOT NULL,
+     "count" integer(11,0) NOT NULL,
+     PRIMARY KEY ("mode", "start", "channelid")
+);
+        """)
+
+    @staticmethod
+    def _fill_directory(conn):
+        # summaries of the browsing directories. The initials of
+        # all channels are stored as channel 0. Recent films are
+        # counted per hour of their airing (mode 0) or creation
+        # date (mode 1), the bounds of the recent condition are
+        # full hours as well
+        conn.execute('DELETE FROM `dir_initial`')
+        conn.execute("""
+            INSERT INTO `dir_initial` ( `channelid`,`initial`,`count` )
+            SELECT      `channelid`,SUBSTR( `search`,1,1 ),COUNT(*)
+            FROM        `show`
+            GROUP BY    `channelid`,SUBSTR( `search`,1,1 )
+        """)
+        conn.execute("""
+            INSERT INTO `dir_initial` ( `channelid`,`initial`,`count` )
+            SELECT      0,SUBSTR( `search`,1,1 ),COUNT(*)
+            FROM        `show`
+            GROUP BY    SUBSTR( `search`,1,1 )
+        """)
+        conn.execute('DELETE FROM `dir_showgroup`')
+        conn.execute("""
+            INSERT INTO `dir_showgroup` ( `show`,`initial`,`showids`,`channelids`,`channels` )
+            SELECT      show.show,
+                        SUBSTR( MIN( show.search ),1,1 ),
+                        GROUP_CONCAT( show.id ),
+                        GROUP_CONCAT( show.channelid ),
+                        GROUP_CONCAT( channel.channel )
+            FROM        `show`
+            LEFT JOIN   `channel`
+                ON      ( channel.id = show.channelid )
+            GROUP BY    show.show
+        """)
+        conn.execute('DELETE FROM `dir_recent`')
+        start = StoreSQLite._get_timestamp() - RECENT_MAXAGE
+        for (mode, column) in [(0, 'aired'), (1, 'dtCreated')]:
+            conn.execute("""
+                INSERT INTO `dir_recent` ( `mode`,`start`,`channelid`,`count` )
+                SELECT      {0},`{1}` / {2} * {2},`channelid`,COUNT(*)
+                FROM        `film`
+                WHERE       ( `{1}` >= ? )
+                GROUP BY    `{1}` / {2} * {2},`channelid`
+            """.format(mode, column, TIMESTAMP_RESOLUTION), (start, ))
+        conn.commit()
+
+    @staticmethod
+    def _update_directory(conn, showid, filmid):
+        # extends the summaries by the shows and films with ids above
+        # the given ids. The few affected rows are merged here, older
+        # SQLite versions do not support upserts
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT      `channelid`,SUBSTR( `search`,1,1 ),COUNT(*)
+            FROM        `show`
+            WHERE       ( `id` > ? )
+            GROUP BY    `channelid`,SUBSTR( `search`,1,1 )
+        """, (showid, ))
+        initials = {}
+        for (channelid, initial, count) in cursor.fetchall():
+            for key in [(channelid, initial, ), (0, initial, )]:
+                initials[key] = initials.get(key, 0) + count
+        cursor.executemany(
+            'INSERT OR IGNORE INTO `dir_initial` ( `channelid`,`initial`,`count` ) VALUES ( ?,?,0 )',
+            list(initials.keys())
+        )
+        cursor.executemany(
+            'UPDATE `dir_initial` SET `count`=`count`+? WHERE ( `channelid`=? ) AND ( `initial`=? )',
+            [(count, channelid, initial, ) for ((channelid, initial), count) in initials.items()]
+        )
+        cursor.execute("""
+            SELECT      show.show,
+                        SUBSTR( show.search,1,1 ),
+                        show.id,
+                        show.channelid,
+                        channel.channel
+            FROM        `show`
+            LEFT JOIN   `channel`
+                ON      ( channel.id = show.channelid )
+            WHERE       ( show.id > ? )
+        """, (showid, ))
+        groups = {}
+        for (show, initial, sid, channelid, channel) in cursor.fetchall():
+            group = groups.get(show)
+            if group is None:
+                group = groups[show] = [initial, [], [], []]
+            group[0] = min(group[0], initial)
+            group[1].append(str(sid))
+            group[2].append(str(channelid))
+            if channel is not None:
+                group[3].append(channel)
+        for (show, group) in groups.items():
+            cursor.execute(
+                'SELECT `initial`,`showids`,`channelids`,`channels` FROM `dir_showgroup` WHERE ( `show`=? )', (show, ))
+            row = cursor.fetchone()
+            if row is not None:
+                group[0] = min(group[0], row[0])
+                group[1][:0] = row[1].split(',')
+                group[2][:0] = row[2].split(',')
+                group[3][:0] = row[3].split(',') if row[3] else []
+            cursor.execute(
+                'INSERT OR REPLACE INTO `dir_showgroup` ( `show`,`initial`,`showids`,`channelids`,`channels` ) VALUES ( ?,?,?,?,? )',
+                (show, group[0], ','.join(group[1]), ','.join(group[2]), ','.join(group[3]) or None, )
+            )
+        start = StoreSQLite._get_timestamp() - RECENT_MAXAGE
+        cursor.execute('DELETE FROM `dir_recent` WHERE ( `start` < ? )', (start, ))
+        for (mode, column) in [(0, 'aired'), (1, 'dtCreated')]:
+            cursor.execute("""
+                SELECT      `{0}` / {1} * {1},`channelid`,COUNT(*)
+                FROM        `film`
+                WHERE       ( `id` > ? )
+                            AND
+                            ( `{0}` >= ? )
+                GROUP BY    `{0}` / {1} * {1},`channelid`
+            """.format(column, TIMESTAMP_RESOLUTION), (filmid, start, ))
+            recent = cursor.fetchall()
+            cursor.executemany(
+                'INSERT OR IGNORE INTO `dir_recent` ( `mode`,`start`,`channelid`,`count` ) VALUES ( ?,?,?,0 )',
+                [(mode, hour, channelid, ) for (hour, channelid, _) in recent]
+            )
+            cursor.executemany(
+                'UPDATE `dir_recent` SET `count`=`count`+? WHERE ( `mode`=? ) AND ( `start`=? ) AND ( `channelid`=? )',
+                [(count, mode, hour, channelid, ) for (hour, channelid, count) in recent]
+            )
+        cursor.close()
+        conn.commit()
+
+    @staticmethod
+    def _create_fts(conn):
+        # returns the module of the created full text index or `None`
+        # if SQLite has been built without full text search
+        conn.execute('DROP TABLE IF EXISTS `film_fts`')
+        for (module, columns) in FTS_MODULES:
+            try:
+                conn.execute('CREATE VIRTUAL TABLE `film_fts` USING {}( {} )'.format(module, columns))
+                return module
+            except sqlite3.OperationalError:
+                pass
+        return None
+
+    @staticmethod
+    def _create_trigram(conn):
+        # returns `False` if SQLite does not provide the trigram
+        # tokenizer (3.34.0 and later)
+        conn.execute('DROP TABLE IF EXISTS `film_trigram`')
+        try:
+            conn.execute("CREATE VIRTUAL TABLE `film_trigram` USING fts5( `title`, `show`, content='', tokenize='trigram' )")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    @staticmethod
+    def _fill_index(conn, table, firstid=None, lastid=None):
+        # titles and shows are indexed by their search keys.
+        # Descriptions are folded the same way as search terms
+        if table == 'film_fts':
+            sql = """
+                INSERT INTO `film_fts` ( `rowid`,`name`,`description` )
+                SELECT      film.id,
+                            film.search || ' ' || show.search,
+                            SEARCHKEY( film.description )
+                FROM        `film`
+                INNER JOIN  `show` ON show.id = film.showid
+            """
+        else:
+            sql = """
+                INSERT INTO `film_trigram` ( `rowid`,`title`,`show` )
+                SELECT      film.id,
+                            film.search,
+                            show.search
+                FROM        `film`
+                INNER JOIN  `show` ON show.id = film.showid
+            """
+        if firstid is None:
+            conn.execute(sql)
+        else:
+            conn.execute(sql + ' WHERE ( film.id BETWEEN ? AND ? )', (firstid, lastid, ))
+
+    @staticmethod
+    def _connect(dbfile):
+        # the full text index folds descriptions in SQL by the
+        # same function that builds the search keys
+        conn = sqlite3.connect(dbfile, timeout=60)
+        conn.create_function(
+            'SEARCHKEY', 1, lambda value: mvutils.make_search_string(value) if value is not None else None)
+        return conn
+
+    @staticmethod
+    def _has_table(conn, table):
+        cursor = conn.execute(
+            "SELECT COUNT(*) FROM `sqlite_master` WHERE ( `type` = 'table' ) AND ( `name` = ? )", (table, ))
+        (count, ) = cursor.fetchone()
+        return count > 0
+
+    @staticmethod
+    def _get_module(conn, table):
+        # returns the module of a virtual table or `None`
+        cursor = conn.execute(
+            "SELECT `sql` FROM `sqlite_master` WHERE ( `type` = 'table' ) AND ( `name` = ? )", (table, ))
+        row = cursor.fetchone()
+        match = re.search(r'USING\s+(\w+)', row[0], re.IGNORECASE) if row is not None else None
+        return match.group(1).lower() if match is not None else None
+
+    @staticmethod
+    def _create_indexes(conn):
+        conn.executescript("""
 -- ----------------------------
 --  Indexes structure for table film
 -- ----------------------------
 CREATE INDEX "dupecheck" ON film ("idhash");
 CREATE INDEX "index_1" ON film ("channelid", "title" COLLATE NOCASE);
 CREATE INDEX "index_2" ON film ("showid", "title" COLLATE NOCASE);
+CREATE INDEX "film_touched" ON film ("touched");
+CREATE INDEX "film_aired" ON film ("aired");
+CREATE INDEX "film_created" ON film ("dtCreated");
 
 -- ----------------------------
 --  Indexes structure for table show
@@ -1226,36 +2250,12 @@ CREATE INDEX "index_2" ON film ("showid", "title" COLLATE NOCASE);
 CREATE INDEX "search" ON show ("search");
 CREATE INDEX "combined_1" ON show ("channelid", "search");
 CREATE INDEX "combined_2" ON show ("channelid", "show");
+CREATE INDEX "show_touched" ON show ("touched");
+
+-- ----------------------------
+--  Indexes structure for table channel
+-- ----------------------------
+CREATE INDEX "channel_touched" ON channel ("touched");
 
 PRAGMA foreign_keys = true;
         """)
-        self.update_status('IDLE')
-
-
-class GroupConcatClass(object):
-    """ Aggregate class for SQLite """
-
-    def __init__(self):
-        self.value = ''
-
-    def step(self, value):
-        """
-        Accumulates the values to aggregate
-
-        Args:
-            value(any): Value to aggregate
-        """
-        if value is not None:
-            if self.value == '':
-                self.value = '{0}'.format(value)
-            else:
-                self.value = '{0},{1}'.format(self.value, value)
-
-    def finalize(self):
-        """ Returns the aggregated value """
-        return self.value
-
-
-def get_unix_timestamp():
-    """ User defined function for SQLite """
-    return int(time.time())
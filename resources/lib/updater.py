@@ -7,34 +7,49 @@ Copyright 2017-2019, Leo Moll and Dominik Schlösser
 
 # -- Imports ------------------------------------------------
 import os
+import json
 import time
+import itertools
+import threading
 import subprocess
+import collections
+import multiprocessing
 
 # pylint: disable=import-error
 try:
     # Python 3.x
+    import queue
     from urllib.error import URLError
 except ImportError:
     # Python 2.x
+    import Queue as queue
     from urllib2 import URLError
 
 from contextlib import closing
 from datetime import datetime
 
-import json
-
 import resources.lib.mvutils as mvutils
 
 # from resources.lib.utils import *
 from resources.lib.store import Store
+from resources.lib.film import FilmRecord
+from resources.lib.filmlist import FilmlistParser
+from resources.lib.updatestats import UpdateStats
 from resources.lib.exceptions import DatabaseCorrupted
 from resources.lib.exceptions import DatabaseLost
 from resources.lib.exceptions import ExitRequested
 
 # -- Unpacker support ---------------------------------------
+UPD_CAN_XZ = False
 UPD_CAN_BZ2 = False
 UPD_CAN_GZ = False
 
+try:
+    import lzma
+    UPD_CAN_XZ = True
+except ImportError:
+    pass
+
 try:
     import bz2
     UPD_CAN_BZ2 = True
@@ -43,6 +58,7 @@ except ImportError:
 
 try:
     import gzip
+    import zlib
     UPD_CAN_GZ = True
 except ImportError:
     pass
@@ -51,6 +67,58 @@ except ImportError:
 FILMLISTE_URL = 'https://liste.mediathekview.de/'
 FILMLISTE_AKT = 'Filmliste-akt'
 FILMLISTE_DIF = 'Filmliste-diff'
+# number of records written to the database in one transaction
+BATCH_SIZE = 2000
+# number of parsed batches waiting for the database
+QUEUE_SIZE = 4
+# progress of an interrupted update
+UPDATE_CHECKPOINT = 'update-checkpoint.json'
+
+# -- Functions ----------------------------------------------
+
+
+def _make_film(values):
+    # converts the values of a list record into a film record
+    title = values[2][:255]
+    aired = "1980-01-01 00:00:00"
+    if len(values[3]) == 10:
+        aired = values[3][6:] + '-' + values[3][3:5] + '-' + values[3][:2]
+        if (len(values[4]) == 8):
+            aired = aired + " " + values[4]
+    duration = values[5] if len(values[5]) > 0 else "00:00:00"
+    url_video = values[8]
+    return FilmRecord(
+        values[0],
+        values[1][:255],
+        title,
+        aired,
+        duration,
+        int(values[6]) if len(values[6]) > 0 else 0,
+        values[7],
+        values[9],
+        values[10],
+        url_video,
+        _make_url(url_video, values[12]),
+        _make_url(url_video, values[14]),
+        int(values[16]) if len(values[16]) > 0 else 0,
+        values[18],
+        mvutils.make_search_string(title),
+        mvutils.make_duration(duration)
+    )
+
+
+def _make_film_rows(chunk):
+    # runs in the worker processes of the normalization pool
+    return [_make_film(values) for values in chunk]
+
+
+def _make_url(url_video, val):
+    parts = val.split('|')
+    if len(parts) == 2:
+        cnt = int(parts[0])
+        return url_video[:cnt] + parts[1]
+    else:
+        return val
 
 # -- Classes ------------------------------------------------
 # pylint: disable=bad-whitespace
@@ -76,9 +144,9 @@ class MediathekViewUpdater(object):
         self.tot_chn = 0
         self.tot_shw = 0
         self.tot_mov = 0
-        self.index = 0
         self.count = 0
-        self.film = {}
+        self.checkpoint = None
+        self.stats = UpdateStats()
 
     def init(self, convert=False):
         """ Initializes the updater """
@@ -144,6 +212,8 @@ class MediathekViewUpdater(object):
             return self._get_next_update_operation(force, full)
 
     def _get_next_update_operation(self, force=False, full=False):
+        # an update cycle starts with checking the available list
+        self.stats = UpdateStats()
         status = self.database.get_status()
         tsnow = int(time.time())
         tsold = status['lastupdate']
@@ -151,6 +221,7 @@ class MediathekViewUpdater(object):
         dtdb = datetime.fromtimestamp(tsdb)
         (tslist, dtlist) = self._get_update_modified_time()
         tsthresh = self.settings.updinterval
+        checkpoint = self._load_checkpoint() if status['status'] == 'ABORTED' else None
         if status['status'] == 'UNINIT':
             # database not initialized - no update
             self.logger.debug('database not initialized')
@@ -165,6 +236,11 @@ class MediathekViewUpdater(object):
             # already updating - no update
             self.logger.debug('Already updating')
             return 0
+        elif checkpoint is not None and dtlist.date() <= dtdb.date():
+            # last update was interrupted - continue where it stopped
+            self.logger.info(
+                'Resuming interrupted update after {} records', checkpoint['records'])
+            return 1 if checkpoint['full'] else 2
         elif not full and not force and tslist - tsdb < tsthresh:
             # available filmliste isn't tsthresh seconds newer than database
             self.logger.debug(
@@ -200,23 +276,25 @@ class MediathekViewUpdater(object):
         """
         if self.database is None:
             return
-        elif self.database.supports_native_update(full):
+        self.stats.full = full
+        if self.database.supports_native_update(full):
             if self.get_newest_list(full):
-                if self.database.native_update(full):
-                    self.cycle += 1
+                with self.stats.measure('finalize'):
+                    if self.database.native_update(full):
+                        # the downloaded database may have an older scheme
+                        self.database.init(convert=True)
+                        self.stats.status = 'IDLE'
+                        self.cycle += 1
             self.delete_list(full)
+        elif self.database.supports_update() and self.settings.updpipeline:
+            if self.stream_database(full):
+                self.cycle += 1
         elif self.database.supports_update():
             if self.get_newest_list(full):
                 if self.import_database(full):
                     self.cycle += 1
             self.delete_list(full)
-
-    def _object_pairs_hook(self, inputArg):
-        """
-        We need this because the default handler would convert everything to dict
-        and the same key would be overwritten and lost (e.g. X) 
-        """
-        return inputArg
+        self._save_stats()
 
     def import_database(self, full):
         """
@@ -232,89 +310,105 @@ class MediathekViewUpdater(object):
             return False
         # estimate number of records in update file
         records = int(mvutils.file_size(destfile) / avgrecsize)
+        with closing(open(destfile, 'rb')) as updatefile, self.stats.measure('import'):
+            return self._import_records(full, updatefile, destfile, lambda: records)
+
+    def stream_database(self, full):
+        """
+        Performs a database update by piping the update list
+        from the network through an in-process decompressor
+        directly into the record parser. No temporary files
+        are written.
+
+        Args:
+            full(bool): Perform full update if `True`
+        """
+        (url, _, _, avgrecsize) = self._get_update_info(full, True)
+        if url is None:
+            self.logger.error(
+                'No suitable archive decompressor available for this system')
+            self.notifier.show_missing_extractor_error()
+            return False
+        # pylint: disable=broad-except
+        try:
+            self.logger.info('Trying to stream update from {}...', url)
+            source = mvutils.DecompressingReader(
+                url, self._get_decompressor(url), aborthook=self.monitor.abort_requested)
+        except Exception as err:
+            self.logger.error('Failure opening {} - {}', url, err)
+            self.notifier.show_download_error(url, err)
+            return False
+
+        def estimate():
+            # extrapolate from the compressed bytes read so far
+            if self.count and source.bytes_read and source.total_size:
+                return max(1, int(self.count * source.total_size / source.bytes_read))
+            return max(1, int(source.total_size * 10 / avgrecsize))
+
+        try:
+            with closing(source), self.stats.measure('import'):
+                return self._import_records(full, source, url, estimate)
+        finally:
+            self.stats.bytes += source.bytes_read
+            self.stats.add_time('download', source.read_time)
+            self.stats.add_time('decompress', source.decompress_time)
+            # the parser thread has been waiting for both
+            self.stats.add_time('parse', -source.read_time - source.decompress_time)
+
+    def _import_records(self, full, source, name, estimate):
         if not self.database.ft_init():
             self.logger.warn(
                 'Failed to initialize update. Maybe a concurrency problem?')
             return False
-        
+
         # pylint: disable=broad-except
         try:
             starttime = time.time()
-            with closing( open(destfile, 'r') ) as updatefile:
-                jsonDoc = json.load( updatefile, encoding='UTF-8', object_pairs_hook=self._object_pairs_hook )
-                self.logger.info( 'Starting import of {} records from {}', (len(jsonDoc)-2), destfile )
-                flsm = 0
-                flts = 0
-                (self.tot_chn, self.tot_shw, self.tot_mov) = self._update_start(full)
-                self.notifier.show_update_progress()
-                
-                ####
-                flsm = 0
-                sender = ""
-                thema = ""
-                ### ROOT LIST
-                for atuple in jsonDoc:
-                    if (atuple[0] == 'Filmliste' and flsm == 0):
-                        ### META
-                        ### "Filmliste":["23.04.2020, 18:23","23.04.2020, 16:23","3","MSearch [Vers.: 3.1.129]","3c90946f05eb1e2fa6cf2327cca4f1d4"],
-                        flsm +=1
-                        # this is the timestamp of this database update
-                        value = atuple[1][0]
-                        try:
-                            fldt = datetime.strptime(value.strip(), "%d.%m.%Y, %H:%M")
-                            flts = int(time.mktime(fldt.timetuple()))
-                            self.database.update_status(filmupdate=flts)
-                            self.logger.info(
-                                'Filmliste dated {}', value.strip())
-                        except TypeError:
-                            # pylint: disable=line-too-long
-                            # SEE: https://forum.kodi.tv/showthread.php?tid=112916&pid=1214507#pid1214507
-                            # Wonderful. His name is also Leopold
-                            try:
-                                flts = int(time.mktime(time.strptime(
-                                    value.strip(), "%d.%m.%Y, %H:%M")))
-                                self.database.update_status(
-                                    filmupdate=flts)
-                                self.logger.info(
-                                    'Filmliste dated {}', value.strip())
-                                # pylint: disable=broad-except
-                            except Exception as err:
-                                # If the universe hates us...
-                                self.logger.debug(
-                                    'Could not determine date "{}" of filmliste: {}', value.strip(), err)
-                        except ValueError as err:
-                            pass
-                                        
-                    elif (atuple[0] == 'filmliste' and flsm == 1):
-                        flsm +=1
-                        # VOID - we do not need column names
-                        # "Filmliste":["Sender","Thema","Titel","Datum","Zeit","Dauer","Größe [MB]","Beschreibung","Url","Website","Url Untertitel","Url RTMP","Url Klein","Url RTMP Klein","Url HD","Url RTMP HD","DatumL","Url History","Geo","neu"],
-                    elif (atuple[0] == 'X'):
-                        self._init_record()
-                        # behaviour of the update list
-                        if (len(atuple[1][0]) > 0):
-                            sender = atuple[1][0]
-                        else:
-                            atuple[1][0] = sender
-                        # same for thema
-                        if (len(atuple[1][1]) > 0):
-                            thema = atuple[1][1]
-                        else:
-                            atuple[1][1] = thema
-                        ##
-                        self._add_value( atuple[1] )
-                        self._end_record(records)
-                        if self.count % 100 == 0 and self.monitor.abort_requested():
-                            # kodi is shutting down. Close all
-                            self._update_end(full, 'ABORTED')
-                            self.notifier.close_update_progress()
-                            return True
-                    
+            self.logger.info(
+                'Starting import of approx. {} records from {}', estimate(), name)
+            parser = iter(FilmlistParser(source))
+            header = next(parser, None)
+            skip = self._update_start(full, header)
+            self.notifier.show_update_progress()
+            if header is not None and header[0] == 'Filmliste':
+                self._set_list_date(header)
+            elif header is not None:
+                parser = itertools.chain([header], parser)
+
+            # records are parsed and normalized on a separate thread
+            # while this thread owns the database connection
+            records = queue.Queue(QUEUE_SIZE)
+            stop = threading.Event()
+            producer = threading.Thread(
+                target=self._produce_records, args=(parser, skip, records, stop, ))
+            producer.daemon = True
+            producer.start()
+            try:
+                while True:
+                    try:
+                        batch = records.get(timeout=1)
+                    except queue.Empty:
+                        batch = []
+                    if self.monitor.abort_requested():
+                        # kodi is shutting down. Close all
+                        self._update_end(full, 'ABORTED')
+                        self.notifier.close_update_progress()
+                        return True
+                    elif batch is None:
+                        break
+                    elif isinstance(batch, Exception):
+                        raise batch
+                    elif batch:
+                        self._flush_records(batch, estimate)
+            finally:
+                stop.set()
+
             self._update_end(full, 'IDLE')
+            self._remove_checkpoint()
             self.logger.info('{} records processed',self.count)
             self.logger.info(
                 'Import of {} in update cycle {} finished. Duration: {} seconds',
-                destfile,
+                name,
                 self.cycle,
                 int(time.time() - starttime)
             )
@@ -327,13 +421,15 @@ class MediathekViewUpdater(object):
             return False
         except DatabaseCorrupted as err:
             self.logger.error('{} on update cycle {}', err, self.cycle)
+            self._remove_checkpoint()
             self.notifier.close_update_progress()
         except DatabaseLost as err:
             self.logger.error('{} on update cycle {}', err, self.cycle)
+            self._remove_checkpoint()
             self.notifier.close_update_progress()
         except Exception as err:
             self.logger.error(
-                'Error {} while processing {} on update cycle {}', err, destfile, self.cycle)
+                'Error {} while processing {} on update cycle {}', err, name, self.cycle)
             self._update_end(full, 'ABORTED')
             self.notifier.close_update_progress()
         return False
@@ -352,9 +448,8 @@ class MediathekViewUpdater(object):
             self.notifier.show_missing_extractor_error()
             return False
 
-        # cleanup downloads
+        # cleanup downloads. The archive is kept for revalidation
         self.logger.info('Cleaning up old downloads...')
-        mvutils.file_remove(compfile)
         mvutils.file_remove(destfile)
 
         # download filmliste
@@ -365,12 +460,17 @@ class MediathekViewUpdater(object):
             self.logger.info('Trying to download {} from {}...',
                              os.path.basename(compfile), url)
             self.notifier.update_download_progress(0, url)
-            mvutils.url_retrieve(
-                url,
-                filename=compfile,
-                reporthook=self.notifier.hook_download_progress,
-                aborthook=self.monitor.abort_requested
-            )
+            with self.stats.measure('download'):
+                retrieved = mvutils.url_retrieve(
+                    url,
+                    filename=compfile,
+                    reporthook=self.notifier.hook_download_progress,
+                    aborthook=self.monitor.abort_requested,
+                    segments=self.settings.updsegments)
+            if retrieved:
+                self.stats.bytes += mvutils.file_size(compfile)
+            else:
+                self.logger.info('{} not modified since last download', url)
         except URLError as err:
             self.logger.error('Failure downloading {} - {}', url, err)
             self.notifier.close_download_progress()
@@ -389,9 +489,11 @@ class MediathekViewUpdater(object):
             return False
 
         # decompress filmliste
+        decompressstart = time.time()
         if self.use_xz is True:
             self.logger.info('Trying to decompress xz file...')
-            retval = subprocess.call([mvutils.find_xz(), '-d', compfile])
+            with closing(open(destfile, 'wb')) as dstfile:
+                retval = subprocess.call([mvutils.find_xz(), '-d', '-c', compfile], stdout=dstfile)
             self.logger.info('Return {}', retval)
         elif UPD_CAN_BZ2 is True:
             self.logger.info('Trying to decompress bz2 file...')
@@ -404,30 +506,42 @@ class MediathekViewUpdater(object):
         else:
             # should never reach
             pass
+        self.stats.add_time('decompress', time.time() - decompressstart)
+        if retval != 0:
+            # a broken archive must not be revalidated by the next update
+            self.logger.error('Failure decompressing {} - removing the archive', compfile)
+            mvutils.file_remove(compfile)
+            mvutils.file_remove(compfile + '.meta')
 
         self.notifier.close_download_progress()
         return retval == 0 and mvutils.file_exists(destfile)
 
     def delete_list(self, full):
         """
-        Deletes locally stored database update files
+        Deletes the locally stored decompressed database
+        update file. The downloaded archive is kept in order
+        to avoid downloading an unchanged list again.
 
         Args:
-            full(bool): Deletes the full lists if `True`
+            full(bool): Deletes the full list if `True`
         """
-        (_, compfile, destfile, _) = self._get_update_info(full)
+        (_, _, destfile, _) = self._get_update_info(full)
         self.logger.info('Cleaning up downloads...')
-        mvutils.file_remove(compfile)
         mvutils.file_remove(destfile)
 
-    def _get_update_info(self, full):
-        if self.use_xz is True:
+    def _get_update_info(self, full, pipeline=False):
+        if pipeline:
+            # only in-process decompressors can be used
+            ext = '.xz' if UPD_CAN_XZ else '.bz2' if UPD_CAN_BZ2 else '.gz' if UPD_CAN_GZ else None
+        elif self.use_xz is True:
             ext = '.xz'
         elif UPD_CAN_BZ2 is True:
             ext = '.bz2'
         elif UPD_CAN_GZ is True:
             ext = '.gz'
         else:
+            ext = None
+        if ext is None:
             return (None, None, None, 0, )
 
         info = self.database.get_native_info(full)
@@ -465,12 +579,22 @@ class MediathekViewUpdater(object):
             # should never happen since it will not be called
             return None
 
+    @staticmethod
+    def _get_decompressor(url):
+        if url.endswith('.xz'):
+            return lzma.LZMADecompressor()
+        elif url.endswith('.bz2'):
+            return bz2.BZ2Decompressor()
+        # gzip header and trailer are handled by zlib
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
     def _get_update_modified_time(self):
         url, _, _, _ = self._get_update_info(True)
         tslist = float("inf")
         dtlist = datetime.max
         try:
-            tslist = mvutils.url_lastmodified(url)
+            with self.stats.measure('head'):
+                tslist = mvutils.url_lastmodified(url)
             dtlist = datetime.fromtimestamp(tslist)
             self.logger.debug('List at {} last modified on {}', url, dtlist)
         # pylint: disable=broad-except
@@ -478,7 +602,7 @@ class MediathekViewUpdater(object):
             self.logger.debug('Unable to query last-modified time for {}: {} {}', url, type(err).__name__, err)
         return (tslist, dtlist)
 
-    def _update_start(self, full):
+    def _update_start(self, full, header):
         self.logger.info('Initializing update...')
         self.add_chn = 0
         self.add_shw = 0
@@ -486,31 +610,41 @@ class MediathekViewUpdater(object):
         self.del_chn = 0
         self.del_shw = 0
         self.del_mov = 0
-        self.index = 0
         self.count = 0
-        self.film = {
-            "channel": "",
-            "show": "",
-            "title": "",
-            "aired": "1980-01-01 00:00:00",
-            "duration": "00:00:00",
-            "size": 0,
-            "description": "",
-            "website": "",
-            "url_sub": "",
-            "url_video": "",
-            "url_video_sd": "",
-            "url_video_hd": "",
-            "airedepoch": 0,
-            "geo": ""
+        # the list hash identifies the list. Older lists carry only a date
+        listid = None
+        if header is not None and header[0] == 'Filmliste' and header[1]:
+            listid = header[1][4] if len(header[1]) > 4 else header[1][0]
+        checkpoint = self._load_checkpoint()
+        if checkpoint is not None and (checkpoint['full'] != full or checkpoint['list'] != listid):
+            checkpoint = None
+        with self.stats.measure('cache'):
+            (self.tot_chn, self.tot_shw, self.tot_mov, resumed) = self.database.ft_update_start(
+                full, checkpoint['generation'] if checkpoint is not None else None)
+        if not resumed:
+            self._remove_checkpoint()
+        self.checkpoint = {
+            'full': full,
+            'list': listid,
+            'generation': self.database.ft_get_generation()
         }
-        return self.database.ft_update_start(full)
+        if not resumed:
+            return 0
+        self.count = checkpoint['records']
+        self.add_chn = checkpoint['add_chn']
+        self.add_shw = checkpoint['add_shw']
+        self.add_mov = checkpoint['add_mov']
+        self.logger.info('Resuming update at record {}', self.count)
+        return self.count
 
     def _update_end(self, full, status):
         self.logger.info('Added: channels:%d, shows:%d, movies:%d ...' % (
             self.add_chn, self.add_shw, self.add_mov))
-        (self.del_chn, self.del_shw, self.del_mov, self.tot_chn, self.tot_shw,
-         self.tot_mov) = self.database.ft_update_end(full and status == 'IDLE')
+        with self.stats.measure('finalize'):
+            (self.del_chn, self.del_shw, self.del_mov, self.tot_chn, self.tot_shw,
+             self.tot_mov) = self.database.ft_update_end(full and status == 'IDLE')
+        self.stats.status = status
+        self.stats.statements = self.database.ft_get_statements()
         self.logger.info('Deleted: channels:%d, shows:%d, movies:%d' %
                          (self.del_chn, self.del_shw, self.del_mov))
         self.logger.info('Total: channels:%d, shows:%d, movies:%d' %
@@ -525,84 +659,176 @@ class MediathekViewUpdater(object):
             self.tot_chn, self.tot_shw, self.tot_mov
         )
 
-    def _init_record(self):
-        self.index = 0
-        self.film["title"] = ""
-        self.film["aired"] = "1980-01-01 00:00:00"
-        self.film["duration"] = "00:00:00"
-        self.film["size"] = 0
-        self.film["description"] = ""
-        self.film["website"] = ""
-        self.film["url_sub"] = ""
-        self.film["url_video"] = ""
-        self.film["url_video_sd"] = ""
-        self.film["url_video_hd"] = ""
-        self.film["airedepoch"] = 0
-        self.film["geo"] = ""
-
-    def _end_record(self, records):
-        if self.count % 1000 == 0:
+    def _set_list_date(self, header):
+        ### META
+        ### "Filmliste":["23.04.2020, 18:23","23.04.2020, 16:23","3","MSearch [Vers.: 3.1.129]","3c90946f05eb1e2fa6cf2327cca4f1d4"],
+        # this is the timestamp of this database update
+        value = header[1][0]
+        try:
+            fldt = datetime.strptime(value.strip(), "%d.%m.%Y, %H:%M")
+            flts = int(time.mktime(fldt.timetuple()))
+            self.database.update_status(filmupdate=flts)
+            self.logger.info(
+                'Filmliste dated {}', value.strip())
+        except TypeError:
             # pylint: disable=line-too-long
-            percent = int(self.count * 100 / records)
-            self.logger.info('In progress (%d%%): channels:%d, shows:%d, movies:%d ...' % (
-                percent, self.add_chn, self.add_shw, self.add_mov))
-            self.notifier.update_update_progress(
-                percent if percent <= 100 else 100, self.count, self.add_chn, self.add_shw, self.add_mov)
-            self.database.update_status(
-                add_chn=self.add_chn,
-                add_shw=self.add_shw,
-                add_mov=self.add_mov,
-                tot_chn=self.tot_chn + self.add_chn,
-                tot_shw=self.tot_shw + self.add_shw,
-                tot_mov=self.tot_mov + self.add_mov
-            )
-            self.count = self.count + 1
-            (_, cnt_chn, cnt_shw, cnt_mov) = self.database.ft_insert_film(
-                self.film,
-                True
-            )
-        else:
-            self.count = self.count + 1
-            (_, cnt_chn, cnt_shw, cnt_mov) = self.database.ft_insert_film(
-                self.film,
-                False
-            )
-        self.add_chn += cnt_chn
-        self.add_shw += cnt_shw
-        self.add_mov += cnt_mov
-
-    def _add_value(self, valueArray):
-        self.film["channel"] = valueArray[0]
-        self.film["show"] = valueArray[1][:255]
-        self.film["title"] = valueArray[2][:255]
-        ##
-        if len(valueArray[3]) == 10:
-            self.film["aired"] = valueArray[3][6:] + '-' + valueArray[3][3:5] + '-' + valueArray[3][:2]  
-            if (len(valueArray[4]) == 8):
-                self.film["aired"] = self.film["aired"] + " " + valueArray[4]
-        ##
-        if len(valueArray[5]) > 0:
-            self.film["duration"] = valueArray[5]
-        if len(valueArray[6]) > 0:
-            self.film["size"] = int(valueArray[6])
-        if len(valueArray[7]) > 0:
-            self.film["description"] = valueArray[7]
-        self.film["url_video"] = valueArray[8]
-        self.film["website"] = valueArray[9]
-        self.film["url_sub"] = valueArray[10]    
-        self.film["url_video_sd"] = self._make_url(valueArray[12])
-        self.film["url_video_hd"] = self._make_url(valueArray[14])
-        if len(valueArray[16]) > 0:
-            self.film["airedepoch"] = int(valueArray[16])
-        self.film["geo"] = valueArray[18]
-        
-    def _make_url(self, val):
-        parts = val.split('|')
-        if len(parts) == 2:
-            cnt = int(parts[0])
-            return self.film["url_video"][:cnt] + parts[1]
-        else:
-            return val
+            # SEE: https://forum.kodi.tv/showthread.php?tid=112916&pid=1214507#pid1214507
+            # Wonderful. His name is also Leopold
+            try:
+                flts = int(time.mktime(time.strptime(
+                    value.strip(), "%d.%m.%Y, %H:%M")))
+                self.database.update_status(
+                    filmupdate=flts)
+                self.logger.info(
+                    'Filmliste dated {}', value.strip())
+                # pylint: disable=broad-except
+            except Exception as err:
+                # If the universe hates us...
+                self.logger.debug(
+                    'Could not determine date "{}" of filmliste: {}', value.strip(), err)
+        except ValueError as err:
+            pass
+
+    def _produce_records(self, parser, skip, records, stop):
+        # records are normalized in a process pool if configured
+        pool = multiprocessing.Pool(self.settings.updworkers) if self.settings.updworkers > 1 else None
+        pending = collections.deque()
+        starttime = time.time()
+        # pylint: disable=broad-except
+        try:
+            sender = ""
+            thema = ""
+            chunk = []
+            for atuple in parser:
+                if stop.is_set():
+                    return
+                elif atuple[0] != 'X':
+                    # VOID - we do not need column names
+                    # "Filmliste":["Sender","Thema","Titel","Datum","Zeit","Dauer","Größe [MB]","Beschreibung","Url","Website","Url Untertitel","Url RTMP","Url Klein","Url RTMP Klein","Url HD","Url RTMP HD","DatumL","Url History","Geo","neu"],
+                    continue
+                # behaviour of the update list
+                if (len(atuple[1][0]) > 0):
+                    sender = atuple[1][0]
+                else:
+                    atuple[1][0] = sender
+                # same for thema
+                if (len(atuple[1][1]) > 0):
+                    thema = atuple[1][1]
+                else:
+                    atuple[1][1] = thema
+                if skip > 0:
+                    # already imported by the interrupted update
+                    skip -= 1
+                    continue
+                chunk.append(atuple[1])
+                if len(chunk) >= BATCH_SIZE:
+                    self._put_chunk(records, stop, chunk, pool, pending)
+                    chunk = []
+            self._put_chunk(records, stop, chunk, pool, pending)
+            while pending and not stop.is_set():
+                self._put_records(records, stop, pending.popleft().get())
+            self._put_records(records, stop, None)
+        except Exception as err:
+            self._put_records(records, stop, err)
+        finally:
+            if pool is not None:
+                pool.terminate()
+            self.stats.add_time('parse', time.time() - starttime)
+
+    def _put_chunk(self, records, stop, chunk, pool, pending):
+        if pool is None:
+            self._put_records(records, stop, [_make_film(values) for values in chunk])
+            return
+        # results are handed over in the order of the chunks
+        pending.append(pool.apply_async(_make_film_rows, (chunk, )))
+        while len(pending) > self.settings.updworkers * 2 or (pending and pending[0].ready()):
+            self._put_records(records, stop, pending.popleft().get())
+
+    def _put_records(self, records, stop, item):
+        starttime = time.time()
+        try:
+            while not stop.is_set():
+                try:
+                    records.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    pass
+        finally:
+            # waiting for the database is not part of parsing
+            self.stats.add_time('parse', starttime - time.time())
+
+    def _flush_records(self, batch, records):
+        if batch:
+            with self.stats.measure('insert'):
+                (cnt_chn, cnt_shw, cnt_mov) = self.database.ft_insert_films(
+                    batch,
+                    True
+                )
+            self.count += len(batch)
+            self.stats.records += len(batch)
+            self.add_chn += cnt_chn
+            self.add_shw += cnt_shw
+            self.add_mov += cnt_mov
+        # pylint: disable=line-too-long
+        total = records()
+        percent = int(self.count * 100 / total) if total > 0 else 100
+        self.logger.info('In progress (%d%%): channels:%d, shows:%d, movies:%d ...' % (
+            percent, self.add_chn, self.add_shw, self.add_mov))
+        self.notifier.update_update_progress(
+            percent if percent <= 100 else 100, self.count, self.add_chn, self.add_shw, self.add_mov)
+        self.database.update_status(
+            add_chn=self.add_chn,
+            add_shw=self.add_shw,
+            add_mov=self.add_mov,
+            tot_chn=self.tot_chn + self.add_chn,
+            tot_shw=self.tot_shw + self.add_shw,
+            tot_mov=self.tot_mov + self.add_mov
+        )
+        self._save_checkpoint()
+
+    def _save_stats(self):
+        self.stats.finish()
+        self.logger.info('Update statistics: {}', self.stats)
+        if self.database is not None:
+            self.database.add_history(self.stats.get_as_dict())
+        self.stats = UpdateStats()
+
+    def _load_checkpoint(self):
+        filename = os.path.join(self.settings.datapath, UPDATE_CHECKPOINT)
+        if not mvutils.file_exists(filename):
+            return None
+        # pylint: disable=broad-except
+        try:
+            with closing(open(filename, 'r')) as cpfile:
+                checkpoint = json.load(cpfile)
+            for key in ['full', 'list', 'generation', 'records', 'add_chn', 'add_shw', 'add_mov']:
+                if key not in checkpoint:
+                    raise ValueError('Missing {}'.format(key))
+            return checkpoint
+        except Exception as err:
+            self.logger.warn('Ignoring invalid checkpoint {}: {}', filename, err)
+            return None
+
+    def _save_checkpoint(self):
+        if self.checkpoint is None:
+            return
+        # all records counted so far have been committed
+        self.checkpoint['records'] = self.count
+        self.checkpoint['add_chn'] = self.add_chn
+        self.checkpoint['add_shw'] = self.add_shw
+        self.checkpoint['add_mov'] = self.add_mov
+        filename = os.path.join(self.settings.datapath, UPDATE_CHECKPOINT)
+        # pylint: disable=broad-except
+        try:
+            with closing(open(filename + '.tmp', 'w')) as cpfile:
+                json.dump(self.checkpoint, cpfile)
+            mvutils.file_rename(filename + '.tmp', filename)
+        except Exception as err:
+            self.logger.warn('Failed to write checkpoint {}: {}', filename, err)
+
+    def _remove_checkpoint(self):
+        self.checkpoint = None
+        mvutils.file_remove(os.path.join(self.settings.datapath, UPDATE_CHECKPOINT))
 
     def _decompress_bz2(self, sourcefile, destfile):
         blocksize = 8192
@@ -633,9 +859,9 @@ class MediathekViewUpdater(object):
                 self.logger.info(
                     'Trying to decompress gzip file "{}" using {}...', sourcefile, gzip_binary)
                 try:
-                    mvutils.file_remove(destfile)
-                    retval = subprocess.call([gzip_binary, '-d', sourcefile])
-                    self.logger.info('Calling {} -d {} returned {}',
+                    with closing(open(destfile, 'wb')) as dstfile:
+                        retval = subprocess.call([gzip_binary, '-d', '-c', sourcefile], stdout=dstfile)
+                    self.logger.info('Calling {} -d -c {} returned {}',
                                      gzip_binary, sourcefile, retval)
                     return retval
                 except Exception as err:
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+The update statistics module
+
+Copyright 2017-2019, Leo Moll and Dominik Schlösser
+Licensed under MIT License
+"""
+
+# -- Imports ------------------------------------------------
+import time
+import threading
+
+from datetime import datetime
+from contextlib import contextmanager
+
+# -- Constants ----------------------------------------------
+# `import` is the wall clock time of the record import. Parsing
+# and inserting run concurrently during this time.
+PHASES = [
+    'head', 'download', 'decompress', 'cache',
+    'parse', 'insert', 'finalize', 'import'
+]
+
+# -- Functions ----------------------------------------------
+
+
+def format_stats(stats):
+    """
+    Returns a one line summary of the statistics of an
+    update cycle
+
+    Args:
+        stats(dict): statistics as returned by
+            `UpdateStats.get_as_dict()`
+    """
+    return '{} {} update {}: {} records in {:.1f}s ({} records/s), {} statements, {:.1f} MB - {}'.format(
+        datetime.fromtimestamp(stats['started']).strftime('%Y-%m-%d %H:%M:%S'),
+        'full' if stats['fullupdate'] else 'differential',
+        stats['status'],
+        stats['records'],
+        stats['duration'],
+        stats['rate'],
+        stats['statements'],
+        stats['bytes'] / 1048576.0,
+        ', '.join('{} {:.1f}s'.format(phase, stats['times'][phase]) for phase in PHASES)
+    )
+
+# -- Classes ------------------------------------------------
+
+
+class UpdateStats(object):
+    """
+    Timings and counters of an update cycle. Phases may
+    be measured from different threads.
+    """
+
+    def __init__(self):
+        self.started = int(time.time())
+        self.starttime = time.time()
+        self.full = False
+        self.status = 'FAILED'
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.duration = 0.0
+        self.bytes = 0
+        self.records = 0
+        self.statements = 0
+        self.lock = threading.Lock()
+
+    def add_time(self, phase, seconds):
+        """
+        Adds the time spent in a phase
+
+        Args:
+            phase(str): name of the phase
+
+            seconds(float): time spent in seconds
+        """
+        with self.lock:
+            self.times[phase] += seconds
+
+    @contextmanager
+    def measure(self, phase):
+        """
+        Returns a context manager adding the time spent
+        inside of it to a phase
+
+        Args:
+            phase(str): name of the phase
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.time() - start)
+
+    def finish(self):
+        """ Ends the update cycle """
+        self.duration = time.time() - self.starttime
+
+    def get_rate(self):
+        """ Returns the number of records imported per second """
+        return int(self.records / self.times['import']) if self.times['import'] > 0 else 0
+
+    def get_as_dict(self):
+        """ Returns the statistics as a dictionary """
+        return {
+            'started': self.started,
+            'fullupdate': 1 if self.full else 0,
+            'status': self.status,
+            'duration': self.duration,
+            'bytes': self.bytes,
+            'records': self.records,
+            'rate': self.get_rate(),
+            'statements': self.statements,
+            'times': dict(self.times)
+        }
+
+    def __str__(self):
+        return format_stats(self.get_as_dict())